@@ -0,0 +1,46 @@
+"""add formularios_dinamicos keyset index
+
+Revision ID: a2c7e4b9d1f3
+Revises: f1b6d3a8c4e2
+Create Date: 2026-03-08
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a2c7e4b9d1f3"
+down_revision: Union[str, Sequence[str], None] = "f1b6d3a8c4e2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Orden del listado de formularios (nombre ASC, version DESC, id ASC) que usa el keyset
+INDEXES = (
+    ("formularios_dinamicos", "idx_formularios_dinamicos_nombre_version_id", ["nombre", "version DESC", "id"]),
+)
+
+
+def _index_exists(inspector, table_name: str, index_name: str) -> bool:
+    return any(idx["name"] == index_name for idx in inspector.get_indexes(table_name))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table_name, index_name, columns in INDEXES:
+        if not _index_exists(inspector, table_name, index_name):
+            op.create_index(index_name, table_name, [sa.text(col) for col in columns], unique=False)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table_name, index_name, _columns in reversed(INDEXES):
+        if _index_exists(inspector, table_name, index_name):
+            op.drop_index(index_name, table_name=table_name)
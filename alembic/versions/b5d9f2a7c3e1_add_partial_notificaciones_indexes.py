@@ -0,0 +1,78 @@
+"""add partial notificaciones indexes
+
+Revision ID: b5d9f2a7c3e1
+Revises: a2c7e4b9d1f3
+Create Date: 2026-03-09
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b5d9f2a7c3e1"
+down_revision: Union[str, Sequence[str], None] = "a2c7e4b9d1f3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (tabla, índice, columnas, predicado del índice parcial)
+INDEXES = (
+    (
+        "notificaciones",
+        "idx_notificaciones_no_leidas_usuario_creado_id",
+        ["usuario_id", "creado_en DESC", "id DESC"],
+        "leida = false",
+    ),
+    (
+        "notificaciones",
+        "idx_notificaciones_usuario_tipo_creado_id",
+        ["usuario_id", "tipo", "creado_en DESC", "id DESC"],
+        None,
+    ),
+)
+
+# Sustituido por el índice parcial de no leídas (las leídas usan usuario_id, creado_en DESC, id DESC)
+REPLACED_INDEX = (
+    "notificaciones",
+    "idx_notificaciones_usuario_leida_creado_id",
+    ["usuario_id", "leida", "creado_en DESC", "id DESC"],
+)
+
+
+def _index_exists(inspector, table_name: str, index_name: str) -> bool:
+    return any(idx["name"] == index_name for idx in inspector.get_indexes(table_name))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table_name, index_name, columns, where in INDEXES:
+        if not _index_exists(inspector, table_name, index_name):
+            op.create_index(
+                index_name,
+                table_name,
+                [sa.text(col) for col in columns],
+                unique=False,
+                postgresql_where=sa.text(where) if where else None,
+            )
+
+    table_name, index_name, _columns = REPLACED_INDEX
+    if _index_exists(inspector, table_name, index_name):
+        op.drop_index(index_name, table_name=table_name)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    table_name, index_name, columns = REPLACED_INDEX
+    if not _index_exists(inspector, table_name, index_name):
+        op.create_index(index_name, table_name, [sa.text(col) for col in columns], unique=False)
+
+    for table_name, index_name, _columns, _where in reversed(INDEXES):
+        if _index_exists(inspector, table_name, index_name):
+            op.drop_index(index_name, table_name=table_name)
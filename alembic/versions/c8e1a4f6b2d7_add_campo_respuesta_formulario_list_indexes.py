@@ -0,0 +1,47 @@
+"""add campo and respuesta formulario listing indexes
+
+Revision ID: c8e1a4f6b2d7
+Revises: b5d9f2a7c3e1
+Create Date: 2026-03-10
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c8e1a4f6b2d7"
+down_revision: Union[str, Sequence[str], None] = "b5d9f2a7c3e1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Filtro principal + orden de los listados de campos y respuestas
+INDEXES = (
+    ("campo_formularios", "idx_campo_formularios_formulario_orden", ["formulario_id", "orden", "creado_en", "id"]),
+    ("respuesta_formularios", "idx_respuesta_formularios_auditoria_creado", ["auditoria_id", "creado_en", "id"]),
+)
+
+
+def _index_exists(inspector, table_name: str, index_name: str) -> bool:
+    return any(idx["name"] == index_name for idx in inspector.get_indexes(table_name))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table_name, index_name, columns in INDEXES:
+        if not _index_exists(inspector, table_name, index_name):
+            op.create_index(index_name, table_name, [sa.text(col) for col in columns], unique=False)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table_name, index_name, _columns in reversed(INDEXES):
+        if _index_exists(inspector, table_name, index_name):
+            op.drop_index(index_name, table_name=table_name)
@@ -0,0 +1,61 @@
+"""add generated es_iso_auditoria column to formularios_dinamicos
+
+Revision ID: d3f8b1c6e9a4
+Revises: c8e1a4f6b2d7
+Create Date: 2026-03-11
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d3f8b1c6e9a4"
+down_revision: Union[str, Sequence[str], None] = "c8e1a4f6b2d7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLE_NAME = "formularios_dinamicos"
+COLUMN_NAME = "es_iso_auditoria"
+INDEX_NAME = "idx_formularios_dinamicos_iso_auditoria"
+EXPRESION = "lower(trim(modulo)) = 'auditorias' AND lower(trim(entidad_tipo)) = 'auditoria'"
+
+
+def _column_exists(inspector, table_name: str, column_name: str) -> bool:
+    return any(col["name"] == column_name for col in inspector.get_columns(table_name))
+
+
+def _index_exists(inspector, table_name: str, index_name: str) -> bool:
+    return any(idx["name"] == index_name for idx in inspector.get_indexes(table_name))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if not _column_exists(inspector, TABLE_NAME, COLUMN_NAME):
+        op.add_column(
+            TABLE_NAME,
+            sa.Column(COLUMN_NAME, sa.Boolean(), sa.Computed(EXPRESION, persisted=True)),
+        )
+    if not _index_exists(inspector, TABLE_NAME, INDEX_NAME):
+        op.create_index(
+            INDEX_NAME,
+            TABLE_NAME,
+            [COLUMN_NAME],
+            unique=False,
+            postgresql_where=sa.text(COLUMN_NAME),
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if _index_exists(inspector, TABLE_NAME, INDEX_NAME):
+        op.drop_index(INDEX_NAME, table_name=TABLE_NAME)
+    if _column_exists(inspector, TABLE_NAME, COLUMN_NAME):
+        op.drop_column(TABLE_NAME, COLUMN_NAME)
@@ -0,0 +1,51 @@
+"""add keyset pagination indexes
+
+Revision ID: d4e8b2f1a6c9
+Revises: c3f8a1d2e4b7
+Create Date: 2026-03-05
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d4e8b2f1a6c9"
+down_revision: Union[str, Sequence[str], None] = "c3f8a1d2e4b7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = (
+    ("instancia_procesos", "idx_instancia_procesos_proceso_id_id", ["proceso_id", "id"]),
+    ("instancia_procesos", "idx_instancia_procesos_estado_id", ["estado", "id"]),
+    ("accion_procesos", "idx_accion_procesos_proceso_id_id", ["proceso_id", "id"]),
+    ("accion_procesos", "idx_accion_procesos_estado_id", ["estado", "id"]),
+    ("riesgos", "idx_riesgos_proceso_id_id", ["proceso_id", "id"]),
+    ("riesgos", "idx_riesgos_estado_id", ["estado", "id"]),
+    ("control_riesgos", "idx_control_riesgos_tipo_control_id", ["tipo_control", "id"]),
+)
+
+
+def _index_exists(inspector, table_name: str, index_name: str) -> bool:
+    return any(idx["name"] == index_name for idx in inspector.get_indexes(table_name))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table_name, index_name, columns in INDEXES:
+        if not _index_exists(inspector, table_name, index_name):
+            op.create_index(index_name, table_name, columns, unique=False)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table_name, index_name, _columns in reversed(INDEXES):
+        if _index_exists(inspector, table_name, index_name):
+            op.drop_index(index_name, table_name=table_name)
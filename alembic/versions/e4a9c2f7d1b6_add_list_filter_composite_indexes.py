@@ -0,0 +1,57 @@
+"""add composite indexes for configuraciones, formularios and tickets list filters
+
+Revision ID: e4a9c2f7d1b6
+Revises: d3f8b1c6e9a4
+Create Date: 2026-03-12
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e4a9c2f7d1b6"
+down_revision: Union[str, Sequence[str], None] = "d3f8b1c6e9a4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Predicados WHERE + ORDER BY de los listados
+INDEXES = (
+    ("configuraciones", "idx_configuraciones_categoria_activa_clave", ["categoria", "activa", "clave"]),
+    (
+        "formularios_dinamicos",
+        "idx_formularios_dinamicos_modulo_entidad_nombre",
+        ["modulo", "entidad_tipo", "nombre", "version DESC", "id"],
+    ),
+    ("campo_formularios", "idx_campo_formularios_proceso_orden", ["proceso_id", "orden", "creado_en", "id"]),
+    ("respuesta_formularios", "idx_respuesta_formularios_instancia_creado", ["instancia_proceso_id", "creado_en", "id"]),
+    ("respuesta_formularios", "idx_respuesta_formularios_campo_creado", ["campo_formulario_id", "creado_en", "id"]),
+    ("tickets", "idx_tickets_solicitante_estado_creado", ["solicitante_id", "estado", "creado_en DESC"]),
+    ("tickets", "idx_tickets_area_destino_estado_creado", ["area_destino_id", "estado", "creado_en DESC"]),
+    ("tickets", "idx_tickets_asignado_estado_creado", ["asignado_a", "estado", "creado_en DESC"]),
+)
+
+
+def _index_exists(inspector, table_name: str, index_name: str) -> bool:
+    return any(idx["name"] == index_name for idx in inspector.get_indexes(table_name))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table_name, index_name, columns in INDEXES:
+        if not _index_exists(inspector, table_name, index_name):
+            op.create_index(index_name, table_name, [sa.text(col) for col in columns], unique=False)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table_name, index_name, _columns in reversed(INDEXES):
+        if _index_exists(inspector, table_name, index_name):
+            op.drop_index(index_name, table_name=table_name)
@@ -0,0 +1,49 @@
+"""add composite list filter indexes
+
+Revision ID: e7a3c9d5b2f8
+Revises: d4e8b2f1a6c9
+Create Date: 2026-03-06
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e7a3c9d5b2f8"
+down_revision: Union[str, Sequence[str], None] = "d4e8b2f1a6c9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Filtros combinados de los listados + id como última columna para el orden/keyset
+INDEXES = (
+    ("instancia_procesos", "idx_instancia_procesos_proceso_estado_id", ["proceso_id", "estado", "id"]),
+    ("accion_procesos", "idx_accion_procesos_proceso_estado_id", ["proceso_id", "estado", "id"]),
+    ("riesgos", "idx_riesgos_proceso_estado_id", ["proceso_id", "estado", "id"]),
+    ("control_riesgos", "idx_control_riesgos_activo_tipo_id", ["activo", "tipo_control", "id"]),
+)
+
+
+def _index_exists(inspector, table_name: str, index_name: str) -> bool:
+    return any(idx["name"] == index_name for idx in inspector.get_indexes(table_name))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table_name, index_name, columns in INDEXES:
+        if not _index_exists(inspector, table_name, index_name):
+            op.create_index(index_name, table_name, columns, unique=False)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table_name, index_name, _columns in reversed(INDEXES):
+        if _index_exists(inspector, table_name, index_name):
+            op.drop_index(index_name, table_name=table_name)
@@ -0,0 +1,54 @@
+"""add audit_log and notificaciones list indexes
+
+Revision ID: f1b6d3a8c4e2
+Revises: e7a3c9d5b2f8
+Create Date: 2026-03-07
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f1b6d3a8c4e2"
+down_revision: Union[str, Sequence[str], None] = "e7a3c9d5b2f8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Filtros de los listados + orden descendente (fecha/creado_en, id) que usa el keyset
+INDEXES = (
+    ("audit_log", "idx_audit_log_fecha_id_desc", ["fecha DESC", "id DESC"]),
+    ("audit_log", "idx_audit_log_usuario_fecha_id", ["usuario_id", "fecha DESC", "id DESC"]),
+    ("audit_log", "idx_audit_log_tabla_fecha_id", ["tabla", "fecha DESC", "id DESC"]),
+    ("notificaciones", "idx_notificaciones_usuario_creado_id", ["usuario_id", "creado_en DESC", "id DESC"]),
+    (
+        "notificaciones",
+        "idx_notificaciones_usuario_leida_creado_id",
+        ["usuario_id", "leida", "creado_en DESC", "id DESC"],
+    ),
+)
+
+
+def _index_exists(inspector, table_name: str, index_name: str) -> bool:
+    return any(idx["name"] == index_name for idx in inspector.get_indexes(table_name))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table_name, index_name, columns in INDEXES:
+        if not _index_exists(inspector, table_name, index_name):
+            op.create_index(index_name, table_name, [sa.text(col) for col in columns], unique=False)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table_name, index_name, _columns in reversed(INDEXES):
+        if _index_exists(inspector, table_name, index_name):
+            op.drop_index(index_name, table_name=table_name)
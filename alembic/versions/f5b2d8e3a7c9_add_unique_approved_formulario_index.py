@@ -0,0 +1,74 @@
+"""add unique partial index for the approved and active formulario version
+
+Revision ID: f5b2d8e3a7c9
+Revises: e4a9c2f7d1b6
+Create Date: 2026-03-13
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f5b2d8e3a7c9"
+down_revision: Union[str, Sequence[str], None] = "e4a9c2f7d1b6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLE_NAME = "formularios_dinamicos"
+INDEX_NAME = "uq_formularios_dinamicos_aprobado_activo"
+
+
+def _index_exists(inspector, table_name: str, index_name: str) -> bool:
+    return any(idx["name"] == index_name for idx in inspector.get_indexes(table_name))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if _index_exists(inspector, TABLE_NAME, INDEX_NAME):
+        return
+
+    # No se corrigen datos en silencio: si hay varias versiones aprobadas y activas para el mismo
+    # destino la migración falla y hay que decidir manualmente cuál queda vigente
+    duplicados = bind.execute(
+        sa.text(
+            """
+            SELECT modulo, entidad_tipo, proceso_id, array_agg(codigo ORDER BY codigo) AS codigos
+            FROM formularios_dinamicos
+            WHERE estado_workflow = 'aprobado' AND activo
+            GROUP BY modulo, entidad_tipo, proceso_id
+            HAVING count(*) > 1
+            """
+        )
+    ).all()
+    if duplicados:
+        detalle = "; ".join(
+            f"{fila.modulo}/{fila.entidad_tipo}/{fila.proceso_id}: {', '.join(fila.codigos)}"
+            for fila in duplicados
+        )
+        raise RuntimeError(
+            f"Hay formularios con más de una versión aprobada y activa ({detalle}). "
+            "Deje una sola vigente por destino (las demás en 'obsoleto') y vuelva a ejecutar la migración."
+        )
+
+    op.create_index(
+        INDEX_NAME,
+        TABLE_NAME,
+        ["modulo", "entidad_tipo", "proceso_id"],
+        unique=True,
+        postgresql_nulls_not_distinct=True,
+        postgresql_where=sa.text("estado_workflow = 'aprobado' AND activo"),
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if _index_exists(inspector, TABLE_NAME, INDEX_NAME):
+        op.drop_index(INDEX_NAME, table_name=TABLE_NAME)
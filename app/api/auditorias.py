@@ -1,7 +1,7 @@
 """
 Endpoints CRUD para gestión de auditorías
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy import func
 from sqlalchemy.orm import Session
@@ -29,9 +29,10 @@ from ..services.auditorias.auditoria_service import AuditoriaService
 from ..services.auditorias.hallazgo_service import HallazgoService
 from ..schemas.calidad import NoConformidadResponse
 from ..utils.notification_service import crear_notificacion_asignacion
-from ..api.dependencies import require_any_permission
+from ..api.dependencies import require_any_permission, get_permission_codes
 from ..models.usuario import Usuario
 from ..utils.pdf_generator import PDFGenerator
+from ..services.reportes import invalidar_cache_reportes
 
 router = APIRouter(prefix="/api/v1", tags=["auditorias"])
 
@@ -167,8 +168,8 @@ def _validar_etapa_para_hallazgo(
 
 @router.get("/programa-auditorias", response_model=List[ProgramaAuditoriaResponse])
 def listar_programa_auditorias(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     anio: int = None,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["auditorias.ver", "sistema.admin"]))
@@ -453,7 +454,9 @@ def iniciar_auditoria(
     current_user: Usuario = Depends(require_any_permission(["auditorias.ejecutar", "sistema.admin"]))
 ):
     """Iniciar la ejecución de una auditoría"""
-    return AuditoriaService.iniciar_auditoria(db, auditoria_id, current_user.id)
+    auditoria = AuditoriaService.iniciar_auditoria(db, auditoria_id, current_user.id)
+    invalidar_cache_reportes()
+    return auditoria
 
 @router.post("/auditorias/{auditoria_id}/finalizar", response_model=AuditoriaResponse)
 def finalizar_auditoria(
@@ -462,7 +465,9 @@ def finalizar_auditoria(
     current_user: Usuario = Depends(require_any_permission(["auditorias.ejecutar", "sistema.admin"]))
 ):
     """Finalizar la ejecución de una auditoría"""
-    return AuditoriaService.finalizar_auditoria(db, auditoria_id, current_user.id)
+    auditoria = AuditoriaService.finalizar_auditoria(db, auditoria_id, current_user.id)
+    invalidar_cache_reportes()
+    return auditoria
 
 @router.post("/auditorias/{auditoria_id}/cerrar", response_model=AuditoriaResponse)
 def cerrar_auditoria(
@@ -471,7 +476,9 @@ def cerrar_auditoria(
     current_user: Usuario = Depends(require_any_permission(["auditorias.ejecutar", "sistema.admin"]))
 ):
     """Cerrar formalmente una auditoría"""
-    return AuditoriaService.cerrar_auditoria(db, auditoria_id, current_user.id)
+    auditoria = AuditoriaService.cerrar_auditoria(db, auditoria_id, current_user.id)
+    invalidar_cache_reportes()
+    return auditoria
 
 # ... existing hallazgo endpoints ...
 
@@ -547,8 +554,8 @@ def generar_informe_auditoria(
 
 @router.get("/auditorias", response_model=List[AuditoriaResponse])
 def listar_auditorias(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     estado: str = None,
     tipo: str = None,
     proceso_id: UUID = None,
@@ -577,13 +584,7 @@ def crear_auditoria(
 ):
     """Crear una nueva auditoría"""
     # Verify permission "auditorias.planificar"
-    tiene_permiso = any(
-        rp.permiso.codigo == "auditorias.planificar" 
-        for ur in current_user.roles 
-        for rp in ur.rol.permisos
-        if rp.permiso
-    )
-    if not tiene_permiso:
+    if "auditorias.planificar" not in get_permission_codes(current_user):
         raise HTTPException(status_code=403, detail="No tienes permiso para planificar auditorías")
 
     # Verificar código único
@@ -616,6 +617,7 @@ def crear_auditoria(
     db.add(nueva_auditoria)
     db.commit()
     db.refresh(nueva_auditoria)
+    invalidar_cache_reportes()
     
     # Notificar al auditor líder asignado
     if nueva_auditoria.auditor_lider_id:
@@ -696,6 +698,7 @@ def actualizar_auditoria(
     
     db.commit()
     db.refresh(auditoria)
+    invalidar_cache_reportes()
     
     # Notificar si cambió el auditor líder
     if auditoria.auditor_lider_id and auditoria.auditor_lider_id != previous_auditor_lider:
@@ -727,6 +730,7 @@ def eliminar_auditoria(
     
     db.delete(auditoria)
     db.commit()
+    invalidar_cache_reportes()
     return None
 
 
@@ -749,8 +753,8 @@ def listar_hallazgos_auditoria(
 
 @router.get("/hallazgos-auditoria", response_model=List[HallazgoAuditoriaResponse])
 def listar_hallazgos(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     estado: str = None,
     tipo_hallazgo: str = None,
     db: Session = Depends(get_db),
@@ -776,13 +780,7 @@ def crear_hallazgo_auditoria(
 ):
     """Crear un nuevo hallazgo de auditoría"""
     # Verify permission "auditorias.ejecutar"
-    tiene_permiso = any(
-        rp.permiso.codigo == "auditorias.ejecutar" 
-        for ur in current_user.roles 
-        for rp in ur.rol.permisos
-        if rp.permiso
-    )
-    if not tiene_permiso:
+    if "auditorias.ejecutar" not in get_permission_codes(current_user):
         raise HTTPException(status_code=403, detail="No tienes permiso para registrar hallazgos")
 
     hallazgo_data = hallazgo.model_dump()
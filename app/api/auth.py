@@ -6,11 +6,11 @@ from sqlalchemy.orm import Session
 from datetime import timedelta
 
 from ..database import get_db
-from ..models.usuario import Usuario, UsuarioRol, Rol, RolPermiso
+from ..models.usuario import Usuario
 from ..schemas.auth import LoginRequest, TokenResponse, UsuarioAuth
 from ..schemas.usuario import UsuarioWithArea
 from ..utils.security import verify_password, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
-from ..api.dependencies import get_current_user
+from ..api.dependencies import get_current_user, get_permission_codes, invalidar_cache_usuarios, opciones_carga_rbac
 
 router = APIRouter(prefix="/api/v1/auth", tags=["autenticacion"])
 
@@ -29,10 +29,7 @@ def login(
     """
     # Buscar usuario por nombre de usuario con sus roles y permisos
     try:
-        from sqlalchemy.orm import joinedload
-        usuario = db.query(Usuario).options(
-            joinedload(Usuario.roles).joinedload(UsuarioRol.rol).joinedload(Rol.permisos).joinedload(RolPermiso.permiso)
-        ).filter(
+        usuario = db.query(Usuario).options(*opciones_carga_rbac()).filter(
             Usuario.nombre_usuario == login_data.nombre_usuario
         ).first()
         
@@ -59,12 +56,8 @@ def login(
                 detail="Usuario inactivo"
             )
         
-        # Agregar lista única de códigos de permisos
-        permisos_set = set()
-        for ur in usuario.roles:
-            for rp in ur.rol.permisos:
-                if rp.permiso:
-                    permisos_set.add(rp.permiso.codigo)
+        # Lista única de códigos de permisos (grafo ya cargado por opciones_carga_rbac)
+        permisos = usuario.permisos_codes
         
         # Crear token JWT
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -81,7 +74,7 @@ def login(
             "nombre_completo": f"{usuario.nombre} {usuario.primer_apellido}",
             "activo": usuario.activo,
             "foto_url": usuario.foto_url,
-            "permisos": list(permisos_set)
+            "permisos": permisos
         }
         
         return TokenResponse(
@@ -103,10 +96,9 @@ def get_me(current_user: Usuario = Depends(get_current_user)):
     """
     Obtener información del usuario autenticado actual
     """
-    # El objeto current_user ya viene con las relaciones cargadas por get_current_user
-    # Aseguramos que los permisos se mapeen correctamente
+    # Área y roles se cargan al serializar; los permisos ya vienen precalculados por get_current_user
     user_data = UsuarioWithArea.model_validate(current_user)
-    user_data.permisos = current_user.permisos_codes
+    user_data.permisos = list(get_permission_codes(current_user))
     return user_data
 
 
@@ -116,6 +108,7 @@ def logout(current_user: Usuario = Depends(get_current_user)):
     Cerrar sesión (en JWT stateless esto es principalmente para el cliente)
     El cliente debe eliminar el token del localStorage
     """
+    invalidar_cache_usuarios(current_user.id)
     return {
         "message": "Sesión cerrada exitosamente",
         "usuario": current_user.nombre_usuario
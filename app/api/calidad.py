@@ -1,8 +1,8 @@
 """
 Endpoints CRUD para gestión de calidad
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Body
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query
+from sqlalchemy.orm import Session, joinedload, selectinload
 from typing import List
 from uuid import UUID
 
@@ -34,7 +34,7 @@ from ..schemas.calidad import (
     SeguimientoObjetivoUpdate,
     SeguimientoObjetivoResponse
 )
-from ..api.dependencies import require_any_permission
+from ..api.dependencies import require_any_permission, get_permission_codes
 from ..models.usuario import Usuario, Area
 from ..services.calidad_service import CalidadService
 from ..services.indicador_service import IndicadorService
@@ -63,8 +63,8 @@ def _obtener_usuario_activo(db: Session, usuario_id: UUID, campo: str = "usuario
 
 @router.get("/indicadores", response_model=List[IndicadorResponse])
 def listar_indicadores(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     proceso_id: UUID = None,
     activo: bool = None,
     db: Session = Depends(get_db),
@@ -212,8 +212,8 @@ def tendencia_indicador(
 
 @router.get("/no-conformidades", response_model=List[NoConformidadResponse])
 def listar_no_conformidades(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     proceso_id: UUID = None,
     estado: str = None,
     tipo: str = None,
@@ -246,13 +246,7 @@ def crear_no_conformidad(
 ):
     """Crear una nueva no conformidad"""
     # Verify permission "noconformidades.reportar"
-    tiene_permiso = any(
-        rp.permiso.codigo == "noconformidades.reportar" 
-        for ur in current_user.roles 
-        for rp in ur.rol.permisos
-        if rp.permiso
-    )
-    if not tiene_permiso:
+    if "noconformidades.reportar" not in get_permission_codes(current_user):
         raise HTTPException(status_code=403, detail="No tienes permiso para reportar no conformidades")
 
     # Verificar código único
@@ -367,8 +361,8 @@ def eliminar_no_conformidad(
 
 @router.get("/acciones-correctivas", response_model=List[AccionCorrectivaResponse])
 def listar_acciones_correctivas(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     no_conformidad_id: UUID = None,
     estado: str = None,
     db: Session = Depends(get_db),
@@ -379,7 +373,7 @@ def listar_acciones_correctivas(
         joinedload(AccionCorrectiva.responsable),
         joinedload(AccionCorrectiva.implementador),
         joinedload(AccionCorrectiva.verificador),
-        joinedload(AccionCorrectiva.comentarios).joinedload(AccionCorrectivaComentario.usuario)
+        selectinload(AccionCorrectiva.comentarios).joinedload(AccionCorrectivaComentario.usuario)
     )
     
     if no_conformidad_id:
@@ -554,13 +548,7 @@ def verificar_accion_correctiva(
 ):
     """Verificar una acción correctiva"""
     # Verify permission "noconformidades.cerrar"
-    tiene_permiso = any(
-        rp.permiso.codigo == "noconformidades.cerrar" 
-        for ur in current_user.roles 
-        for rp in ur.rol.permisos
-        if rp.permiso
-    )
-    if not tiene_permiso:
+    if "noconformidades.cerrar" not in get_permission_codes(current_user):
         raise HTTPException(status_code=403, detail="No tienes permiso para cerrar no conformidades")
 
     service = CalidadService(db)
@@ -676,8 +664,8 @@ def actualizar_estado_accion(
 
 @router.get("/objetivos-calidad", response_model=List[ObjetivoCalidadResponse])
 def listar_objetivos_calidad(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     area_id: UUID = None,
     estado: str = None,
     db: Session = Depends(get_db),
@@ -897,8 +885,8 @@ def eliminar_objetivo_calidad(
 
 @router.get("/seguimientos-objetivo", response_model=List[SeguimientoObjetivoResponse])
 def listar_seguimientos_objetivo(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     objetivo_id: UUID = None,
     # TODO: filtrar por fecha?
     db: Session = Depends(get_db),
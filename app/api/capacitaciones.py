@@ -1,7 +1,7 @@
 """
 Endpoints CRUD para gestión de capacitaciones
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy import func, case
 from sqlalchemy.orm import Session
 from typing import List, Iterable, Optional
@@ -108,8 +108,8 @@ def _sincronizar_convocados(
 
 @router.get("/capacitaciones", response_model=List[CapacitacionResponse])
 def listar_capacitaciones(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     estado: str = None,
     tipo_capacitacion: str = None,
     modalidad: str = None,
@@ -360,8 +360,8 @@ def listar_asistencias_capacitacion(
 
 @router.get("/asistencias-capacitacion", response_model=List[AsistenciaCapacitacionResponse])
 def listar_asistencias(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     usuario_id: UUID = None,
     asistio: bool = None,
     db: Session = Depends(get_db),
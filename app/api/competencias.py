@@ -29,7 +29,7 @@ router = APIRouter(
 # --- Gestor de Competencias (Catálogo) ---
 
 @router.get("/", response_model=List[CompetenciaResponse])
-def read_competencias(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: Usuario = Depends(require_any_permission(["capacitaciones.gestion", "procesos.admin", "riesgos.gestion", "sistema.admin"]))):
+def read_competencias(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=500), db: Session = Depends(get_db), current_user: Usuario = Depends(require_any_permission(["capacitaciones.gestion", "procesos.admin", "riesgos.gestion", "sistema.admin"]))):
     competencias = db.query(Competencia).order_by(Competencia.nombre).offset(skip).limit(limit).all()
     return competencias
 
@@ -66,8 +66,8 @@ def delete_competencia(id: UUID, db: Session = Depends(get_db), current_user: Us
 
 @router.get("/evaluaciones/listar", response_model=List[EvaluacionCompetenciaResponse])
 def listar_evaluaciones(
-    skip: int = 0, 
-    limit: int = 100, 
+    skip: int = Query(0, ge=0), 
+    limit: int = Query(100, ge=1, le=500), 
     usuario_id: Optional[UUID] = None,
     competencia_id: Optional[UUID] = None,
     db: Session = Depends(get_db), 
@@ -1,26 +1,72 @@
 """
 Dependencias de autenticación y autorización.
 """
+import logging
+from threading import Lock
+
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from typing import Optional, Iterable, Set
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import Optional, Iterable, Set, FrozenSet, Tuple
+from uuid import UUID
 
+from ..config import settings
 from ..database import get_db
-from ..models.usuario import Usuario
+from ..models.usuario import Usuario, UsuarioRol, Rol, RolPermiso
 from ..utils.security import decode_access_token
 
+logger = logging.getLogger(__name__)
+
 # Esquema de seguridad Bearer
 security = HTTPBearer()
 
+# Claves RBAC del usuario autenticado por id: (permission_codes, role_keys). Sólo frozensets: la
+# fila del usuario se lee en cada request. Es por worker: un cambio de roles/permisos hecho en otro
+# worker tarda hasta AUTH_USER_CACHE_TTL en verse (la desactivación del usuario se ve de inmediato)
+_usuarios_cache: TTLCache = TTLCache(maxsize=10_000, ttl=max(settings.AUTH_USER_CACHE_TTL, 1))
+_usuarios_cache_lock = Lock()
+
+
+def invalidar_cache_usuarios(usuario_id: Optional[UUID] = None) -> None:
+    """Descarta el usuario cacheado (o todos, p. ej. al cambiar roles, permisos o áreas)"""
+    with _usuarios_cache_lock:
+        if usuario_id is None:
+            _usuarios_cache.clear()
+        else:
+            _usuarios_cache.pop(str(usuario_id), None)
+
+
+def opciones_carga_rbac() -> tuple:
+    """
+    Opciones de carga del grafo que usa el RBAC: área y roles → rol → permisos → permiso.
+
+    selectinload en las colecciones evita el producto cartesiano roles x permisos y deja
+    cargadas las claves de rol, así ninguna verificación de permisos dispara lazy loads.
+    """
+    return (
+        joinedload(Usuario.area),
+        selectinload(Usuario.roles).joinedload(UsuarioRol.rol).selectinload(Rol.permisos).joinedload(RolPermiso.permiso),
+    )
+
+
+def _claves_rbac(usuario: Usuario) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """Permisos y claves de rol calculados una sola vez (pruebas de pertenencia O(1))"""
+    permission_codes = frozenset(usuario.permisos_codes)
+    role_keys = frozenset(ur.rol.clave for ur in usuario.roles if ur.rol and ur.rol.clave)
+    return permission_codes, role_keys
+
 
-async def get_current_user(
+def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> Usuario:
     """
     Obtener usuario actual desde el token JWT
     
+    Es síncrona a propósito: consulta la base con una Session bloqueante, así que
+    FastAPI la ejecuta en el threadpool en lugar de bloquear el event loop.
+    
     Args:
         credentials: Credenciales HTTP Bearer
         db: Sesión de base de datos
@@ -47,16 +93,22 @@ async def get_current_user(
         if usuario_id is None:
             raise credentials_exception
         
-        # Buscar usuario en base de datos
-        # Pre-cargar relación con área, roles y permisos para el RBAC
-        from sqlalchemy.orm import joinedload
-        from ..models.usuario import UsuarioRol, Rol, RolPermiso
-        
-        usuario = db.query(Usuario).options(
-            joinedload(Usuario.area),
-            joinedload(Usuario.roles).joinedload(UsuarioRol.rol).joinedload(Rol.permisos).joinedload(RolPermiso.permiso)
-        ).filter(Usuario.id == usuario_id).first()
+        try:
+            usuario_id = UUID(str(usuario_id))
+        except ValueError:
+            raise credentials_exception
         
+        # Claves RBAC: caché por worker o grafo roles → permisos desde la base. La fila del usuario
+        # se lee siempre (SELECT por PK), así que activo y la expiración del token se validan en cada request
+        usar_cache = settings.AUTH_USER_CACHE_TTL > 0
+        claves = None
+        if usar_cache:
+            with _usuarios_cache_lock:
+                claves = _usuarios_cache.get(str(usuario_id))
+        if claves is None:
+            usuario = db.query(Usuario).options(*opciones_carga_rbac()).filter(Usuario.id == usuario_id).first()
+        else:
+            usuario = db.get(Usuario, usuario_id)
         if usuario is None:
             raise credentials_exception
         
@@ -66,14 +118,21 @@ async def get_current_user(
                 detail="Usuario inactivo"
             )
         
+        if claves is None:
+            claves = _claves_rbac(usuario)
+            if usar_cache:
+                with _usuarios_cache_lock:
+                    _usuarios_cache[str(usuario_id)] = claves
+        usuario.permission_codes, usuario.role_keys = claves
+        
         return usuario
         
     except HTTPException:
         # Re-lanzar excepciones HTTP
         raise
-    except Exception as e:
+    except Exception:
         # Capturar errores de base de datos u otros errores inesperados
-        print(f"ERROR en get_current_user: {str(e)}")
+        logger.exception("Error en get_current_user")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error al validar credenciales"
@@ -122,16 +181,38 @@ def _expand_permission_codes(required_permissions: Iterable[str]) -> Set[str]:
     return expanded
 
 
+def get_permission_codes(current_user: Usuario) -> FrozenSet[str]:
+    """Permisos del usuario, usando los precalculados en get_current_user si existen"""
+    codes = getattr(current_user, "permission_codes", None)
+    if codes is None:
+        codes = frozenset(getattr(current_user, "permisos_codes", []) or [])
+    return codes
+
+
+def get_role_keys(current_user: Usuario) -> FrozenSet[str]:
+    """Claves de rol del usuario, usando las precalculadas en get_current_user si existen"""
+    keys = getattr(current_user, "role_keys", None)
+    if keys is None:
+        keys = frozenset(
+            ur.rol.clave for ur in getattr(current_user, "roles", []) or [] if ur.rol and ur.rol.clave
+        )
+    return keys
+
+
 def user_has_any_permission(current_user: Usuario, required_permissions: Iterable[str]) -> bool:
-    user_perms = set(getattr(current_user, "permisos_codes", []) or [])
+    user_perms = get_permission_codes(current_user)
     if "sistema.admin" in user_perms:
         return True
     return bool(user_perms.intersection(_expand_permission_codes(required_permissions)))
 
 
 def require_any_permission(required_permissions: list[str]):
+    # Los alias se expanden una sola vez al declarar la ruta, no en cada request
+    requeridos = frozenset(_expand_permission_codes(required_permissions))
+
     async def dependency(current_user: Usuario = Depends(get_current_user)) -> Usuario:
-        if not user_has_any_permission(current_user, required_permissions):
+        user_perms = get_permission_codes(current_user)
+        if "sistema.admin" not in user_perms and not (requeridos & user_perms):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="No tiene permisos para esta operación",
@@ -139,3 +220,38 @@ def require_any_permission(required_permissions: list[str]):
         return current_user
 
     return dependency
+
+
+# Roles que ven los registros de todas las áreas (sin data scoping)
+ROLES_SIN_RESTRICCION_AREA = frozenset({"admin", "gestor_calidad"})
+
+
+def get_area_scope(current_user: Usuario) -> Optional[UUID]:
+    """Área a la que se restringen los datos del usuario, o None si puede ver todas"""
+    if not current_user.area_id:
+        return None
+    if get_role_keys(current_user) & ROLES_SIN_RESTRICCION_AREA:
+        return None
+    return current_user.area_id
+
+
+def scoped_query(model):
+    """
+    Dependencia que entrega db.query(model) ya restringida al área del usuario.
+
+    El modelo debe exponer la relación `proceso`; el filtro por área se resuelve en SQL
+    (JOIN con procesos) sólo cuando el usuario no tiene alcance global.
+    """
+    def dependency(
+        db: Session = Depends(get_db),
+        current_user: Usuario = Depends(get_current_user),
+    ):
+        from ..models.proceso import Proceso
+
+        query = db.query(model)
+        area_id = get_area_scope(current_user)
+        if area_id:
+            query = query.join(model.proceso).filter(Proceso.area_id == area_id)
+        return query
+
+    return dependency
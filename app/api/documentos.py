@@ -1,8 +1,8 @@
 """
 Endpoints CRUD para gestión de documentos
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session, joinedload, selectinload
 from typing import List
 from uuid import UUID
 
@@ -24,11 +24,14 @@ from ..utils.notification_service import (
     crear_notificacion_asignacion
 )
 from ..models.sistema import Notificacion
-from ..api.dependencies import require_any_permission, user_has_any_permission
+from ..api.dependencies import require_any_permission, user_has_any_permission, get_permission_codes
 from ..models.usuario import Usuario
 
 router = APIRouter(prefix="/api/v1", tags=["documentos"])
 
+# Permisos que habilitan a reasignar aprobador/revisor de un documento ajeno
+_PERMISOS_ADMIN_DOCUMENTOS = frozenset({"documentos.administrar", "admin.all"})
+
 
 # ==========================
 # Endpoints de Documentos
@@ -36,8 +39,8 @@ router = APIRouter(prefix="/api/v1", tags=["documentos"])
 
 @router.get("/documentos", response_model=List[DocumentoResponse])
 def listar_documentos(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     estado: str = None,
     tipo_documento: str = None,
     aprobado_por: UUID = None,
@@ -74,7 +77,7 @@ def listar_documentos(
         joinedload(Documento.creador),
         joinedload(Documento.aprobador),
         joinedload(Documento.revisor),
-        joinedload(Documento.versiones).joinedload(VersionDocumento.creador)
+        selectinload(Documento.versiones).joinedload(VersionDocumento.creador)
     )
     
     puede_ver_todo_documentos = user_has_any_permission(
@@ -211,16 +214,7 @@ def actualizar_documento(
         if 'aprobado_por' in update_data:
             if documento.creado_por != current_user.id:
                 # Verificar si tiene permiso de admin
-                tiene_permiso_admin = False
-                for usuario_rol in current_user.roles:
-                    for rol_permiso in usuario_rol.rol.permisos:
-                        if rol_permiso.permiso.codigo in ["documentos.administrar", "admin.all"]:
-                            tiene_permiso_admin = True
-                            break
-                    if tiene_permiso_admin:
-                        break
-                
-                if not tiene_permiso_admin:
+                if not get_permission_codes(current_user) & _PERMISOS_ADMIN_DOCUMENTOS:
                     raise HTTPException(
                         status_code=status.HTTP_403_FORBIDDEN,
                         detail="Solo el creador del documento o un administrador puede asignar el aprobador"
@@ -230,16 +224,7 @@ def actualizar_documento(
         if 'revisado_por' in update_data:
             if documento.creado_por != current_user.id:
                 # Verificar si tiene permiso de admin
-                tiene_permiso_admin = False
-                for usuario_rol in current_user.roles:
-                    for rol_permiso in usuario_rol.rol.permisos:
-                        if rol_permiso.permiso.codigo in ["documentos.administrar", "admin.all"]:
-                            tiene_permiso_admin = True
-                            break
-                    if tiene_permiso_admin:
-                        break
-                
-                if not tiene_permiso_admin:
+                if not get_permission_codes(current_user) & _PERMISOS_ADMIN_DOCUMENTOS:
                     raise HTTPException(
                         status_code=status.HTTP_403_FORBIDDEN,
                         detail="Solo el creador del documento o un administrador puede asignar el revisor"
@@ -476,17 +461,8 @@ def aprobar_documento(
     if not documento:
         raise HTTPException(status_code=404, detail="Documento no encontrado")
 
-    # 1. Verificar Permiso "documentos.aprobar"
-    # Estructura: Usuario -> UsuarioRol -> Rol -> RolPermiso -> Permiso
-    tiene_permiso = False
-    for usuario_rol in current_user.roles:
-        for rol_permiso in usuario_rol.rol.permisos:
-            if rol_permiso.permiso.codigo == "documentos.aprobar":
-                tiene_permiso = True
-                break
-        if tiene_permiso: break
-    
-    if not tiene_permiso:
+    # 1. Verificar Permiso "documentos.aprobar" (precalculado en get_current_user)
+    if "documentos.aprobar" not in get_permission_codes(current_user):
         raise HTTPException(status_code=403, detail="No tienes permiso para aprobar documentos")
 
     # 2. Verificar Asignación (Solo el aprobador designado) - CORREGIDO: aprobado_por
@@ -7,7 +7,7 @@ import subprocess
 import sys
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import Dict, FrozenSet, List, Optional, Set
 
 from fastapi import APIRouter, Depends, HTTPException, status
 
@@ -19,7 +19,7 @@ from ..schemas.migracion import (
     MigracionOperacionRequest,
     MigracionOperacionResponse,
 )
-from .dependencies import get_current_user
+from .dependencies import get_current_user, get_permission_codes
 
 router = APIRouter()
 
@@ -30,21 +30,8 @@ DOWN_REVISION_RE = re.compile(r"^down_revision(?:\s*:[^=]+)?\s*=\s*(.+)$", re.MU
 DOCSTRING_RE = re.compile(r'"""(.*?)"""', re.DOTALL)
 
 
-def _permisos_usuario(current_user: Usuario) -> Set[str]:
-    permisos = set(getattr(current_user, "permisos_codes", []) or [])
-    if permisos:
-        return permisos
-
-    for usuario_rol in getattr(current_user, "roles", []) or []:
-        rol = getattr(usuario_rol, "rol", None)
-        if not rol:
-            continue
-        for rol_permiso in getattr(rol, "permisos", []) or []:
-            permiso = getattr(rol_permiso, "permiso", None)
-            codigo = getattr(permiso, "codigo", None)
-            if codigo:
-                permisos.add(codigo)
-    return permisos
+def _permisos_usuario(current_user: Usuario) -> FrozenSet[str]:
+    return get_permission_codes(current_user)
 
 
 def _es_admin(current_user: Usuario) -> bool:
@@ -1,7 +1,7 @@
 """
 API endpoints para Notificaciones
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List
 from uuid import UUID
@@ -12,6 +12,7 @@ from ..models.sistema import Notificacion
 from ..schemas.notificacion import NotificacionCreate, NotificacionUpdate, NotificacionResponse
 from ..api.dependencies import require_any_permission
 from ..models.usuario import Usuario
+from ..utils.orm import opciones_carga_estricta
 
 router = APIRouter(prefix="/api/v1/notificaciones", tags=["notificaciones"])
 
@@ -27,15 +28,19 @@ ACCESO_USUARIO_AUTENTICADO_PERMISSIONS = [
 
 @router.get("/", response_model=List[NotificacionResponse])
 def listar_notificaciones(
-    skip: int = 0,
-    limit: int = 50,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
     solo_no_leidas: bool = False,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(ACCESO_USUARIO_AUTENTICADO_PERMISSIONS))
 ):
     """Listar notificaciones del usuario actual"""
     try:
-        query = db.query(Notificacion).filter(Notificacion.usuario_id == current_user.id)
+        query = (
+            db.query(Notificacion)
+            .options(*opciones_carga_estricta())
+            .filter(Notificacion.usuario_id == current_user.id)
+        )
         
         if solo_no_leidas:
             query = query.filter(Notificacion.leida == False)
@@ -1,13 +1,18 @@
 """
 Endpoints CRUD para gestión de procesos
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import func
-from sqlalchemy.orm import Session, joinedload
-from typing import List
+import logging
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, status, Query
+from sqlalchemy import func, lambda_stmt, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, contains_eager
+import msgspec
+from pydantic import TypeAdapter
+from typing import Annotated, List, Optional
 from uuid import UUID
 
-from ..database import get_db
+from ..database import get_db, SessionLocal
 from ..models.proceso import Proceso, EtapaProceso, InstanciaProceso, AccionProceso, ResponsableProceso
 from ..models.auditoria import HallazgoAuditoria
 from ..schemas.proceso import (
@@ -21,6 +26,8 @@ from ..schemas.proceso import (
     InstanciaProcesoCreate,
     InstanciaProcesoUpdate,
     InstanciaProcesoResponse,
+    InstanciaProcesoStruct,
+    ListFiltersModel,
     AccionProcesoCreate,
     AccionProcesoUpdate,
     AccionProcesoResponse,
@@ -29,11 +36,21 @@ from ..schemas.proceso import (
     ResponsableProcesoResponse,
 )
 from ..api.dependencies import require_any_permission
-from ..models.usuario import Usuario
+from ..models.usuario import Usuario, formatear_nombre_completo
+from ..repositories.base import BaseRepository
 from ..services.proceso_service import ProcesoService
 from ..services.competency_risk_automation_service import CompetencyRiskAutomationService
+from ..utils.pagination import establecer_siguiente_cursor, recortar_pagina
+from ..utils.responses import MsgspecJSONResponse
+from ..utils.db_errors import es_violacion_unicidad
 
 router = APIRouter(prefix="/api/v1", tags=["procesos"])
+logger = logging.getLogger(__name__)
+
+_responsables_adapter = TypeAdapter(List[ResponsableProcesoResponse])
+
+# Filtros compartidos por los listados de instancias y acciones (proceso_id, estado)
+ListFilters = Annotated[ListFiltersModel, Depends()]
 
 
 # ======================
@@ -42,8 +59,8 @@ router = APIRouter(prefix="/api/v1", tags=["procesos"])
 
 @router.get("/procesos", response_model=List[ProcesoResponse])
 def listar_procesos(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     estado: str = None,
     area_id: UUID = None,
     db: Session = Depends(get_db),
@@ -81,12 +98,7 @@ def obtener_proceso(
 ):
     """Obtener un proceso por ID"""
     service = ProcesoService(db)
-    proceso = service.obtener(proceso_id)
-    proceso_data = ProcesoResponse.model_validate(proceso)
-    proceso_data.area_nombre = proceso.area.nombre if proceso.area else None
-    proceso_data.responsable_nombre = f"{proceso.responsable.nombre} {proceso.responsable.primer_apellido}" if proceso.responsable else None
-    
-    return proceso_data
+    return service.obtener_respuesta(proceso_id)
 
 
 @router.put("/procesos/{proceso_id}", response_model=ProcesoResponse)
@@ -124,34 +136,32 @@ def listar_etapas_proceso(
     current_user: Usuario = Depends(require_any_permission(["procesos.admin", "sistema.admin"]))
 ):
     """Listar etapas de un proceso"""
-    etapas = db.query(EtapaProceso).options(
-        joinedload(EtapaProceso.responsable)
+    hallazgos_count = (
+        select(func.count(HallazgoAuditoria.id))
+        .where(HallazgoAuditoria.etapa_proceso_id == EtapaProceso.id)
+        .correlate(EtapaProceso)
+        .scalar_subquery()
+        .label("hallazgos_count")
+    )
+
+    # Una sola consulta: etapas + responsable (JOIN explícito) + conteo correlacionado de hallazgos
+    filas = db.query(EtapaProceso, hallazgos_count).outerjoin(
+        EtapaProceso.responsable
+    ).options(
+        contains_eager(EtapaProceso.responsable)
     ).filter(
         EtapaProceso.proceso_id == proceso_id,
         EtapaProceso.activo.is_(True)
     ).order_by(EtapaProceso.orden).all()
 
-    if not etapas:
-        return []
-
-    etapa_ids = [etapa.id for etapa in etapas]
-    hallazgos_por_etapa = dict(
-        db.query(
-            HallazgoAuditoria.etapa_proceso_id,
-            func.count(HallazgoAuditoria.id)
-        ).filter(
-            HallazgoAuditoria.etapa_proceso_id.in_(etapa_ids)
-        ).group_by(HallazgoAuditoria.etapa_proceso_id).all()
-    )
-
     resultado = []
-    for etapa in etapas:
+    for etapa, total_hallazgos in filas:
         etapa_data = EtapaProcesoResponse.model_validate(etapa)
         etapa_data.responsable_nombre = (
             f"{etapa.responsable.nombre} {etapa.responsable.primer_apellido}".strip()
             if etapa.responsable else None
         )
-        etapa_data.hallazgos_count = hallazgos_por_etapa.get(etapa.id, 0)
+        etapa_data.hallazgos_count = total_hallazgos or 0
         resultado.append(etapa_data)
 
     return resultado
@@ -236,25 +246,38 @@ def reordenar_etapas_proceso(
 # Endpoints de Instancias de Proceso
 # =================================
 
-@router.get("/instancias", response_model=List[InstanciaProcesoResponse])
+@router.get("/instancias", response_model=List[InstanciaProcesoResponse], response_class=MsgspecJSONResponse)
 def listar_instancias(
-    skip: int = 0,
-    limit: int = 100,
-    proceso_id: UUID = None,
-    estado: str = None,
+    response: Response,
+    filtros: ListFilters,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    after: Optional[UUID] = None,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["procesos.admin", "sistema.admin"]))
 ):
     """Listar instancias de procesos"""
-    query = db.query(InstanciaProceso)
-    
+    proceso_id, estado = filtros.proceso_id, filtros.estado
+    # lambda_stmt cachea la construcción/compilación del SELECT; los valores viajan como parámetros
+    stmt = lambda_stmt(lambda: select(InstanciaProceso))
     if proceso_id:
-        query = query.filter(InstanciaProceso.proceso_id == proceso_id)
+        stmt += lambda s: s.where(InstanciaProceso.proceso_id == proceso_id)
     if estado:
-        query = query.filter(InstanciaProceso.estado == estado)
-    
-    instancias = query.offset(skip).limit(limit).all()
-    return instancias
+        stmt += lambda s: s.where(InstanciaProceso.estado == estado)
+    # Se pide una fila de más para saber si hay otra página sin COUNT(*)
+    limite_sonda = limit + 1
+    if after:
+        # Keyset: continúa después del último id recibido (ignora skip)
+        stmt += lambda s: s.where(InstanciaProceso.id > after).order_by(InstanciaProceso.id).limit(limite_sonda)
+    else:
+        stmt += lambda s: s.order_by(InstanciaProceso.id).offset(skip).limit(limite_sonda)
+
+    instancias, has_more = recortar_pagina(db.execute(stmt).scalars().all(), limit)
+    establecer_siguiente_cursor(response, instancias, has_more)
+    return MsgspecJSONResponse(
+        msgspec.convert(instancias, List[InstanciaProcesoStruct], from_attributes=True),
+        headers=dict(response.headers),
+    )
 
 
 @router.post("/instancias", response_model=InstanciaProcesoResponse, status_code=status.HTTP_201_CREATED)
@@ -264,19 +287,17 @@ def crear_instancia_proceso(
     current_user: Usuario = Depends(require_any_permission(["procesos.admin", "sistema.admin"]))
 ):
     """Crear una nueva instancia de proceso"""
-    # Verificar código único
-    db_instancia = db.query(InstanciaProceso).filter(
-        InstanciaProceso.codigo_instancia == instancia.codigo_instancia
-    ).first()
-    if db_instancia:
+    nueva_instancia = InstanciaProceso(**instancia.model_dump())
+    db.add(nueva_instancia)
+    # La unicidad del código la garantiza la restricción UNIQUE (sin consulta previa ni carrera)
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="El código de instancia ya existe"
+            detail="El código de instancia ya existe" if es_violacion_unicidad(e) else "Error de integridad al crear la instancia"
         )
-    
-    nueva_instancia = InstanciaProceso(**instancia.model_dump())
-    db.add(nueva_instancia)
-    db.commit()
     db.refresh(nueva_instancia)
     return nueva_instancia
 
@@ -287,22 +308,32 @@ def crear_instancia_proceso(
 
 @router.get("/acciones-proceso", response_model=List[AccionProcesoResponse])
 def listar_acciones_proceso(
-    skip: int = 0,
-    limit: int = 100,
-    proceso_id: UUID = None,
-    estado: str = None,
+    response: Response,
+    filtros: ListFilters,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    after: Optional[UUID] = None,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["procesos.admin", "sistema.admin"]))
 ):
     """Listar acciones de proceso"""
-    query = db.query(AccionProceso)
-    
+    proceso_id, estado = filtros.proceso_id, filtros.estado
+    # lambda_stmt cachea la construcción/compilación del SELECT; los valores viajan como parámetros
+    stmt = lambda_stmt(lambda: select(AccionProceso))
     if proceso_id:
-        query = query.filter(AccionProceso.proceso_id == proceso_id)
+        stmt += lambda s: s.where(AccionProceso.proceso_id == proceso_id)
     if estado:
-        query = query.filter(AccionProceso.estado == estado)
-    
-    acciones = query.offset(skip).limit(limit).all()
+        stmt += lambda s: s.where(AccionProceso.estado == estado)
+    # Se pide una fila de más para saber si hay otra página sin COUNT(*)
+    limite_sonda = limit + 1
+    if after:
+        # Keyset: continúa después del último id recibido (ignora skip)
+        stmt += lambda s: s.where(AccionProceso.id > after).order_by(AccionProceso.id).limit(limite_sonda)
+    else:
+        stmt += lambda s: s.order_by(AccionProceso.id).offset(skip).limit(limite_sonda)
+
+    acciones, has_more = recortar_pagina(db.execute(stmt).scalars().all(), limit)
+    establecer_siguiente_cursor(response, acciones, has_more)
     return acciones
 
 
@@ -313,17 +344,17 @@ def crear_accion_proceso(
     current_user: Usuario = Depends(require_any_permission(["procesos.admin", "sistema.admin"]))
 ):
     """Crear una nueva acción de proceso"""
-    # Verificar código único
-    db_accion = db.query(AccionProceso).filter(AccionProceso.codigo == accion.codigo).first()
-    if db_accion:
+    nueva_accion = AccionProceso(**accion.model_dump())
+    db.add(nueva_accion)
+    # La unicidad del código la garantiza la restricción UNIQUE (sin consulta previa ni carrera)
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="El código de acción ya existe"
+            detail="El código de acción ya existe" if es_violacion_unicidad(e) else "Error de integridad al crear la acción"
         )
-    
-    nueva_accion = AccionProceso(**accion.model_dump())
-    db.add(nueva_accion)
-    db.commit()
     db.refresh(nueva_accion)
     return nueva_accion
 
@@ -336,20 +367,18 @@ def actualizar_accion_proceso(
     current_user: Usuario = Depends(require_any_permission(["procesos.admin", "sistema.admin"]))
 ):
     """Actualizar una acción de proceso"""
-    accion = db.query(AccionProceso).filter(AccionProceso.id == accion_id).first()
+    update_data = accion_update.model_dump(exclude_unset=True)
+    accion = BaseRepository(db, AccionProceso).update_returning(accion_id, update_data, only_active=False)
     if not accion:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Acción no encontrada"
         )
     
-    update_data = accion_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(accion, field, value)
-    
+    # Se serializa antes del commit: expire_on_commit obligaría a un SELECT extra
+    respuesta = AccionProcesoResponse.model_validate(accion)
     db.commit()
-    db.refresh(accion)
-    return accion
+    return respuesta
 
 
 # =========================================
@@ -362,6 +391,8 @@ def listar_responsables_proceso(
     proceso_id: UUID,
     rol: str = None,
     solo_vigentes: bool = True,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["procesos.admin", "sistema.admin"]))
 ):
@@ -379,29 +410,57 @@ def listar_responsables_proceso(
             (ResponsableProceso.vigente_hasta > datetime.utcnow())
         )
 
-    responsables = query.options(
-        joinedload(ResponsableProceso.usuario),
-        joinedload(ResponsableProceso.proceso)
-    ).order_by(ResponsableProceso.es_principal.desc(), ResponsableProceso.fecha_asignacion).all()
-
-    result = []
-    for r in responsables:
-        resp = ResponsableProcesoResponse.model_validate(r)
-        if r.usuario:
-            resp.usuario_nombre = r.usuario.nombre_completo
-            resp.usuario_correo = r.usuario.correo_electronico
-        if r.proceso:
-            resp.proceso_nombre = r.proceso.nombre
-            resp.proceso_codigo = r.proceso.codigo
-        result.append(resp)
-
-    return result
+    # Columnas explícitas: evita hidratar objetos ORM y validar fila por fila
+    filas = query.outerjoin(
+        Usuario, Usuario.id == ResponsableProceso.usuario_id
+    ).outerjoin(
+        Proceso, Proceso.id == ResponsableProceso.proceso_id
+    ).with_entities(
+        *ResponsableProceso.__table__.c,
+        Usuario.nombre.label("usuario_primer_nombre"),
+        Usuario.segundo_nombre.label("usuario_segundo_nombre"),
+        Usuario.primer_apellido.label("usuario_primer_apellido"),
+        Usuario.segundo_apellido.label("usuario_segundo_apellido"),
+        Usuario.correo_electronico.label("usuario_correo"),
+        Proceso.nombre.label("proceso_nombre"),
+        Proceso.codigo.label("proceso_codigo"),
+    ).order_by(ResponsableProceso.es_principal.desc(), ResponsableProceso.fecha_asignacion).offset(skip).limit(limit).all()
+
+    datos = []
+    for fila in filas:
+        item = dict(fila._mapping)
+        item["usuario_nombre"] = formatear_nombre_completo(
+            item.pop("usuario_primer_nombre"),
+            item.pop("usuario_segundo_nombre"),
+            item.pop("usuario_primer_apellido"),
+            item.pop("usuario_segundo_apellido"),
+        )
+        datos.append(item)
+
+    return _responsables_adapter.validate_python(datos)
+
+
+def _evaluar_competencias_responsable(usuario_id: UUID, proceso_id: UUID) -> None:
+    """Evalúa brechas de competencia del responsable con una sesión propia (fuera del request)"""
+    db = SessionLocal()
+    try:
+        CompetencyRiskAutomationService(db).evaluar_usuario_en_proceso(usuario_id, proceso_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception(
+            "Error evaluando competencias del responsable",
+            extra={"usuario_id": str(usuario_id), "proceso_id": str(proceso_id)},
+        )
+    finally:
+        db.close()
 
 
 @router.post("/procesos/{proceso_id}/responsables", response_model=ResponsableProcesoResponse, status_code=status.HTTP_201_CREATED)
 def asignar_responsable_proceso(
     proceso_id: UUID,
     data: ResponsableProcesoCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["procesos.admin", "sistema.admin"]))
 ):
@@ -447,11 +506,12 @@ def asignar_responsable_proceso(
         observaciones=data.observaciones,
     )
     db.add(responsable)
-    automation = CompetencyRiskAutomationService(db)
-    automation.evaluar_usuario_en_proceso(data.usuario_id, proceso_id)
     db.commit()
     db.refresh(responsable)
 
+    # La evaluación de brechas de competencia no forma parte de la respuesta: se ejecuta después de responder
+    background_tasks.add_task(_evaluar_competencias_responsable, data.usuario_id, proceso_id)
+
     # Cargar relaciones para la respuesta
     db.refresh(responsable, ["usuario", "proceso"])
     resp = ResponsableProcesoResponse.model_validate(responsable)
@@ -525,6 +585,8 @@ def eliminar_responsable_proceso(
 @router.get("/usuarios/{usuario_id}/procesos-asignados", response_model=List[ResponsableProcesoResponse])
 def obtener_procesos_asignados_usuario(
     usuario_id: UUID,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["procesos.admin", "sistema.admin"]))
 ):
@@ -538,7 +600,7 @@ def obtener_procesos_asignados_usuario(
     ).options(
         joinedload(ResponsableProceso.proceso),
         joinedload(ResponsableProceso.usuario)
-    ).all()
+    ).offset(skip).limit(limit).all()
 
     result = []
     for r in asignaciones:
@@ -1,9 +1,12 @@
+import hashlib
+import json
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session, joinedload
-from fastapi.responses import StreamingResponse
-from typing import List, Optional, Any, Dict
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import Integer, String, Text, cast, func, literal, null, select, union_all
+from sqlalchemy.orm import Session, joinedload, raiseload, selectinload
+from fastapi.responses import FileResponse, StreamingResponse
+from typing import Iterator, List, Optional, Any, Dict, Tuple
 from uuid import UUID
 from datetime import datetime
 
@@ -12,83 +15,175 @@ from ..api.dependencies import require_any_permission
 from ..models.usuario import Usuario
 from ..models.auditoria import Auditoria
 from ..models.calidad import NoConformidad
-from ..services.reportes import PDFService
+from ..utils.responses import coincide_if_none_match
+from ..services.reportes import (
+    PDFService,
+    iterar_archivo,
+    obtener_listado_reportes_cacheado,
+    guardar_listado_reportes_cacheado,
+)
 
 router = APIRouter(prefix="/api/v1/reportes", tags=["reportes"])
 logger = logging.getLogger(__name__)
 
-@router.get("/list")
+@router.get("/list", response_model=List[Dict[str, Any]])
 def list_available_reports(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["auditorias.ver", "noconformidades.gestion", "sistema.admin"]))
-) -> List[Dict[str, Any]]:
+):
     """Devuelve listado unificado de reportes disponibles (Auditorías, NCs)"""
+    cacheado = obtener_listado_reportes_cacheado()
+    if cacheado is None:
+        reports, completo = _construir_listado_reportes(db)
+        cuerpo = json.dumps(reports).encode("utf-8")
+        etag = f'"{hashlib.sha1(cuerpo).hexdigest()}"'
+        # Solo se cachea si la consulta de auditorías no falló
+        if completo:
+            guardar_listado_reportes_cacheado(cuerpo, etag)
+    else:
+        cuerpo, etag = cacheado
 
-    now = datetime.now()
-    reports: List[Dict[str, Any]] = []
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=30"}
+    if coincide_if_none_match(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cuerpo, media_type="application/json", headers=headers)
 
-    try:
-        # 1. Auditorías (ordenadas por fecha planificada)
-        auditorias = (
-            db.query(Auditoria)
-            .order_by(Auditoria.fecha_planificada.desc().nullslast())
-            .limit(10)
-            .all()
+
+def _consulta_listado_reportes():
+    """
+    Auditorías recientes y resumen de No Conformidades en un único UNION ALL.
+
+    La columna `kind` distingue el origen de cada fila ("aud" / "nc").
+    """
+    aud_q = (
+        select(
+            literal("aud").label("kind"),
+            cast(Auditoria.id, String).label("id"),
+            Auditoria.codigo.label("codigo"),
+            Auditoria.fecha_planificada.label("fecha"),
+            Auditoria.estado.label("estado"),
+            Auditoria.objetivo.label("objetivo"),
+            null().cast(Integer).label("total"),
         )
-        for aud in auditorias:
-            report_date = aud.fecha_planificada.isoformat() if aud.fecha_planificada else now.isoformat()
-            reports.append({
-                "id": str(aud.id),
-                "codigo": aud.codigo or f"AUD-{str(aud.id)[:8]}",
-                "title": f"Reporte de Auditoría: {aud.codigo or 'Sin código'}",
-                "category": "auditorias",
-                "date": report_date,
-                "status": aud.estado or "completado",
-                "format": "PDF",
-                "description": f"Auditoría de {aud.objetivo or 'gestión'}"
-            })
-    except Exception:
-        logger.exception("Error generating auditoria reports list")
+        .order_by(Auditoria.fecha_planificada.desc().nullslast())
+        .limit(10)
+    )
+    nc_q = select(
+        literal("nc").label("kind"),
+        null().cast(String).label("id"),
+        null().cast(String).label("codigo"),
+        func.max(NoConformidad.fecha_deteccion).label("fecha"),
+        null().cast(String).label("estado"),
+        null().cast(Text).label("objetivo"),
+        func.count(NoConformidad.id).label("total"),
+    )
+    # El orden de las ramas de un UNION no está garantizado: se fija explícitamente
+    union = union_all(aud_q, nc_q).subquery()
+    return select(union).order_by(
+        (union.c.kind == "nc").asc(),
+        union.c.fecha.desc().nullslast(),
+    )
+
 
-    # 2. No Conformidades (Global)
-    # Se agrega siempre para no perder la funcionalidad si fallan auditorías.
-    reports.append({
+def _reporte_global_nc(now: datetime, fecha: Optional[datetime] = None, total: Optional[int] = None) -> Dict[str, Any]:
+    descripcion = "Listado completo de hallazgos no conformes"
+    if total is not None:
+        descripcion += f" ({total} registradas)"
+    return {
         "id": "global-nc",
         "codigo": f"REP-NC-{now.year}",
         "title": "Reporte Global de No Conformidades",
         "category": "noconformidades",
-        "date": now.isoformat(),
+        "date": (fecha or now).isoformat(),
         "status": "completado",
         "format": "PDF",
-        "description": "Listado completo de hallazgos no conformes"
-    })
+        "description": descripcion
+    }
+
+
+def _construir_listado_reportes(db: Session) -> Tuple[List[Dict[str, Any]], bool]:
+    now = datetime.now()
+    reports: List[Dict[str, Any]] = []
+
+    try:
+        # Una sola ida y vuelta: solo las columnas que usa el listado, sin entidades ORM
+        rows = db.execute(_consulta_listado_reportes()).all()
+    except Exception:
+        logger.exception("Error generating reports list")
+        # Se agrega siempre el reporte global para no perder la funcionalidad
+        return [_reporte_global_nc(now)], False
 
-    return reports
+    for row in rows:
+        if row.kind == "aud":
+            # 1. Auditorías (ordenadas por fecha planificada)
+            report_date = row.fecha.isoformat() if row.fecha else now.isoformat()
+            reports.append({
+                "id": row.id,
+                "codigo": row.codigo or f"AUD-{row.id[:8]}",
+                "title": f"Reporte de Auditoría: {row.codigo or 'Sin código'}",
+                "category": "auditorias",
+                "date": report_date,
+                "status": row.estado or "completado",
+                "format": "PDF",
+                "description": f"Auditoría de {row.objetivo or 'gestión'}"
+            })
+        else:
+            # 2. No Conformidades (Global)
+            reports.append(_reporte_global_nc(now, row.fecha, row.total))
+
+    return reports, True
 
 @router.get("/auditorias/{auditoria_id}/pdf")
 def descargar_reporte_auditoria(
     auditoria_id: UUID, 
+    request: Request,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["auditorias.ver", "sistema.admin"]))
 ):
     """Generar y descargar PDF de una auditoría"""
+    # Se precarga exactamente lo que usa PDFService; cualquier otra relación falla en lugar de disparar N+1
     auditoria = db.query(Auditoria).options(
-        joinedload(Auditoria.hallazgos),
-        joinedload(Auditoria.auditor_lider),
+        selectinload(Auditoria.hallazgos).raiseload("*"),
+        joinedload(Auditoria.auditor_lider).raiseload("*"),
+        raiseload("*"),
     ).filter(Auditoria.id == auditoria_id).first()
     if not auditoria:
         raise HTTPException(status_code=404, detail="Auditoría no encontrada")
         
-    pdf_buffer = PDFService.generate_auditoria_report(auditoria)
     filename = f"auditoria_{auditoria.codigo or 'report'}.pdf"
-    
-    headers = {"Content-Disposition": f"attachment; filename={filename}"}
-    return StreamingResponse(
-        pdf_buffer, 
-        headers=headers, 
-        media_type="application/pdf"
+    etag = f'"{PDFService.version_auditoria_report(auditoria)}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=3600"}
+    if coincide_if_none_match(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    # Solo se renderiza cuando la auditoría cambió; si no, se sirve el archivo cacheado (sendfile)
+    path = PDFService.render_auditoria_report_cached(auditoria)
+    return FileResponse(
+        path,
+        headers=headers,
+        media_type="application/pdf",
+        filename=filename,
     )
 
+NC_PDF_YIELD_PER = 200
+
+
+def _iterar_noconformidades(db: Session, estado: Optional[str]) -> Iterator[NoConformidad]:
+    """Recorre las NC con un cursor del lado del servidor (yield_per) mientras se genera el PDF"""
+    # El responsable es many-to-one: joinedload es compatible con yield_per
+    query = db.query(NoConformidad).options(joinedload(NoConformidad.responsable))
+    
+    if estado:
+        query = query.filter(NoConformidad.estado == estado)
+    
+    # Optional: Filter by year if Fecha Deteccion exists
+    # if year:
+    #    query = query.filter(extract('year', NoConformidad.fecha_deteccion) == year)
+    
+    return iter(query.order_by(NoConformidad.fecha_deteccion.desc()).yield_per(NC_PDF_YIELD_PER))
+
+
 @router.get("/noconformidades/pdf")
 def descargar_reporte_noconformidades(
     estado: Optional[str] = Query(None),
@@ -97,24 +192,16 @@ def descargar_reporte_noconformidades(
     current_user: Usuario = Depends(require_any_permission(["noconformidades.gestion", "noconformidades.cerrar", "sistema.admin"]))
 ):
     """Generar PDF de listado de No Conformidades"""
-    query = db.query(NoConformidad)
-    
-    if estado:
-        query = query.filter(NoConformidad.estado == estado)
-    
-    # Optional: Filter by year if Fecha Deteccion exists
-    # if year:
-    #    query = query.filter(extract('year', NoConformidad.fecha_deteccion) == year)
-        
-    ncs = query.order_by(NoConformidad.fecha_deteccion.desc()).all()
+    # Se renderiza completo antes de responder (en el threadpool, con la sesión del request):
+    # si falla, el cliente recibe un 500 y no un PDF truncado
+    pdf = PDFService.render_noconformidades_report(_iterar_noconformidades(db, estado))
     
-    pdf_buffer = PDFService.generate_noconformidades_report(ncs)
     report_year = year or datetime.now().year
     filename = f"reporte_noconformidades_{report_year}.pdf"
     
     headers = {"Content-Disposition": f"attachment; filename={filename}"}
     return StreamingResponse(
-        pdf_buffer, 
+        iterar_archivo(pdf), 
         headers=headers, 
         media_type="application/pdf"
     )
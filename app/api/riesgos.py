@@ -1,25 +1,31 @@
 """
 Endpoints CRUD para gestión de riesgos
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+import msgspec
+from fastapi import APIRouter, Body, Depends, HTTPException, Response, status, Query
+from sqlalchemy.orm import Query as SQLQuery
+from typing import List, Optional
 from uuid import UUID
 
-from ..database import get_db
 from ..models.riesgo import Riesgo, ControlRiesgo
 from ..schemas.riesgo import (
     RiesgoCreate,
     RiesgoUpdate,
     RiesgoResponse,
+    RiesgoStruct,
     ControlRiesgoCreate,
     ControlRiesgoUpdate,
-    ControlRiesgoResponse
+    ControlRiesgoResponse,
+    ControlRiesgoStruct,
 )
-from ..api.dependencies import require_any_permission
+from ..api.dependencies import require_any_permission, get_permission_codes, scoped_query
 from ..models.usuario import Usuario
 from ..services.riesgo_service import RiesgoService
+from ..utils.pagination import establecer_siguiente_cursor, recortar_pagina
+from ..utils.responses import MsgspecJSONResponse
 
+# Sin default_response_class: con response_model, FastAPI serializa directamente a JSON en el núcleo
+# Rust de Pydantic. Los listados devuelven MsgspecJSONResponse ya codificada (sin validar cada fila).
 router = APIRouter(prefix="/api/v1", tags=["riesgos"])
 
 
@@ -27,75 +33,63 @@ router = APIRouter(prefix="/api/v1", tags=["riesgos"])
 # Endpoints de Riesgos
 # ======================
 
-@router.get("/riesgos", response_model=List[RiesgoResponse])
+@router.get("/riesgos", response_model=List[RiesgoResponse], response_class=MsgspecJSONResponse)
 def listar_riesgos(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    after: Optional[UUID] = None,
     proceso_id: UUID = None,
     estado: str = None,
     nivel_riesgo: str = None,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(require_any_permission(["riesgos.ver", "riesgos.gestion", "sistema.admin"]))
+    service: RiesgoService = Depends(),
+    current_user: Usuario = Depends(require_any_permission(["riesgos.ver", "riesgos.gestion", "sistema.admin"])),
+    riesgos_query: SQLQuery = Depends(scoped_query(Riesgo)),
 ):
     """Listar riesgos"""
-    service = RiesgoService(db)
-
-    # Data Scoping por área del usuario
-    area_id_filtro = None
-    try:
-        es_admin_o_gestor = any(
-            ur.rol.clave in ['admin', 'gestor_calidad']
-            for ur in current_user.roles
-        )
-        if not es_admin_o_gestor and current_user.area_id:
-            area_id_filtro = current_user.area_id
-    except Exception:
-        pass  # Fallback: ver todos
-
-    riesgos = service.listar(
-        skip=skip,
-        limit=limit,
-        proceso_id=proceso_id,
-        estado=estado,
-        nivel_riesgo=nivel_riesgo,
+    # Data Scoping por área del usuario: ya aplicado en SQL por scoped_query
+    # Se pide una fila de más para saber si hay otra página sin COUNT(*)
+    riesgos, has_more = recortar_pagina(
+        service.listar(
+            skip=skip,
+            limit=limit + 1,
+            proceso_id=proceso_id,
+            estado=estado,
+            nivel_riesgo=nivel_riesgo,
+            after=after,
+            query=riesgos_query,
+        ),
+        limit,
     )
+    establecer_siguiente_cursor(response, riesgos, has_more)
 
-    # Filtrar por área si aplica
-    if area_id_filtro:
-        riesgos = [r for r in riesgos if r.proceso and r.proceso.area_id == area_id_filtro]
-
-    return riesgos
+    return MsgspecJSONResponse(
+        msgspec.convert(riesgos, List[RiesgoStruct], from_attributes=True),
+        headers=dict(response.headers),
+    )
 
 
 @router.post("/riesgos", response_model=RiesgoResponse, status_code=status.HTTP_201_CREATED)
 def crear_riesgo(
     riesgo: RiesgoCreate, 
-    db: Session = Depends(get_db),
+    service: RiesgoService = Depends(),
     current_user: Usuario = Depends(require_any_permission(["riesgos.identificar", "sistema.admin"]))
 ):
     """Crear un nuevo riesgo"""
-    service = RiesgoService(db)
-    # Verify permission "riesgos.identificar"
-    tiene_permiso = any(
-        rp.permiso.codigo == "riesgos.identificar" 
-        for ur in current_user.roles 
-        for rp in ur.rol.permisos
-        if rp.permiso
-    )
-    if not tiene_permiso:
+    # Verificar permiso "riesgos.identificar" antes de cualquier acceso a la base de datos
+    if "riesgos.identificar" not in get_permission_codes(current_user):
         raise HTTPException(status_code=403, detail="No tienes permiso para identificar riesgos")
-        
+
     return service.crear(riesgo, current_user.id)
 
 
 @router.get("/riesgos/{riesgo_id}", response_model=RiesgoResponse)
 def obtener_riesgo(
     riesgo_id: UUID, 
-    db: Session = Depends(get_db),
+    service: RiesgoService = Depends(),
     current_user: Usuario = Depends(require_any_permission(["riesgos.ver", "riesgos.gestion", "sistema.admin"]))
 ):
     """Obtener un riesgo por ID"""
-    service = RiesgoService(db)
     return service.obtener(riesgo_id)
 
 
@@ -103,22 +97,20 @@ def obtener_riesgo(
 def actualizar_riesgo(
     riesgo_id: UUID,
     riesgo_update: RiesgoUpdate,
-    db: Session = Depends(get_db),
+    service: RiesgoService = Depends(),
     current_user: Usuario = Depends(require_any_permission(["riesgos.gestion", "sistema.admin"]))
 ):
     """Actualizar un riesgo"""
-    service = RiesgoService(db)
     return service.actualizar(riesgo_id, riesgo_update, current_user.id)
 
 
 @router.delete("/riesgos/{riesgo_id}", status_code=status.HTTP_204_NO_CONTENT)
 def eliminar_riesgo(
     riesgo_id: UUID, 
-    db: Session = Depends(get_db),
+    service: RiesgoService = Depends(),
     current_user: Usuario = Depends(require_any_permission(["riesgos.gestion", "sistema.admin"]))
 ):
     """Eliminar un riesgo"""
-    service = RiesgoService(db)
     service.eliminar(riesgo_id, current_user.id)
     return None
 
@@ -130,47 +122,63 @@ def eliminar_riesgo(
 @router.get("/riesgos/{riesgo_id}/controles", response_model=List[ControlRiesgoResponse])
 def listar_controles_riesgo(
     riesgo_id: UUID, 
-    db: Session = Depends(get_db),
+    service: RiesgoService = Depends(),
     current_user: Usuario = Depends(require_any_permission(["riesgos.ver", "riesgos.gestion", "sistema.admin"]))
 ):
     """Listar controles de un riesgo"""
-    service = RiesgoService(db)
     return service.listar_controles_riesgo(riesgo_id)
 
 
-@router.get("/controles-riesgo", response_model=List[ControlRiesgoResponse])
+@router.get("/controles-riesgo", response_model=List[ControlRiesgoResponse], response_class=MsgspecJSONResponse)
 def listar_controles(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    after: Optional[UUID] = None,
     activo: bool = None,
     tipo_control: str = None,
-    db: Session = Depends(get_db),
+    service: RiesgoService = Depends(),
     current_user: Usuario = Depends(require_any_permission(["riesgos.ver", "riesgos.gestion", "sistema.admin"]))
 ):
     """Listar todos los controles de riesgo"""
-    service = RiesgoService(db)
-    return service.listar_controles(skip=skip, limit=limit, activo=activo, tipo_control=tipo_control)
+    controles, has_more = recortar_pagina(
+        service.listar_controles(skip=skip, limit=limit + 1, activo=activo, tipo_control=tipo_control, after=after),
+        limit,
+    )
+    establecer_siguiente_cursor(response, controles, has_more)
+    return MsgspecJSONResponse(
+        msgspec.convert(controles, List[ControlRiesgoStruct], from_attributes=True),
+        headers=dict(response.headers),
+    )
 
 
 @router.post("/controles-riesgo", response_model=ControlRiesgoResponse, status_code=status.HTTP_201_CREATED)
 def crear_control_riesgo(
     control: ControlRiesgoCreate, 
-    db: Session = Depends(get_db),
+    service: RiesgoService = Depends(),
     current_user: Usuario = Depends(require_any_permission(["riesgos.gestion", "sistema.admin"]))
 ):
     """Crear un nuevo control de riesgo"""
-    service = RiesgoService(db)
     return service.crear_control(control, current_user.id)
 
 
+@router.post("/controles-riesgo/bulk", response_model=List[ControlRiesgoResponse], status_code=status.HTTP_201_CREATED)
+def crear_controles_riesgo_bulk(
+    controles: List[ControlRiesgoCreate] = Body(..., max_length=500),
+    service: RiesgoService = Depends(),
+    current_user: Usuario = Depends(require_any_permission(["riesgos.gestion", "sistema.admin"]))
+):
+    """Crear varios controles de riesgo en una sola operación"""
+    return service.crear_controles_bulk(controles, current_user.id)
+
+
 @router.get("/controles-riesgo/{control_id}", response_model=ControlRiesgoResponse)
 def obtener_control_riesgo(
     control_id: UUID, 
-    db: Session = Depends(get_db),
+    service: RiesgoService = Depends(),
     current_user: Usuario = Depends(require_any_permission(["riesgos.ver", "riesgos.gestion", "sistema.admin"]))
 ):
     """Obtener un control de riesgo por ID"""
-    service = RiesgoService(db)
     return service.obtener_control(control_id)
 
 
@@ -178,21 +186,19 @@ def obtener_control_riesgo(
 def actualizar_control_riesgo(
     control_id: UUID,
     control_update: ControlRiesgoUpdate,
-    db: Session = Depends(get_db),
+    service: RiesgoService = Depends(),
     current_user: Usuario = Depends(require_any_permission(["riesgos.gestion", "sistema.admin"]))
 ):
     """Actualizar un control de riesgo"""
-    service = RiesgoService(db)
     return service.actualizar_control(control_id, control_update, current_user.id)
 
 
 @router.delete("/controles-riesgo/{control_id}", status_code=status.HTTP_204_NO_CONTENT)
 def eliminar_control_riesgo(
     control_id: UUID, 
-    db: Session = Depends(get_db),
+    service: RiesgoService = Depends(),
     current_user: Usuario = Depends(require_any_permission(["riesgos.gestion", "sistema.admin"]))
 ):
     """Eliminar un control de riesgo"""
-    service = RiesgoService(db)
     service.eliminar_control(control_id, current_user.id)
     return None
@@ -1,31 +1,51 @@
 """
 Rutas de la API
 """
-from fastapi import APIRouter, Depends
+import msgspec
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from ..database import get_db
 from ..config import settings
 
 router = APIRouter()
 
+# Respuestas estáticas serializadas una sola vez al importar (settings no cambia en caliente)
+_ROOT_JSON = msgspec.json.encode({
+    "message": f"Bienvenido a {settings.APP_NAME}",
+    "version": settings.APP_VERSION,
+    "docs": "/docs",
+    "environment": settings.ENVIRONMENT
+})
+_LIVE_JSON = msgspec.json.encode({"status": "ok"})
+_ITEMS_JSON = msgspec.json.encode({
+    "items": [
+        {"id": 1, "name": "Item 1", "description": "Descripción del item 1"},
+        {"id": 2, "name": "Item 2", "description": "Descripción del item 2"},
+        {"id": 3, "name": "Item 3", "description": "Descripción del item 3"}
+    ],
+    "total": 3
+})
+
 
 @router.get("/")
 async def root():
     """Endpoint raíz de bienvenida"""
-    return {
-        "message": f"Bienvenido a {settings.APP_NAME}",
-        "version": settings.APP_VERSION,
-        "docs": "/docs",
-        "environment": settings.ENVIRONMENT
-    }
+    return Response(_ROOT_JSON, media_type="application/json")
+
+
+@router.get("/health/live")
+async def liveness_check():
+    """Liveness: el proceso responde (sin tocar la base de datos)"""
+    return Response(_LIVE_JSON, media_type="application/json")
 
 
 @router.get("/health")
-async def health_check(db: Session = Depends(get_db)):
-    """Health check endpoint"""
+def health_check(db: Session = Depends(get_db)):
+    """Health check endpoint (readiness: incluye la conexión a la DB)"""
     try:
         # Intentar ejecutar una consulta simple para verificar la conexión a la DB
-        db.execute("SELECT 1")
+        db.execute(text("SELECT 1")).scalar()
         db_status = "healthy"
     except Exception as e:
         db_status = f"unhealthy: {str(e)}"
@@ -40,11 +60,4 @@ async def health_check(db: Session = Depends(get_db)):
 @router.get("/api/v1/items")
 async def get_items():
     """Endpoint de ejemplo para listar items"""
-    return {
-        "items": [
-            {"id": 1, "name": "Item 1", "description": "Descripción del item 1"},
-            {"id": 2, "name": "Item 2", "description": "Descripción del item 2"},
-            {"id": 3, "name": "Item 3", "description": "Descripción del item 3"}
-        ],
-        "total": 3
-    }
+    return Response(_ITEMS_JSON, media_type="application/json")
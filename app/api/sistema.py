@@ -1,16 +1,23 @@
 """
 Endpoints CRUD para sistema (notificaciones, configuraciones, asignaciones)
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
+from threading import Lock
+
+import msgspec
+from cachetools import TTLCache
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, Response, status, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, delete, func, insert, literal, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy.exc import IntegrityError
-from typing import List
+from typing import Iterator, List, Optional
 from uuid import UUID
 from datetime import datetime
 import hashlib
 import json
 
-from ..database import get_db
+from ..database import SessionLocal, get_db
 from ..models.sistema import (
     Notificacion,
     Configuracion,
@@ -24,6 +31,7 @@ from ..schemas.sistema import (
     NotificacionCreate,
     NotificacionUpdate,
     NotificacionResponse,
+    NotificacionStruct,
     ConfiguracionCreate,
     ConfiguracionUpdate,
     ConfiguracionResponse,
@@ -35,13 +43,33 @@ from ..schemas.sistema import (
     CampoFormularioCreate,
     CampoFormularioUpdate,
     CampoFormularioResponse,
+    CampoFormularioStruct,
     RespuestaFormularioCreate,
     RespuestaFormularioUpdate,
     RespuestaFormularioResponse,
+    RespuestaFormularioStruct,
     AuditLogResponse,
+    AuditLogStruct,
 )
-from ..api.dependencies import require_any_permission
-from ..models.usuario import Usuario
+from ..api.dependencies import require_any_permission, get_permission_codes, get_role_keys
+from ..models.usuario import Area, Usuario
+from ..repositories.base import BaseRepository
+from ..utils.db_errors import es_violacion_unicidad
+from ..utils.orm import opciones_carga_estricta
+from ..utils.pagination import (
+    HAS_MORE_HEADER,
+    NEXT_CURSOR_HEADER,
+    TOTAL_COUNT_HEADER,
+    codificar_cursor,
+    codificar_cursor_fecha,
+    decodificar_cursor,
+    decodificar_cursor_fecha,
+    establecer_siguiente_cursor,
+    establecer_total,
+    recortar_pagina,
+    separar_total,
+)
+from ..utils.responses import MsgspecJSONResponse, coincide_if_none_match, convertir_a_structs
 
 router = APIRouter(prefix="/api/v1", tags=["sistema"])
 
@@ -64,7 +92,7 @@ ISO_SECCIONES_VALIDAS = {
 
 
 def _obtener_usuario_activo(db: Session, usuario_id: UUID, campo: str = "usuario") -> Usuario:
-    usuario = db.query(Usuario).filter(Usuario.id == usuario_id).first()
+    usuario = db.get(Usuario, usuario_id)
     if not usuario:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -78,30 +106,72 @@ def _obtener_usuario_activo(db: Session, usuario_id: UUID, campo: str = "usuario
     return usuario
 
 
+_CAMPOS_CON_OPCIONES = frozenset({"select", "radio", "checkbox", "multiselect"})
+# Columnas que se copian tal cual al crear una nueva versión de un formulario
+_COLUMNAS_CAMPO_CLONABLES = (
+    "proceso_id",
+    "nombre",
+    "etiqueta",
+    "tipo_campo",
+    "requerido",
+    "opciones",
+    "orden",
+    "activo",
+    "validaciones",
+    "seccion_iso",
+    "clausula_iso",
+    "subclausula_iso",
+    "evidencia_requerida",
+)
+
+
 def _validar_tipo_campo_con_opciones(tipo_campo: str, opciones):
-    if tipo_campo in {"select", "radio", "checkbox", "multiselect"} and not opciones:
+    if tipo_campo in _CAMPOS_CON_OPCIONES and not opciones:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Los campos de selección requieren opciones.",
         )
 
 
-def _es_formulario_iso_auditoria(formulario: FormularioDinamico) -> bool:
+def _es_iso_auditoria(modulo, entidad_tipo) -> bool:
     return (
-        str(formulario.modulo).strip().lower() == "auditorias"
-        and str(formulario.entidad_tipo).strip().lower() == "auditoria"
+        str(modulo).strip().lower() == "auditorias"
+        and str(entidad_tipo).strip().lower() == "auditoria"
     )
 
 
+def _es_formulario_iso_auditoria(formulario: FormularioDinamico) -> bool:
+    # Columna generada; sólo se recalcula en objetos aún no leídos de la base de datos
+    if formulario.es_iso_auditoria is not None:
+        return formulario.es_iso_auditoria
+    return _es_iso_auditoria(formulario.modulo, formulario.entidad_tipo)
+
+
 def _validar_formulario_iso_completo(db: Session, formulario: FormularioDinamico) -> None:
     if not _es_formulario_iso_auditoria(formulario):
         return
 
-    campos = db.query(CampoFormulario).filter(
-        CampoFormulario.formulario_id == formulario.id,
-        CampoFormulario.activo.is_(True),
-    ).all()
-    nombres = {str(c.nombre).strip().lower() for c in campos}
+    # Una sola fila agregada: nombres normalizados y etiquetas que incumplen cada regla
+    seccion_normalizada = func.lower(func.trim(CampoFormulario.seccion_iso))
+    nombres, faltan_clausula, secciones_invalidas = db.execute(
+        select(
+            func.array_agg(func.lower(func.trim(CampoFormulario.nombre))),
+            func.array_agg(CampoFormulario.etiqueta).filter(
+                or_(CampoFormulario.clausula_iso.is_(None), func.trim(CampoFormulario.clausula_iso) == "")
+            ),
+            func.array_agg(CampoFormulario.etiqueta).filter(
+                and_(
+                    CampoFormulario.seccion_iso.isnot(None),
+                    CampoFormulario.seccion_iso != "",
+                    seccion_normalizada.notin_(ISO_SECCIONES_VALIDAS),
+                )
+            ),
+        ).where(
+            CampoFormulario.formulario_id == formulario.id,
+            CampoFormulario.activo.is_(True),
+        )
+    ).one()
+    nombres = set(nombres or ())
     faltantes = [campo for campo in ISO_AUDITORIA_CAMPOS_REQUERIDOS.keys() if campo not in nombres]
     if faltantes:
         etiquetas = ", ".join(ISO_AUDITORIA_CAMPOS_REQUERIDOS[c] for c in faltantes)
@@ -113,16 +183,12 @@ def _validar_formulario_iso_completo(db: Session, formulario: FormularioDinamico
             ),
         )
 
-    faltan_clausula = [c.etiqueta for c in campos if not (c.clausula_iso and str(c.clausula_iso).strip())]
     if faltan_clausula:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cada pregunta debe tener cláusula ISO asignada antes de aprobar.",
         )
 
-    secciones_invalidas = [
-        c.etiqueta for c in campos if c.seccion_iso and str(c.seccion_iso).strip().lower() not in ISO_SECCIONES_VALIDAS
-    ]
     if secciones_invalidas:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -130,37 +196,73 @@ def _validar_formulario_iso_completo(db: Session, formulario: FormularioDinamico
         )
 
 
+_ROLES_ADMIN = frozenset({"ADMIN", "admin"})
+
+
+def _hash_evidencia(campo_id: UUID, auditoria_id: Optional[UUID], archivo, valor) -> str:
+    """
+    SHA-256 de la evidencia adjunta a una respuesta.
+
+    El dict se arma ya en orden alfabético de claves: produce los mismos bytes que
+    json.dumps(..., sort_keys=True), de modo que los hashes ya guardados siguen siendo verificables.
+    """
+    canonico = json.dumps(
+        {
+            "archivo": archivo,
+            "auditoria": str(auditoria_id) if auditoria_id else None,
+            "campo": str(campo_id),
+            "valor": valor,
+        }
+    )
+    return hashlib.sha256(canonico.encode("utf-8")).hexdigest()
+
+
+# Índice único parcial: una sola versión aprobada y activa por (modulo, entidad_tipo, proceso_id)
+_UQ_FORMULARIO_APROBADO_ACTIVO = "uq_formularios_dinamicos_aprobado_activo"
+
+
+def _es_conflicto_aprobado_activo(error: IntegrityError) -> bool:
+    """Indica si el IntegrityError es la violación del índice de versión aprobada y activa"""
+    diag = getattr(error.orig, "diag", None)
+    return es_violacion_unicidad(error) and getattr(diag, "constraint_name", None) == _UQ_FORMULARIO_APROBADO_ACTIVO
+
+
+def _etag_version(actualizado_en: datetime) -> str:
+    """ETag débil derivado de actualizado_en (cambia en cada UPDATE de la fila)"""
+    return f'W/"{actualizado_en.timestamp():.6f}"'
+
+
+# Datos de administración: sólo cachés privadas y siempre revalidando con el ETag (un cambio se ve al instante)
+_CACHE_CONTROL_REVALIDAR = "private, no-cache"
+
+
+def _cabeceras_cache(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": _CACHE_CONTROL_REVALIDAR}
+
+
+def _no_modificado(request: Request, etag: str) -> Optional[Response]:
+    """304 si el cliente ya tiene esta versión (If-None-Match), o None para responder completo"""
+    if coincide_if_none_match(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_cabeceras_cache(etag))
+    return None
+
+
 def _is_admin_user(current_user: Usuario) -> bool:
-    # Compatibilidad con múltiples convenciones de permisos/roles existentes.
-    permisos = set(getattr(current_user, "permisos_codes", []) or getattr(current_user, "permisos", []) or [])
-    if "sistema.admin" in permisos:
+    # Permisos precalculados en get_current_user (roles→permisos ya cargados): sin consultas extra
+    if "sistema.admin" in get_permission_codes(current_user):
         return True
-    try:
-        role_keys = {ur.rol.clave for ur in getattr(current_user, "roles", []) if getattr(ur, "rol", None)}
-    except Exception:
-        role_keys = set()
-    return bool(role_keys.intersection({"ADMIN", "admin"}))
+    return bool(get_role_keys(current_user) & _ROLES_ADMIN)
 
 
-@router.get("/audit-log", response_model=List[AuditLogResponse])
-def listar_audit_log(
-    skip: int = 0,
-    limit: int = 100,
-    tabla: str = None,
-    accion: str = None,
-    usuario_id: UUID = None,
-    fecha_desde: datetime = None,
-    fecha_hasta: datetime = None,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"])),
-):
-    if not _is_admin_user(current_user):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tiene permisos para consultar el audit log",
-        )
+# Filas traídas por lote desde el cursor del servidor mientras se convierten a Structs
+LISTADO_YIELD_PER = 64
+AUDIT_LOG_EXPORT_YIELD_PER = 500
+
+_ndjson_encoder = msgspec.json.Encoder()
 
-    query = db.query(AuditLog)
+
+def _filtrar_audit_log(query, tabla, accion, usuario_id, fecha_desde, fecha_hasta):
+    """Aplica los filtros del audit log (sirve para Query y para select())"""
     if tabla:
         query = query.filter(AuditLog.tabla == tabla)
     if accion:
@@ -171,18 +273,139 @@ def listar_audit_log(
         query = query.filter(AuditLog.fecha >= fecha_desde)
     if fecha_hasta:
         query = query.filter(AuditLog.fecha <= fecha_hasta)
+    return query
+
+
+def _verificar_acceso_audit_log(current_user: Usuario) -> None:
+    if not _is_admin_user(current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tiene permisos para consultar el audit log",
+        )
+
+
+@router.get("/audit-log", response_model=List[AuditLogResponse], response_class=MsgspecJSONResponse)
+def listar_audit_log(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    include_total: bool = Query(False, description="Agrega X-Total-Count (cuenta todo el filtro: más costoso)"),
+    tabla: str = None,
+    accion: str = None,
+    usuario_id: UUID = None,
+    fecha_desde: datetime = None,
+    fecha_hasta: datetime = None,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"])),
+):
+    _verificar_acceso_audit_log(current_user)
+
+    query = _filtrar_audit_log(db.query(AuditLog), tabla, accion, usuario_id, fecha_desde, fecha_hasta)
+    query = query.order_by(AuditLog.fecha.desc(), AuditLog.id.desc())
+    if cursor:
+        # Keyset sobre (fecha, id): coste constante sin importar la profundidad (ignora skip)
+        query = query.filter(tuple_(AuditLog.fecha, AuditLog.id) < decodificar_cursor_fecha(cursor))
+        filas, _ = convertir_a_structs(
+            query.limit(limit + 1).yield_per(LISTADO_YIELD_PER), AuditLogStruct
+        )
+    elif not include_total:
+        filas, _ = convertir_a_structs(
+            query.offset(skip).limit(limit + 1).yield_per(LISTADO_YIELD_PER), AuditLogStruct
+        )
+    else:
+        # Sólo si se pide: COUNT(*) OVER () recorre todo el filtro antes del LIMIT.
+        # Página y total en el mismo SELECT
+        filas, total = convertir_a_structs(
+            query.add_columns(func.count().over().label("total"))
+            .offset(skip)
+            .limit(limit + 1)
+            .yield_per(LISTADO_YIELD_PER),
+            AuditLogStruct,
+            con_total=True,
+        )
+        establecer_total(response, total, skip)
+
+    registros, has_more = recortar_pagina(filas, limit)
+    establecer_siguiente_cursor(
+        response, registros, has_more, lambda r: codificar_cursor_fecha(r.fecha, r.id)
+    )
+    return MsgspecJSONResponse(registros, headers=dict(response.headers))
 
-    return query.order_by(AuditLog.fecha.desc()).offset(skip).limit(limit).all()
+
+def _exportar_audit_log_ndjson(filtros: dict) -> Iterator[bytes]:
+    """
+    Emite el audit log como NDJSON recorriendo un cursor del lado del servidor.
+
+    Usa una sesión propia porque la iteración ocurre durante el envío de la respuesta,
+    fuera del ciclo de vida de la sesión del request.
+    """
+    db = SessionLocal()
+    try:
+        stmt = (
+            _filtrar_audit_log(select(AuditLog), **filtros)
+            .order_by(AuditLog.fecha.desc(), AuditLog.id.desc())
+            .execution_options(yield_per=AUDIT_LOG_EXPORT_YIELD_PER)
+        )
+        for particion in db.scalars(stmt).partitions():
+            yield _ndjson_encoder.encode_lines(
+                [msgspec.convert(registro, AuditLogStruct, from_attributes=True) for registro in particion]
+            )
+            # Las entidades ya serializadas no se necesitan más: la memoria se mantiene plana
+            db.expunge_all()
+    finally:
+        db.close()
+
+
+@router.get("/audit-log/export")
+def exportar_audit_log(
+    tabla: str = None,
+    accion: str = None,
+    usuario_id: UUID = None,
+    fecha_desde: datetime = None,
+    fecha_hasta: datetime = None,
+    current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"])),
+):
+    """Exportar el audit log completo (según filtros) como NDJSON en streaming"""
+    _verificar_acceso_audit_log(current_user)
+    filtros = dict(
+        tabla=tabla,
+        accion=accion,
+        usuario_id=usuario_id,
+        fecha_desde=fecha_desde,
+        fecha_hasta=fecha_hasta,
+    )
+    return StreamingResponse(
+        _exportar_audit_log_ndjson(filtros),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=audit_log.ndjson"},
+    )
 
 
 # =========================
 # Endpoints de Asignaciones
 # =========================
 
+# Lo que lee AsignacionResponse: área con sus asignaciones (y usuario) y usuario con roles
+_OPCIONES_ASIGNACION_RESPUESTA = (
+    joinedload(Asignacion.area).selectinload(Area.asignaciones).joinedload(Asignacion.usuario),
+    joinedload(Asignacion.usuario).selectinload(Usuario.roles),
+)
+
+# En listados, selectinload evita repetir las columnas de área/usuario en cada fila del JOIN
+# (pocas áreas y usuarios compartidos entre muchas asignaciones)
+_OPCIONES_ASIGNACION_LISTADO = (
+    selectinload(Asignacion.area).selectinload(Area.asignaciones).joinedload(Asignacion.usuario),
+    selectinload(Asignacion.usuario).selectinload(Usuario.roles),
+)
+
+
 @router.get("/asignaciones", response_model=List[AsignacionResponse])
 def listar_asignaciones(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
     area_id: UUID = None,
     usuario_id: UUID = None,
     db: Session = Depends(get_db),
@@ -190,8 +413,8 @@ def listar_asignaciones(
 ):
     """Listar asignaciones de responsables"""
     query = db.query(Asignacion).options(
-        joinedload(Asignacion.area),
-        joinedload(Asignacion.usuario)
+        *_OPCIONES_ASIGNACION_LISTADO,
+        *opciones_carga_estricta(),
     )
     
     if area_id:
@@ -199,7 +422,17 @@ def listar_asignaciones(
     if usuario_id:
         query = query.filter(Asignacion.usuario_id == usuario_id)
     
-    asignaciones = query.offset(skip).limit(limit).all()
+    query = query.order_by(Asignacion.creado_en.desc(), Asignacion.id.desc())
+    if cursor:
+        # Keyset sobre (creado_en, id) en lugar de OFFSET (ignora skip)
+        query = query.filter(tuple_(Asignacion.creado_en, Asignacion.id) < decodificar_cursor_fecha(cursor))
+    else:
+        query = query.offset(skip)
+
+    asignaciones, has_more = recortar_pagina(query.limit(limit + 1).all(), limit)
+    establecer_siguiente_cursor(
+        response, asignaciones, has_more, lambda a: codificar_cursor_fecha(a.creado_en, a.id)
+    )
     return asignaciones
 
 
@@ -212,33 +445,37 @@ def crear_asignacion(
     """Crear una nueva asignación de responsable"""
     _obtener_usuario_activo(db, asignacion.usuario_id)
 
-    # Verificar unicidad
-    db_asignacion = db.query(Asignacion).filter(
-        Asignacion.area_id == asignacion.area_id,
-        Asignacion.usuario_id == asignacion.usuario_id
-    ).first()
-    
-    if db_asignacion:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="El usuario ya está asignado a esta área"
-        )
-    
-    nueva_asignacion = Asignacion(**asignacion.model_dump())
-    db.add(nueva_asignacion)
-    
+    # Inserción y verificación de unicidad en una sola sentencia (sin SELECT previo ni carrera)
+    stmt = (
+        pg_insert(Asignacion)
+        .values(**asignacion.model_dump())
+        .on_conflict_do_nothing(index_elements=["area_id", "usuario_id"])
+        .returning(Asignacion.id)
+    )
     try:
-        db.commit()
-        db.refresh(nueva_asignacion)
-        # Recargar relaciones para la respuesta
-        db.refresh(nueva_asignacion, attribute_names=['area', 'usuario'])
-        return nueva_asignacion
+        nueva_asignacion_id = db.execute(stmt).scalar_one_or_none()
     except IntegrityError:
+        # Solo queda la violación de claves foráneas (p. ej. área inexistente)
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Error de integridad al crear la asignación"
         )
+    if nueva_asignacion_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El usuario ya está asignado a esta área"
+        )
+
+    # RETURNING sólo trae el id: la entidad se carga una vez, con las relaciones de la respuesta
+    nueva_asignacion = db.execute(
+        select(Asignacion)
+        .options(*_OPCIONES_ASIGNACION_RESPUESTA, *opciones_carga_estricta())
+        .where(Asignacion.id == nueva_asignacion_id)
+    ).unique().scalar_one()
+    respuesta = AsignacionResponse.model_validate(nueva_asignacion)
+    db.commit()
+    return respuesta
 
 
 @router.delete("/asignaciones/{asignacion_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -248,14 +485,16 @@ def eliminar_asignacion(
     current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"]))
 ):
     """Eliminar una asignación"""
-    asignacion = db.query(Asignacion).filter(Asignacion.id == asignacion_id).first()
-    if not asignacion:
+    # DELETE ... RETURNING: borra y detecta el 404 en una sola sentencia
+    eliminada = db.execute(
+        delete(Asignacion).where(Asignacion.id == asignacion_id).returning(Asignacion.id)
+    ).scalar_one_or_none()
+    if not eliminada:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Asignación no encontrada"
         )
     
-    db.delete(asignacion)
     db.commit()
     return None
 
@@ -264,10 +503,24 @@ def eliminar_asignacion(
 # Endpoints de Notificaciones
 # ==========================
 
-@router.get("/notificaciones", response_model=List[NotificacionResponse])
+def _obtener_notificacion_propia(db: Session, notificacion_id: UUID, usuario_id: UUID) -> Notificacion:
+    # Session.get usa el identity map antes de emitir SQL; la pertenencia se valida en memoria
+    notificacion = db.get(Notificacion, notificacion_id)
+    if not notificacion or notificacion.usuario_id != usuario_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Notificación no encontrada"
+        )
+    return notificacion
+
+
+@router.get("/notificaciones", response_model=List[NotificacionResponse], response_class=MsgspecJSONResponse)
 def listar_notificaciones(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    include_total: bool = Query(False, description="Agrega X-Total-Count (cuenta todo el filtro: más costoso)"),
     usuario_id: UUID = None,
     leida: bool = None,
     tipo: str = None,
@@ -281,15 +534,42 @@ def listar_notificaciones(
             detail="No tiene permisos para consultar notificaciones de otro usuario",
         )
 
-    query = db.query(Notificacion).filter(Notificacion.usuario_id == current_user.id)
+    stmt = (
+        select(Notificacion)
+        .options(*opciones_carga_estricta())
+        .where(Notificacion.usuario_id == current_user.id)
+    )
 
     if leida is not None:
-        query = query.filter(Notificacion.leida == leida)
+        stmt = stmt.where(Notificacion.leida == leida)
     if tipo:
-        query = query.filter(Notificacion.tipo == tipo)
+        stmt = stmt.where(Notificacion.tipo == tipo)
     
-    notificaciones = query.order_by(Notificacion.creado_en.desc()).offset(skip).limit(limit).all()
-    return notificaciones
+    stmt = stmt.order_by(Notificacion.creado_en.desc(), Notificacion.id.desc())
+    stmt = stmt.execution_options(yield_per=LISTADO_YIELD_PER)
+    if cursor:
+        # Keyset sobre (creado_en, id) en lugar de OFFSET (ignora skip)
+        stmt = stmt.where(tuple_(Notificacion.creado_en, Notificacion.id) < decodificar_cursor_fecha(cursor))
+        filas, _ = convertir_a_structs(db.execute(stmt.limit(limit + 1)).scalars(), NotificacionStruct)
+    elif not include_total:
+        filas, _ = convertir_a_structs(
+            db.execute(stmt.offset(skip).limit(limit + 1)).scalars(), NotificacionStruct
+        )
+    else:
+        # Sólo si se pide: COUNT(*) OVER () recorre todo el filtro antes del LIMIT.
+        # Página y total en el mismo SELECT
+        filas, total = convertir_a_structs(
+            db.execute(stmt.add_columns(func.count().over().label("total")).offset(skip).limit(limit + 1)),
+            NotificacionStruct,
+            con_total=True,
+        )
+        establecer_total(response, total, skip)
+
+    notificaciones, has_more = recortar_pagina(filas, limit)
+    establecer_siguiente_cursor(
+        response, notificaciones, has_more, lambda n: codificar_cursor_fecha(n.creado_en, n.id)
+    )
+    return MsgspecJSONResponse(notificaciones, headers=dict(response.headers))
 
 
 @router.post("/notificaciones", response_model=NotificacionResponse, status_code=status.HTTP_201_CREATED)
@@ -301,9 +581,38 @@ def crear_notificacion(
     """Crear una nueva notificación"""
     nueva_notificacion = Notificacion(**notificacion.model_dump())
     db.add(nueva_notificacion)
+    db.flush()
+    # Defaults en Python: tras el flush la fila está completa y se serializa antes del commit
+    respuesta = NotificacionResponse.model_validate(nueva_notificacion)
+    db.commit()
+    return respuesta
+
+
+@router.post("/notificaciones/bulk", response_model=List[NotificacionResponse], status_code=status.HTTP_201_CREATED)
+def crear_notificaciones_bulk(
+    notificaciones: List[NotificacionCreate] = Body(..., max_length=1000),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"]))
+):
+    """Crear varias notificaciones en un único INSERT ... RETURNING y un solo commit"""
+    if not notificaciones:
+        return []
+    try:
+        nuevas = db.scalars(
+            insert(Notificacion).returning(Notificacion, sort_by_parameter_order=True),
+            [notificacion.model_dump() for notificacion in notificaciones],
+        ).all()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Error de integridad al crear las notificaciones (usuario inexistente)"
+        )
+
+    # Se construye antes del commit (expire_on_commit) para no releer cada fila
+    respuesta = [NotificacionResponse.model_validate(n) for n in nuevas]
     db.commit()
-    db.refresh(nueva_notificacion)
-    return nueva_notificacion
+    return respuesta
 
 
 @router.get("/notificaciones/{notificacion_id}", response_model=NotificacionResponse)
@@ -313,15 +622,7 @@ def obtener_notificacion(
     current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"]))
 ):
     """Obtener una notificación propia por ID."""
-    notificacion = db.query(Notificacion).filter(
-        Notificacion.id == notificacion_id,
-        Notificacion.usuario_id == current_user.id,
-    ).first()
-    if not notificacion:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Notificación no encontrada"
-        )
+    notificacion = _obtener_notificacion_propia(db, notificacion_id, current_user.id)
     return notificacion
 
 
@@ -333,23 +634,26 @@ def actualizar_notificacion(
     current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"]))
 ):
     """Actualizar una notificación propia (marcar como leída)."""
-    notificacion = db.query(Notificacion).filter(
+    update_data = notificacion_update.model_dump(exclude_unset=True)
+    if not update_data:
+        return _obtener_notificacion_propia(db, notificacion_id, current_user.id)
+
+    # UPDATE ... RETURNING: sin SELECT previo ni refresh posterior
+    notificacion = BaseRepository(db, Notificacion).update_returning_where(
+        update_data,
         Notificacion.id == notificacion_id,
         Notificacion.usuario_id == current_user.id,
-    ).first()
+        only_active=False,
+    )
     if not notificacion:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Notificación no encontrada"
         )
     
-    update_data = notificacion_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(notificacion, field, value)
-    
+    respuesta = NotificacionResponse.model_validate(notificacion)
     db.commit()
-    db.refresh(notificacion)
-    return notificacion
+    return respuesta
 
 
 @router.delete("/notificaciones/{notificacion_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -359,17 +663,21 @@ def eliminar_notificacion(
     current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"]))
 ):
     """Eliminar una notificación propia."""
-    notificacion = db.query(Notificacion).filter(
-        Notificacion.id == notificacion_id,
-        Notificacion.usuario_id == current_user.id,
-    ).first()
-    if not notificacion:
+    # DELETE ... RETURNING: borra y detecta el 404 en una sola sentencia
+    eliminada = db.execute(
+        delete(Notificacion)
+        .where(
+            Notificacion.id == notificacion_id,
+            Notificacion.usuario_id == current_user.id,
+        )
+        .returning(Notificacion.id)
+    ).scalar_one_or_none()
+    if not eliminada:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Notificación no encontrada"
         )
     
-    db.delete(notificacion)
     db.commit()
 
 
@@ -377,25 +685,90 @@ def eliminar_notificacion(
 # Endpoints de Configuraciones
 # ============================
 
+# Cachés por worker (un acierto no consulta la base). Las escrituras invalidan sólo el worker que
+# las atiende: en los demás una configuración modificada puede verse desactualizada hasta
+# CONFIGURACION_CACHE_TTL segundos, igual que una lectura que llene la caché justo tras invalidarla
+CONFIGURACION_CACHE_TTL = 10
+# Configuraciones leídas por clave (dict plano)
+_configuracion_cache: TTLCache = TTLCache(maxsize=1024, ttl=CONFIGURACION_CACHE_TTL)
+# Páginas del listado por combinación de filtros: (dicts, headers)
+_configuraciones_listado_cache: TTLCache = TTLCache(maxsize=256, ttl=CONFIGURACION_CACHE_TTL)
+_configuracion_cache_lock = Lock()
+
+
+def invalidar_cache_configuracion(clave: Optional[str] = None) -> None:
+    with _configuracion_cache_lock:
+        if clave is not None:
+            _configuracion_cache.pop(clave, None)
+        _configuraciones_listado_cache.clear()
+
+
+def _obtener_configuracion(db: Session, clave: str) -> Configuracion:
+    configuracion = db.execute(
+        select(Configuracion).where(Configuracion.clave == clave)
+    ).scalar_one_or_none()
+    if not configuracion:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Configuración no encontrada"
+        )
+    return configuracion
+
+
 @router.get("/configuraciones", response_model=List[ConfiguracionResponse])
 def listar_configuraciones(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    include_total: bool = Query(False, description="Agrega X-Total-Count (cuenta todo el filtro: más costoso)"),
     categoria: str = None,
     activa: bool = None,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"]))
 ):
     """Listar configuraciones del sistema"""
-    query = db.query(Configuracion)
+    cache_key = (skip, limit, cursor, include_total, categoria, activa)
+    with _configuracion_cache_lock:
+        cacheado = _configuraciones_listado_cache.get(cache_key)
+    if cacheado is not None:
+        datos, headers = cacheado
+        response.headers.update(headers)
+        return [ConfiguracionResponse.model_construct(**d) for d in datos]
+
+    stmt = select(Configuracion).options(*opciones_carga_estricta())
     
     if categoria:
-        query = query.filter(Configuracion.categoria == categoria)
+        stmt = stmt.where(Configuracion.categoria == categoria)
     if activa is not None:
-        query = query.filter(Configuracion.activa == activa)
+        stmt = stmt.where(Configuracion.activa == activa)
     
-    configuraciones = query.offset(skip).limit(limit).all()
-    return configuraciones
+    # clave es única: basta como clave de orden y de cursor (índice único existente)
+    stmt = stmt.order_by(Configuracion.clave.asc())
+    if cursor:
+        (clave_cursor,) = decodificar_cursor(cursor, str)
+        filas = db.execute(stmt.where(Configuracion.clave > clave_cursor).limit(limit + 1)).scalars().all()
+    elif not include_total:
+        filas = db.execute(stmt.offset(skip).limit(limit + 1)).scalars().all()
+    else:
+        # Sólo si se pide: COUNT(*) OVER () recorre todo el filtro antes del LIMIT.
+        # Página y total en el mismo SELECT
+        stmt = stmt.add_columns(func.count().over().label("total")).offset(skip).limit(limit + 1)
+        filas, total = separar_total(db.execute(stmt).all())
+        establecer_total(response, total, skip)
+
+    configuraciones, has_more = recortar_pagina(filas, limit)
+    establecer_siguiente_cursor(response, configuraciones, has_more, lambda c: codificar_cursor(c.clave))
+
+    respuestas = [ConfiguracionResponse.model_validate(c) for c in configuraciones]
+    headers = {
+        nombre: valor
+        for nombre, valor in response.headers.items()
+        if nombre.lower() in {NEXT_CURSOR_HEADER.lower(), HAS_MORE_HEADER.lower(), TOTAL_COUNT_HEADER.lower()}
+    }
+    with _configuracion_cache_lock:
+        _configuraciones_listado_cache[cache_key] = ([r.model_dump() for r in respuestas], headers)
+    return respuestas
 
 
 @router.post("/configuraciones", response_model=ConfiguracionResponse, status_code=status.HTTP_201_CREATED)
@@ -405,35 +778,58 @@ def crear_configuracion(
     current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"]))
 ):
     """Crear una nueva configuración"""
-    # Verificar clave única
-    db_config = db.query(Configuracion).filter(Configuracion.clave == configuracion.clave).first()
-    if db_config:
+    # La unicidad de la clave se resuelve en el mismo INSERT
+    stmt = (
+        pg_insert(Configuracion)
+        .values(**configuracion.model_dump())
+        .on_conflict_do_nothing(index_elements=["clave"])
+        .returning(Configuracion)
+    )
+    nueva_configuracion = db.execute(stmt).scalar_one_or_none()
+    if nueva_configuracion is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="La clave de configuración ya existe"
         )
     
-    nueva_configuracion = Configuracion(**configuracion.model_dump())
-    db.add(nueva_configuracion)
+    # RETURNING ya trae la fila completa: se serializa antes del commit (expire_on_commit)
+    respuesta = ConfiguracionResponse.model_validate(nueva_configuracion)
     db.commit()
-    db.refresh(nueva_configuracion)
-    return nueva_configuracion
+    invalidar_cache_configuracion()
+    return respuesta
 
 
 @router.get("/configuraciones/{clave}", response_model=ConfiguracionResponse)
 def obtener_configuracion(
     clave: str, 
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"]))
 ):
     """Obtener una configuración por clave"""
-    configuracion = db.query(Configuracion).filter(Configuracion.clave == clave).first()
-    if not configuracion:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Configuración no encontrada"
-        )
-    return configuracion
+    with _configuracion_cache_lock:
+        datos = _configuracion_cache.get(clave)
+    if datos is None:
+        if "if-none-match" in request.headers:
+            # Sólo la versión: si el cliente ya la tiene no se lee (ni serializa) la fila completa
+            actualizado_en = db.execute(
+                select(Configuracion.actualizado_en).where(Configuracion.clave == clave)
+            ).scalar_one_or_none()
+            if actualizado_en is not None:
+                no_modificado = _no_modificado(request, _etag_version(actualizado_en))
+                if no_modificado:
+                    return no_modificado
+        datos = ConfiguracionResponse.model_validate(_obtener_configuracion(db, clave)).model_dump()
+        with _configuracion_cache_lock:
+            _configuracion_cache[clave] = datos
+
+    etag = _etag_version(datos["actualizado_en"])
+    no_modificado = _no_modificado(request, etag)
+    if no_modificado:
+        return no_modificado
+    response.headers.update(_cabeceras_cache(etag))
+    return ConfiguracionResponse.model_construct(**datos)
 
 
 @router.put("/configuraciones/{clave}", response_model=ConfiguracionResponse)
@@ -444,20 +840,24 @@ def actualizar_configuracion(
     current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"]))
 ):
     """Actualizar una configuración"""
-    configuracion = db.query(Configuracion).filter(Configuracion.clave == clave).first()
+    update_data = configuracion_update.model_dump(exclude_unset=True)
+    if not update_data:
+        return _obtener_configuracion(db, clave)
+
+    # UPDATE ... RETURNING: sin SELECT previo ni refresh posterior
+    configuracion = BaseRepository(db, Configuracion).update_returning_where(
+        update_data, Configuracion.clave == clave, only_active=False
+    )
     if not configuracion:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Configuración no encontrada"
         )
     
-    update_data = configuracion_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(configuracion, field, value)
-    
+    respuesta = ConfiguracionResponse.model_validate(configuracion)
     db.commit()
-    db.refresh(configuracion)
-    return configuracion
+    invalidar_cache_configuracion(clave)
+    return respuesta
 
 
 @router.delete("/configuraciones/{clave}", status_code=status.HTTP_204_NO_CONTENT)
@@ -467,15 +867,18 @@ def eliminar_configuracion(
     current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"]))
 ):
     """Eliminar una configuración"""
-    configuracion = db.query(Configuracion).filter(Configuracion.clave == clave).first()
-    if not configuracion:
+    # DELETE ... RETURNING: borra y detecta el 404 en una sola sentencia
+    eliminada = db.execute(
+        delete(Configuracion).where(Configuracion.clave == clave).returning(Configuracion.id)
+    ).scalar_one_or_none()
+    if not eliminada:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Configuración no encontrada"
         )
     
-    db.delete(configuracion)
     db.commit()
+    invalidar_cache_configuracion(clave)
 
 
 # ==================================
@@ -484,28 +887,59 @@ def eliminar_configuracion(
 
 @router.get("/formularios-dinamicos", response_model=List[FormularioDinamicoResponse])
 def listar_formularios_dinamicos(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
     modulo: str = None,
     entidad_tipo: str = None,
     proceso_id: UUID = None,
     activo: bool = None,
     estado_workflow: str = None,
+    es_iso_auditoria: bool = None,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"])),
 ):
-    query = db.query(FormularioDinamico)
+    stmt = select(FormularioDinamico).options(*opciones_carga_estricta())
     if modulo:
-        query = query.filter(FormularioDinamico.modulo == modulo)
+        stmt = stmt.where(FormularioDinamico.modulo == modulo)
     if entidad_tipo:
-        query = query.filter(FormularioDinamico.entidad_tipo == entidad_tipo)
+        stmt = stmt.where(FormularioDinamico.entidad_tipo == entidad_tipo)
     if proceso_id:
-        query = query.filter(FormularioDinamico.proceso_id == proceso_id)
+        stmt = stmt.where(FormularioDinamico.proceso_id == proceso_id)
     if activo is not None:
-        query = query.filter(FormularioDinamico.activo == activo)
+        stmt = stmt.where(FormularioDinamico.activo == activo)
     if estado_workflow:
-        query = query.filter(FormularioDinamico.estado_workflow == estado_workflow)
-    return query.order_by(FormularioDinamico.nombre.asc(), FormularioDinamico.version.desc()).offset(skip).limit(limit).all()
+        stmt = stmt.where(FormularioDinamico.estado_workflow == estado_workflow)
+    if es_iso_auditoria is not None:
+        stmt = stmt.where(FormularioDinamico.es_iso_auditoria.is_(es_iso_auditoria))
+
+    stmt = stmt.order_by(
+        FormularioDinamico.nombre.asc(), FormularioDinamico.version.desc(), FormularioDinamico.id.asc()
+    )
+    if cursor:
+        # Keyset con direcciones mixtas (nombre ASC, version DESC, id ASC): no sirve tuple_ <
+        nombre, version, formulario_id = decodificar_cursor(cursor, str, int, UUID)
+        stmt = stmt.where(
+            or_(
+                FormularioDinamico.nombre > nombre,
+                and_(
+                    FormularioDinamico.nombre == nombre,
+                    or_(
+                        FormularioDinamico.version < version,
+                        and_(FormularioDinamico.version == version, FormularioDinamico.id > formulario_id),
+                    ),
+                ),
+            )
+        )
+    else:
+        stmt = stmt.offset(skip)
+
+    formularios, has_more = recortar_pagina(db.execute(stmt.limit(limit + 1)).scalars().all(), limit)
+    establecer_siguiente_cursor(
+        response, formularios, has_more, lambda f: codificar_cursor(f.nombre, f.version, f.id)
+    )
+    return formularios
 
 
 @router.post("/formularios-dinamicos", response_model=FormularioDinamicoResponse, status_code=status.HTTP_201_CREATED)
@@ -514,33 +948,62 @@ def crear_formulario_dinamico(
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"])),
 ):
-    existente = db.query(FormularioDinamico).filter(FormularioDinamico.codigo == formulario.codigo).first()
-    if existente:
+    valores = formulario.model_dump()
+    if _es_iso_auditoria(valores["modulo"], valores["entidad_tipo"]):
+        valores.update(modulo="auditorias", entidad_tipo="auditoria", estado_workflow="borrador", activo=False)
+
+    # La unicidad del código se resuelve en el mismo INSERT (sin SELECT previo ni carrera)
+    try:
+        nuevo = db.execute(
+            pg_insert(FormularioDinamico)
+            .values(**valores)
+            .on_conflict_do_nothing(index_elements=["codigo"])
+            .returning(FormularioDinamico)
+        ).scalar_one_or_none()
+    except IntegrityError as e:
+        db.rollback()
+        if _es_conflicto_aprobado_activo(e):
+            # Ya hay una versión aprobada y activa para el mismo destino
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Ya existe una versión aprobada y activa de este formulario. Use el flujo de aprobación.",
+            )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Error de integridad al crear el formulario (proceso, aprobador o formulario padre inexistente)",
+        )
+    if nuevo is None:
         raise HTTPException(status_code=400, detail="Ya existe un formulario con ese código.")
-    nuevo = FormularioDinamico(**formulario.model_dump())
-    if _es_formulario_iso_auditoria(nuevo):
-        nuevo.modulo = "auditorias"
-        nuevo.entidad_tipo = "auditoria"
-        nuevo.estado_workflow = "borrador"
-        nuevo.activo = False
-    db.add(nuevo)
-    db.flush()
     if nuevo.activo:
         _validar_formulario_iso_completo(db, nuevo)
+
+    respuesta = FormularioDinamicoResponse.model_validate(nuevo)
     db.commit()
-    db.refresh(nuevo)
-    return nuevo
+    return respuesta
 
 
 @router.get("/formularios-dinamicos/{formulario_id}", response_model=FormularioDinamicoResponse)
 def obtener_formulario_dinamico(
     formulario_id: UUID,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"])),
 ):
-    formulario = db.query(FormularioDinamico).filter(FormularioDinamico.id == formulario_id).first()
+    if "if-none-match" in request.headers:
+        # Sólo la versión: si el cliente ya la tiene no se lee (ni serializa) la fila completa
+        actualizado_en = db.execute(
+            select(FormularioDinamico.actualizado_en).where(FormularioDinamico.id == formulario_id)
+        ).scalar_one_or_none()
+        if actualizado_en is not None:
+            no_modificado = _no_modificado(request, _etag_version(actualizado_en))
+            if no_modificado:
+                return no_modificado
+
+    formulario = db.get(FormularioDinamico, formulario_id)
     if not formulario:
         raise HTTPException(status_code=404, detail="Formulario dinámico no encontrado.")
+    response.headers.update(_cabeceras_cache(_etag_version(formulario.actualizado_en)))
     return formulario
 
 
@@ -551,7 +1014,7 @@ def actualizar_formulario_dinamico(
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"])),
 ):
-    formulario = db.query(FormularioDinamico).filter(FormularioDinamico.id == formulario_id).first()
+    formulario = db.get(FormularioDinamico, formulario_id)
     if not formulario:
         raise HTTPException(status_code=404, detail="Formulario dinámico no encontrado.")
 
@@ -576,18 +1039,32 @@ def actualizar_formulario_dinamico(
                 status_code=400,
                 detail=f"Transición de estado no permitida: {estado_actual} -> {estado_nuevo}",
             )
-    for field, value in update_data.items():
-        setattr(formulario, field, value)
-
-    if _es_formulario_iso_auditoria(formulario):
-        formulario.modulo = "auditorias"
-        formulario.entidad_tipo = "auditoria"
+    if _es_iso_auditoria(
+        update_data.get("modulo", formulario.modulo),
+        update_data.get("entidad_tipo", formulario.entidad_tipo),
+    ):
+        update_data["modulo"] = "auditorias"
+        update_data["entidad_tipo"] = "auditoria"
+
+    # UPDATE ... RETURNING; si la validación ISO falla no hay commit y la sesión se descarta
+    try:
+        formulario = BaseRepository(db, FormularioDinamico).update_returning(formulario_id, update_data, only_active=False)
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                "Ya existe una versión aprobada y activa de este formulario. Use el flujo de aprobación."
+                if _es_conflicto_aprobado_activo(e)
+                else "Error de integridad al actualizar el formulario (proceso, aprobador o formulario padre inexistente)"
+            ),
+        )
     if formulario.activo and formulario.estado_workflow == "aprobado":
         _validar_formulario_iso_completo(db, formulario)
 
+    respuesta = FormularioDinamicoResponse.model_validate(formulario)
     db.commit()
-    db.refresh(formulario)
-    return formulario
+    return respuesta
 
 
 @router.delete("/formularios-dinamicos/{formulario_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -596,15 +1073,23 @@ def eliminar_formulario_dinamico(
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"])),
 ):
-    formulario = db.query(FormularioDinamico).filter(FormularioDinamico.id == formulario_id).first()
-    if not formulario:
-        raise HTTPException(status_code=404, detail="Formulario dinámico no encontrado.")
-    if formulario.estado_workflow == "aprobado" and formulario.activo:
+    # DELETE condicionado: campos y respuestas caen por ON DELETE CASCADE en la base de datos
+    eliminado = db.execute(
+        delete(FormularioDinamico)
+        .where(
+            FormularioDinamico.id == formulario_id,
+            ~and_(FormularioDinamico.estado_workflow == "aprobado", FormularioDinamico.activo.is_(True)),
+        )
+        .returning(FormularioDinamico.id)
+    ).scalar_one_or_none()
+    if not eliminado:
+        # Sólo en el camino de error se distingue "no existe" de "aprobada y activa"
+        if db.get(FormularioDinamico, formulario_id) is None:
+            raise HTTPException(status_code=404, detail="Formulario dinámico no encontrado.")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No se puede eliminar una plantilla aprobada activa. Márquela obsoleta.",
         )
-    db.delete(formulario)
     db.commit()
     return None
 
@@ -615,7 +1100,7 @@ def crear_nueva_version_formulario(
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"])),
 ):
-    actual = db.query(FormularioDinamico).filter(FormularioDinamico.id == formulario_id).first()
+    actual = db.get(FormularioDinamico, formulario_id)
     if not actual:
         raise HTTPException(status_code=404, detail="Formulario dinámico no encontrado.")
 
@@ -634,30 +1119,27 @@ def crear_nueva_version_formulario(
     db.add(nuevo)
     db.flush()
 
-    campos_actuales = db.query(CampoFormulario).filter(CampoFormulario.formulario_id == actual.id).order_by(CampoFormulario.orden.asc()).all()
-    for c in campos_actuales:
-        db.add(
-            CampoFormulario(
-                formulario_id=nuevo.id,
-                proceso_id=c.proceso_id,
-                nombre=c.nombre,
-                etiqueta=c.etiqueta,
-                tipo_campo=c.tipo_campo,
-                requerido=c.requerido,
-                opciones=c.opciones,
-                orden=c.orden,
-                activo=c.activo,
-                validaciones=c.validaciones,
-                seccion_iso=c.seccion_iso,
-                clausula_iso=c.clausula_iso,
-                subclausula_iso=c.subclausula_iso,
-                evidencia_requerida=c.evidencia_requerida,
+    # Copia de campos en el servidor (INSERT ... SELECT): sin cargar filas en Python ni un INSERT por campo.
+    # id y timestamps tienen default en Python, así que se generan en el propio SELECT
+    ahora = datetime.utcnow()
+    db.execute(
+        insert(CampoFormulario).from_select(
+            ["id", "creado_en", "actualizado_en", "formulario_id", *_COLUMNAS_CAMPO_CLONABLES],
+            select(
+                func.gen_random_uuid(),
+                literal(ahora, CampoFormulario.creado_en.type),
+                literal(ahora, CampoFormulario.actualizado_en.type),
+                literal(nuevo.id, CampoFormulario.formulario_id.type),
+                *(getattr(CampoFormulario, columna) for columna in _COLUMNAS_CAMPO_CLONABLES),
             )
+            .where(CampoFormulario.formulario_id == actual.id)
+            .order_by(CampoFormulario.orden.asc()),
         )
+    )
 
+    respuesta = FormularioDinamicoResponse.model_validate(nuevo)
     db.commit()
-    db.refresh(nuevo)
-    return nuevo
+    return respuesta
 
 
 @router.post("/formularios-dinamicos/{formulario_id}/aprobar", response_model=FormularioDinamicoResponse)
@@ -666,60 +1148,100 @@ def aprobar_formulario_dinamico(
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"])),
 ):
-    formulario = db.query(FormularioDinamico).filter(FormularioDinamico.id == formulario_id).first()
+    formulario = db.get(FormularioDinamico, formulario_id)
     if not formulario:
         raise HTTPException(status_code=404, detail="Formulario dinámico no encontrado.")
 
     _validar_formulario_iso_completo(db, formulario)
 
-    db.query(FormularioDinamico).filter(
-        FormularioDinamico.id != formulario.id,
-        FormularioDinamico.modulo == formulario.modulo,
-        FormularioDinamico.entidad_tipo == formulario.entidad_tipo,
-        FormularioDinamico.proceso_id == formulario.proceso_id,
-        FormularioDinamico.estado_workflow == "aprobado",
-        FormularioDinamico.activo.is_(True),
-    ).update(
-        {
-            "activo": False,
-            "estado_workflow": "obsoleto",
-            "vigente_hasta": datetime.utcnow(),
-        },
-        synchronize_session=False,
-    )
-
-    formulario.estado_workflow = "aprobado"
-    formulario.activo = True
-    formulario.aprobado_por = current_user.id
-    formulario.fecha_aprobacion = datetime.utcnow()
-    formulario.vigente_desde = datetime.utcnow()
-    formulario.vigente_hasta = None
+    # Primero se deja obsoleta la versión vigente y después se aprueba esta: el índice único parcial
+    # (una sola aprobada y activa por modulo, entidad_tipo, proceso_id) se verifica en cada sentencia.
+    # Un CTE no serviría: Postgres aplica los CTE de escritura no referenciados después del UPDATE principal
+    ahora = datetime.utcnow()
+    try:
+        db.execute(
+            update(FormularioDinamico)
+            .where(
+                FormularioDinamico.id != formulario.id,
+                FormularioDinamico.modulo == formulario.modulo,
+                FormularioDinamico.entidad_tipo == formulario.entidad_tipo,
+                FormularioDinamico.proceso_id == formulario.proceso_id,
+                FormularioDinamico.estado_workflow == "aprobado",
+                FormularioDinamico.activo.is_(True),
+            )
+            .values(activo=False, estado_workflow="obsoleto", vigente_hasta=ahora)
+            .execution_options(synchronize_session=False)
+        )
+        formulario = db.execute(
+            update(FormularioDinamico)
+            .where(FormularioDinamico.id == formulario.id)
+            .values(
+                estado_workflow="aprobado",
+                activo=True,
+                aprobado_por=current_user.id,
+                fecha_aprobacion=ahora,
+                vigente_desde=ahora,
+                vigente_hasta=None,
+            )
+            .returning(FormularioDinamico)
+            .execution_options(populate_existing=True)
+        ).scalar_one()
+    except IntegrityError as e:
+        db.rollback()
+        if _es_conflicto_aprobado_activo(e):
+            # Otra aprobación concurrente del mismo formulario ganó la carrera
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Otra versión de este formulario se aprobó al mismo tiempo. Intente de nuevo.",
+            )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Error de integridad al aprobar el formulario",
+        )
 
+    respuesta = FormularioDinamicoResponse.model_validate(formulario)
     db.commit()
-    db.refresh(formulario)
-    return formulario
+    return respuesta
 
 
 # =============================
 # Endpoints de Campos Formulario
 # =============================
 
-@router.get("/campos-formulario", response_model=List[CampoFormularioResponse])
+@router.get("/campos-formulario", response_model=List[CampoFormularioResponse], response_class=MsgspecJSONResponse)
 def listar_campos_formulario(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     formulario_id: UUID = None,
     proceso_id: UUID = None,
     activo: bool = None,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"])),
 ):
-    query = db.query(CampoFormulario)
+    if not formulario_id and not proceso_id:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Debe indicar formulario_id o proceso_id",
+        )
+    # Respuesta sin relaciones: cualquier lazy load es un N+1 accidental
+    stmt = select(CampoFormulario).options(*opciones_carga_estricta())
     if formulario_id:
-        query = query.filter(CampoFormulario.formulario_id == formulario_id)
+        stmt = stmt.where(CampoFormulario.formulario_id == formulario_id)
     if proceso_id:
-        query = query.filter(CampoFormulario.proceso_id == proceso_id)
+        stmt = stmt.where(CampoFormulario.proceso_id == proceso_id)
     if activo is not None:
-        query = query.filter(CampoFormulario.activo == activo)
-    return query.order_by(CampoFormulario.orden.asc(), CampoFormulario.creado_en.asc()).all()
+        stmt = stmt.where(CampoFormulario.activo == activo)
+    # Acotado al formulario o proceso pedido; X-Has-More avisa si quedó truncado
+    stmt = stmt.order_by(CampoFormulario.orden.asc(), CampoFormulario.creado_en.asc(), CampoFormulario.id.asc())
+    # Por lotes y directo a Structs, sin validar cada fila con Pydantic
+    filas, _ = convertir_a_structs(
+        db.execute(stmt.offset(skip).limit(limit + 1).execution_options(yield_per=LISTADO_YIELD_PER)).scalars(),
+        CampoFormularioStruct,
+    )
+    campos, has_more = recortar_pagina(filas, limit)
+    response.headers[HAS_MORE_HEADER] = "true" if has_more else "false"
+    return MsgspecJSONResponse(campos, headers=dict(response.headers))
 
 
 @router.post("/campos-formulario", response_model=CampoFormularioResponse, status_code=status.HTTP_201_CREATED)
@@ -732,7 +1254,7 @@ def crear_campo_formulario(
     if campo.seccion_iso and str(campo.seccion_iso).strip().lower() not in ISO_SECCIONES_VALIDAS:
         raise HTTPException(status_code=400, detail="seccion_iso no válida para marco ISO.")
     if campo.formulario_id:
-        formulario = db.query(FormularioDinamico).filter(FormularioDinamico.id == campo.formulario_id).first()
+        formulario = db.get(FormularioDinamico, campo.formulario_id)
         if not formulario:
             raise HTTPException(status_code=404, detail="Formulario dinámico no encontrado.")
         if formulario.estado_workflow == "aprobado" and formulario.activo:
@@ -747,9 +1269,11 @@ def crear_campo_formulario(
 
     nuevo_campo = CampoFormulario(**campo.model_dump())
     db.add(nuevo_campo)
+    db.flush()
+    # Defaults en Python: tras el flush la fila está completa y se serializa antes del commit
+    respuesta = CampoFormularioResponse.model_validate(nuevo_campo)
     db.commit()
-    db.refresh(nuevo_campo)
-    return nuevo_campo
+    return respuesta
 
 
 @router.put("/campos-formulario/{campo_id}", response_model=CampoFormularioResponse)
@@ -759,35 +1283,38 @@ def actualizar_campo_formulario(
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"])),
 ):
-    campo = db.query(CampoFormulario).filter(CampoFormulario.id == campo_id).first()
+    campo = db.get(CampoFormulario, campo_id)
     if not campo:
         raise HTTPException(status_code=404, detail="Campo no encontrado.")
-    if campo.formulario_id:
-        formulario_campo = db.query(FormularioDinamico).filter(FormularioDinamico.id == campo.formulario_id).first()
-        if formulario_campo and formulario_campo.estado_workflow == "aprobado" and formulario_campo.activo:
-            raise HTTPException(status_code=400, detail="No puede editar campos en una plantilla aprobada activa.")
+    formulario = db.get(FormularioDinamico, campo.formulario_id) if campo.formulario_id else None
+    if formulario and formulario.estado_workflow == "aprobado" and formulario.activo:
+        raise HTTPException(status_code=400, detail="No puede editar campos en una plantilla aprobada activa.")
 
     update_data = campo_update.model_dump(exclude_unset=True)
-    tipo_objetivo = update_data.get("tipo_campo", campo.tipo_campo)
-    opciones_objetivo = update_data.get("opciones", campo.opciones)
-    _validar_tipo_campo_con_opciones(tipo_objetivo, opciones_objetivo)
-
-    for field, value in update_data.items():
-        setattr(campo, field, value)
+    # El campo guardado ya cumplía la regla: sólo se revalida si cambia el tipo o las opciones
+    if "tipo_campo" in update_data or "opciones" in update_data:
+        _validar_tipo_campo_con_opciones(
+            update_data.get("tipo_campo", campo.tipo_campo),
+            update_data.get("opciones", campo.opciones),
+        )
 
-    if campo.formulario_id:
-        formulario = db.query(FormularioDinamico).filter(FormularioDinamico.id == campo.formulario_id).first()
-        if formulario and _es_formulario_iso_auditoria(formulario):
-            nombre = str(campo.nombre).strip().lower()
-            if nombre in ISO_AUDITORIA_CAMPOS_REQUERIDOS and not campo.requerido:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"El campo ISO obligatorio '{nombre}' debe mantenerse como requerido.",
-                )
+    # La regla ISO se evalúa sobre el estado resultante, antes del UPDATE
+    formulario_id = update_data.get("formulario_id", campo.formulario_id)
+    if formulario_id != campo.formulario_id:
+        # Sólo si el campo cambia de formulario hace falta leer el de destino
+        formulario = db.get(FormularioDinamico, formulario_id) if formulario_id else None
+    if formulario and _es_formulario_iso_auditoria(formulario):
+        nombre = str(update_data.get("nombre", campo.nombre)).strip().lower()
+        if nombre in ISO_AUDITORIA_CAMPOS_REQUERIDOS and not update_data.get("requerido", campo.requerido):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El campo ISO obligatorio '{nombre}' debe mantenerse como requerido.",
+            )
 
+    campo = BaseRepository(db, CampoFormulario).update_returning(campo_id, update_data, only_active=False)
+    respuesta = CampoFormularioResponse.model_validate(campo)
     db.commit()
-    db.refresh(campo)
-    return campo
+    return respuesta
 
 
 @router.delete("/campos-formulario/{campo_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -796,11 +1323,11 @@ def eliminar_campo_formulario(
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"])),
 ):
-    campo = db.query(CampoFormulario).filter(CampoFormulario.id == campo_id).first()
+    campo = db.get(CampoFormulario, campo_id)
     if not campo:
         raise HTTPException(status_code=404, detail="Campo no encontrado.")
     if campo.formulario_id:
-        formulario = db.query(FormularioDinamico).filter(FormularioDinamico.id == campo.formulario_id).first()
+        formulario = db.get(FormularioDinamico, campo.formulario_id)
         if formulario and formulario.estado_workflow == "aprobado" and formulario.activo:
             raise HTTPException(status_code=400, detail="No puede eliminar campos en una plantilla aprobada activa.")
         if formulario and _es_formulario_iso_auditoria(formulario):
@@ -813,7 +1340,8 @@ def eliminar_campo_formulario(
                         "Desactive el formulario o reemplácelo por equivalente."
                     ),
                 )
-    db.delete(campo)
+    # DELETE directo: las respuestas del campo caen por ON DELETE CASCADE sin cargarlas en la sesión
+    db.execute(delete(CampoFormulario).where(CampoFormulario.id == campo_id))
     db.commit()
     return None
 
@@ -822,73 +1350,146 @@ def eliminar_campo_formulario(
 # Endpoints de Respuestas Formulario
 # ================================
 
-@router.get("/respuestas-formulario", response_model=List[RespuestaFormularioResponse])
+@router.get(
+    "/respuestas-formulario",
+    response_model=List[RespuestaFormularioResponse],
+    response_class=MsgspecJSONResponse,
+)
 def listar_respuestas_formulario(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     auditoria_id: UUID = None,
     instancia_proceso_id: UUID = None,
     campo_formulario_id: UUID = None,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"])),
 ):
-    query = db.query(RespuestaFormulario)
+    # Respuesta sin relaciones: cualquier lazy load es un N+1 accidental
+    stmt = select(RespuestaFormulario).options(*opciones_carga_estricta())
     if auditoria_id:
-        query = query.filter(RespuestaFormulario.auditoria_id == auditoria_id)
+        stmt = stmt.where(RespuestaFormulario.auditoria_id == auditoria_id)
     if instancia_proceso_id:
-        query = query.filter(RespuestaFormulario.instancia_proceso_id == instancia_proceso_id)
+        stmt = stmt.where(RespuestaFormulario.instancia_proceso_id == instancia_proceso_id)
     if campo_formulario_id:
-        query = query.filter(RespuestaFormulario.campo_formulario_id == campo_formulario_id)
-    return query.order_by(RespuestaFormulario.creado_en.asc()).all()
+        stmt = stmt.where(RespuestaFormulario.campo_formulario_id == campo_formulario_id)
+    stmt = stmt.order_by(RespuestaFormulario.creado_en.asc(), RespuestaFormulario.id.asc())
+    filas, _ = convertir_a_structs(
+        db.execute(stmt.offset(skip).limit(limit + 1).execution_options(yield_per=LISTADO_YIELD_PER)).scalars(),
+        RespuestaFormularioStruct,
+    )
+    respuestas, has_more = recortar_pagina(filas, limit)
+    response.headers[HAS_MORE_HEADER] = "true" if has_more else "false"
+    return MsgspecJSONResponse(respuestas, headers=dict(response.headers))
+
+
+def _reglas_de_campos(db: Session, campo_ids) -> dict:
+    """
+    Columnas de CampoFormulario que validan una respuesta, indexadas por id.
+
+    Sólo etiqueta/requerido/evidencia_requerida: sin hidratar ni guardar en sesión las entidades.
+    """
+    filas = db.execute(
+        select(
+            CampoFormulario.id,
+            CampoFormulario.etiqueta,
+            CampoFormulario.requerido,
+            CampoFormulario.evidencia_requerida,
+        ).where(CampoFormulario.id.in_(campo_ids))
+    ).all()
+    return {fila.id: fila for fila in filas}
 
 
-@router.post("/respuestas-formulario", response_model=RespuestaFormularioResponse, status_code=status.HTTP_201_CREATED)
-def crear_respuesta_formulario(
-    respuesta: RespuestaFormularioCreate,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"])),
-):
-    if not respuesta.auditoria_id and not respuesta.instancia_proceso_id:
+def _preparar_respuesta(respuesta: RespuestaFormularioCreate, campo, current_user: Usuario) -> dict:
+    """Valida una respuesta contra las reglas de su campo y devuelve los valores a insertar"""
+    # Un único model_dump: validación y armado del INSERT leen del dict, no del modelo Pydantic
+    payload = respuesta.model_dump()
+    if not payload["auditoria_id"] and not payload["instancia_proceso_id"]:
         raise HTTPException(
             status_code=400,
             detail="Debe enviar auditoria_id o instancia_proceso_id para registrar la respuesta.",
         )
-
-    campo = db.query(CampoFormulario).filter(CampoFormulario.id == respuesta.campo_formulario_id).first()
     if not campo:
         raise HTTPException(status_code=404, detail="Campo de formulario no encontrado.")
 
-    if campo.requerido and not (respuesta.valor and str(respuesta.valor).strip()):
+    valor = payload.get("valor")
+    archivo = payload.get("archivo_adjunto")
+    if campo.requerido and not (valor and str(valor).strip()):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"El campo '{campo.etiqueta}' es obligatorio.",
         )
-    if campo.evidencia_requerida and not (respuesta.archivo_adjunto and str(respuesta.archivo_adjunto).strip()):
+    if campo.evidencia_requerida and not (archivo and str(archivo).strip()):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"El campo '{campo.etiqueta}' requiere evidencia adjunta.",
         )
 
-    payload = respuesta.model_dump()
     if not payload.get("usuario_respuesta_id"):
         payload["usuario_respuesta_id"] = current_user.id
-    if payload.get("archivo_adjunto"):
-        hash_input = json.dumps(
-            {
-                "campo": str(respuesta.campo_formulario_id),
-                "auditoria": str(respuesta.auditoria_id) if respuesta.auditoria_id else None,
-                "archivo": payload.get("archivo_adjunto"),
-                "valor": payload.get("valor"),
-            },
-            sort_keys=True,
-        )
-        payload["evidencia_hash"] = hashlib.sha256(hash_input.encode("utf-8")).hexdigest()
+    if archivo:
+        payload["evidencia_hash"] = _hash_evidencia(
+            payload["campo_formulario_id"],
+            payload["auditoria_id"],
+            archivo,
+            valor,
+        )
         payload["evidencia_fecha"] = datetime.utcnow()
         payload["evidencia_usuario_id"] = current_user.id
+    return payload
+
+
+@router.post("/respuestas-formulario", response_model=RespuestaFormularioResponse, status_code=status.HTTP_201_CREATED)
+def crear_respuesta_formulario(
+    respuesta: RespuestaFormularioCreate,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"])),
+):
+    campos = _reglas_de_campos(db, [respuesta.campo_formulario_id])
+    payload = _preparar_respuesta(respuesta, campos.get(respuesta.campo_formulario_id), current_user)
 
     nueva_respuesta = RespuestaFormulario(**payload)
     db.add(nueva_respuesta)
+    db.flush()
+    # Se construye antes del commit (expire_on_commit) para no releer la fila
+    resultado = RespuestaFormularioResponse.model_validate(nueva_respuesta)
     db.commit()
-    db.refresh(nueva_respuesta)
-    return nueva_respuesta
+    return resultado
+
+
+@router.post(
+    "/respuestas-formulario/bulk",
+    response_model=List[RespuestaFormularioResponse],
+    status_code=status.HTTP_201_CREATED,
+)
+def crear_respuestas_formulario_bulk(
+    respuestas: List[RespuestaFormularioCreate] = Body(..., max_length=1000),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"])),
+):
+    """Registrar las respuestas de un formulario completo: un SELECT de campos, un INSERT y un commit"""
+    if not respuestas:
+        return []
+
+    # Todo o nada: la primera respuesta inválida rechaza el lote antes de escribir
+    campos = _reglas_de_campos(db, {r.campo_formulario_id for r in respuestas})
+    filas = [_preparar_respuesta(r, campos.get(r.campo_formulario_id), current_user) for r in respuestas]
+    try:
+        nuevas = db.scalars(
+            insert(RespuestaFormulario).returning(RespuestaFormulario, sort_by_parameter_order=True),
+            filas,
+        ).all()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Error de integridad al registrar las respuestas (auditoría o instancia inexistente)",
+        )
+
+    # Se construye antes del commit (expire_on_commit) para no releer cada fila
+    resultado = [RespuestaFormularioResponse.model_validate(r) for r in nuevas]
+    db.commit()
+    return resultado
 
 
 @router.put("/respuestas-formulario/{respuesta_id}", response_model=RespuestaFormularioResponse)
@@ -898,12 +1499,12 @@ def actualizar_respuesta_formulario(
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["sistema.config", "sistema.admin"])),
 ):
-    respuesta = db.query(RespuestaFormulario).filter(RespuestaFormulario.id == respuesta_id).first()
+    respuesta = db.get(RespuestaFormulario, respuesta_id)
     if not respuesta:
         raise HTTPException(status_code=404, detail="Respuesta no encontrada.")
 
     update_data = respuesta_update.model_dump(exclude_unset=True)
-    campo = db.query(CampoFormulario).filter(CampoFormulario.id == respuesta.campo_formulario_id).first()
+    campo = db.get(CampoFormulario, respuesta.campo_formulario_id)
     if campo and campo.requerido:
         valor_objetivo = update_data.get("valor", respuesta.valor)
         if not (valor_objetivo and str(valor_objetivo).strip()):
@@ -916,22 +1517,16 @@ def actualizar_respuesta_formulario(
     if "usuario_respuesta_id" not in update_data:
         update_data["usuario_respuesta_id"] = current_user.id
     if update_data.get("archivo_adjunto"):
-        hash_input = json.dumps(
-            {
-                "campo": str(respuesta.campo_formulario_id),
-                "auditoria": str(respuesta.auditoria_id) if respuesta.auditoria_id else None,
-                "archivo": update_data.get("archivo_adjunto"),
-                "valor": update_data.get("valor", respuesta.valor),
-            },
-            sort_keys=True,
-        )
-        update_data["evidencia_hash"] = hashlib.sha256(hash_input.encode("utf-8")).hexdigest()
+        update_data["evidencia_hash"] = _hash_evidencia(
+            respuesta.campo_formulario_id,
+            respuesta.auditoria_id,
+            update_data.get("archivo_adjunto"),
+            update_data.get("valor", respuesta.valor),
+        )
         update_data["evidencia_fecha"] = datetime.utcnow()
         update_data["evidencia_usuario_id"] = current_user.id
 
-    for field, value in update_data.items():
-        setattr(respuesta, field, value)
-
+    respuesta = BaseRepository(db, RespuestaFormulario).update_returning(respuesta_id, update_data, only_active=False)
+    resultado = RespuestaFormularioResponse.model_validate(respuesta)
     db.commit()
-    db.refresh(respuesta)
-    return respuesta
+    return resultado
@@ -1,16 +1,29 @@
 """
 API endpoints para Tickets
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+import logging
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, status, Query
+from sqlalchemy import or_, select, true, tuple_
+from sqlalchemy.orm import Session, joinedload
+from typing import List, Optional
 from uuid import UUID
 
-from ..database import get_db
+from ..database import SessionLocal, get_db
+from ..models.documento import Documento
+from ..models.sistema import Asignacion
 from ..models.ticket import Ticket, EstadoTicket
-from ..models.usuario import Usuario
-from ..schemas.ticket import TicketCreate, TicketUpdate, TicketResponse, TicketResolver, TicketDecision
+from ..models.usuario import Area, Usuario
+from ..repositories.base import BaseRepository
+from ..schemas.ticket import TicketCreate, TicketUpdate, TicketResponse, TicketResolver, TicketDecision, TicketStruct
 from ..api.dependencies import require_any_permission
+from ..utils.responses import MsgspecJSONResponse, convertir_a_structs
+from ..utils.pagination import (
+    codificar_cursor_fecha,
+    decodificar_cursor_fecha,
+    establecer_siguiente_cursor,
+    recortar_pagina,
+)
 from ..utils.notification_service import (
     crear_notificacion_asignacion,
     crear_notificacion_ticket_resuelto,
@@ -18,8 +31,40 @@ from ..utils.notification_service import (
 )
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+# Cualquier usuario con algún permiso operativo usa la mesa de ayuda: una sola dependencia
+# compartida por todas las rutas (los alias se expanden una vez)
+_acceso_tickets = require_any_permission([
+    "documentos.ver", "documentos.crear", "documentos.revisar", "documentos.aprobar", "documentos.anular",
+    "calidad.ver",
+    "auditorias.ver", "auditorias.planificar", "auditorias.ejecutar",
+    "riesgos.identificar", "riesgos.ver", "riesgos.gestion",
+    "capacitaciones.gestion",
+    "usuarios.ver", "usuarios.gestion",
+    "noconformidades.reportar", "noconformidades.gestion", "noconformidades.cerrar",
+    "procesos.admin",
+    "sistema.config", "sistema.admin",
+])
+
+
+def _notificar(crear_notificacion, **datos) -> None:
+    """Registra una notificación con una sesión propia, después de enviar la respuesta"""
+    db = SessionLocal()
+    try:
+        crear_notificacion(db=db, **datos)
+    except Exception:
+        db.rollback()
+        logger.exception(
+            "Error registrando notificación de ticket",
+            extra={"referencia_id": str(datos.get("referencia_id"))},
+        )
+    finally:
+        db.close()
+
+
 def _inferir_prioridad(categoria: str, titulo: str, descripcion: str) -> str:
     """
     Prioridad automática basada en tipo de solicitud y señales de urgencia.
@@ -52,8 +97,9 @@ def _inferir_prioridad(categoria: str, titulo: str, descripcion: str) -> str:
 @router.post("/", response_model=TicketResponse, status_code=status.HTTP_201_CREATED)
 def create_ticket(
     ticket: TicketCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(require_any_permission(["documentos.ver","documentos.crear","documentos.revisar","documentos.aprobar","documentos.anular","calidad.ver","auditorias.ver","auditorias.planificar","auditorias.ejecutar","riesgos.identificar","riesgos.ver","riesgos.gestion","capacitaciones.gestion","usuarios.ver","usuarios.gestion","noconformidades.reportar","noconformidades.gestion","noconformidades.cerrar","procesos.admin","sistema.config","sistema.admin"]))
+    current_user: Usuario = Depends(_acceso_tickets)
 ):
     """Crear un nuevo ticket"""
     if not ticket.area_destino_id:
@@ -62,39 +108,41 @@ def create_ticket(
             detail="Debe seleccionar un área destino para crear el ticket"
         )
 
-    # Validar que el área destino existe si se proporciona
-    from ..models.usuario import Area
-    from ..models.sistema import Asignacion
-    area = db.query(Area).filter(Area.id == ticket.area_destino_id).first()
-    if not area:
+    # Existencia de área y documento y responsable del área en un único SELECT (un round-trip
+    # antes del INSERT). EXISTS se resuelve en el índice de la PK sin hidratar filas; el
+    # responsable es el principal o, si no hay, cualquier otro asignado
+    documento_existe = (
+        select(Documento.id).where(Documento.id == ticket.documento_publico_id).exists()
+        if ticket.documento_publico_id
+        else true()
+    )
+    verificacion = db.execute(
+        select(
+            select(Area.id).where(Area.id == ticket.area_destino_id).exists().label("area_existe"),
+            documento_existe.label("documento_existe"),
+            select(Asignacion.usuario_id)
+            .where(Asignacion.area_id == ticket.area_destino_id)
+            .order_by(Asignacion.es_principal.desc())
+            .limit(1)
+            .scalar_subquery()
+            .label("asignado_a"),
+        )
+    ).one()
+
+    if not verificacion.area_existe:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Área destino no encontrada"
         )
     
     # Validar documento público si se proporciona
-    if ticket.documento_publico_id:
-        from ..models.documento import Documento
-        documento = db.query(Documento).filter(Documento.id == ticket.documento_publico_id).first()
-        if not documento:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Documento público no encontrado"
-            )
+    if not verificacion.documento_existe:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Documento público no encontrado"
+        )
     
-    asignado_a = None
-    principal = db.query(Asignacion).filter(
-        Asignacion.area_id == ticket.area_destino_id,
-        Asignacion.es_principal == True
-    ).first()
-    if principal:
-        asignado_a = principal.usuario_id
-    else:
-        alterno = db.query(Asignacion).filter(
-            Asignacion.area_id == ticket.area_destino_id
-        ).first()
-        if alterno:
-            asignado_a = alterno.usuario_id
+    asignado_a = verificacion.asignado_a
 
     if not asignado_a:
         raise HTTPException(
@@ -120,34 +168,40 @@ def create_ticket(
         archivo_adjunto_url=ticket.archivo_adjunto_url,
     )
     db.add(new_ticket)
+    db.flush()
+    # Defaults en Python: tras el flush la fila está completa y se serializa antes del commit (sin refresh)
+    respuesta = TicketResponse.model_validate(new_ticket)
     db.commit()
-    db.refresh(new_ticket)
 
     # Notificar al responsable de área cuando aplica
     if asignado_a:
-        crear_notificacion_asignacion(
-            db=db,
+        background_tasks.add_task(
+            _notificar,
+            crear_notificacion_asignacion,
             usuario_id=asignado_a,
             titulo="Nueva solicitud de documento",
-            mensaje=f"Se ha creado una solicitud pendiente para: {new_ticket.titulo}",
+            mensaje=f"Se ha creado una solicitud pendiente para: {respuesta.titulo}",
             referencia_tipo="ticket",
-            referencia_id=new_ticket.id
+            referencia_id=respuesta.id
         )
-    return new_ticket
+    return respuesta
+
 
+# Filas que el ORM materializa por lote al recorrer el listado
+LISTADO_YIELD_PER = 64
 
-@router.get("/", response_model=List[TicketResponse])
+
+@router.get("/", response_model=List[TicketResponse], response_class=MsgspecJSONResponse)
 def list_tickets(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
     estado: str = None,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(require_any_permission(["documentos.ver","documentos.crear","documentos.revisar","documentos.aprobar","documentos.anular","calidad.ver","auditorias.ver","auditorias.planificar","auditorias.ejecutar","riesgos.identificar","riesgos.ver","riesgos.gestion","capacitaciones.gestion","usuarios.ver","usuarios.gestion","noconformidades.reportar","noconformidades.gestion","noconformidades.cerrar","procesos.admin","sistema.config","sistema.admin"]))
+    current_user: Usuario = Depends(_acceso_tickets)
 ):
     """Listar tickets según el rol y área del usuario"""
-    from sqlalchemy import or_
-    from sqlalchemy.orm import joinedload
-    
     # Construir query base con eager loading de relaciones
     query = db.query(Ticket).options(
         joinedload(Ticket.solicitante),
@@ -178,22 +232,31 @@ def list_tickets(
     if estado:
         query = query.filter(Ticket.estado == estado)
     
-    # Ordenar por fecha de creación descendente
-    query = query.order_by(Ticket.creado_en.desc())
-    
-    tickets = query.offset(skip).limit(limit).all()
-    return tickets
+    # Ordenar por fecha de creación descendente (id desempata para el cursor)
+    query = query.order_by(Ticket.creado_en.desc(), Ticket.id.desc())
+    # Por lotes y directo a Structs: no se acumulan entidades ORM ni modelos Pydantic
+    query = query.execution_options(yield_per=LISTADO_YIELD_PER)
+    if cursor:
+        # Keyset sobre (creado_en, id) en lugar de OFFSET (ignora skip)
+        query = query.filter(tuple_(Ticket.creado_en, Ticket.id) < decodificar_cursor_fecha(cursor))
+    else:
+        query = query.offset(skip)
+
+    filas, _ = convertir_a_structs(query.limit(limit + 1), TicketStruct)
+    tickets, has_more = recortar_pagina(filas, limit)
+    establecer_siguiente_cursor(
+        response, tickets, has_more, lambda t: codificar_cursor_fecha(t.creado_en, t.id)
+    )
+    return MsgspecJSONResponse(tickets, headers=dict(response.headers))
 
 
 @router.get("/{ticket_id}", response_model=TicketResponse)
 def get_ticket(
     ticket_id: UUID,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(require_any_permission(["documentos.ver","documentos.crear","documentos.revisar","documentos.aprobar","documentos.anular","calidad.ver","auditorias.ver","auditorias.planificar","auditorias.ejecutar","riesgos.identificar","riesgos.ver","riesgos.gestion","capacitaciones.gestion","usuarios.ver","usuarios.gestion","noconformidades.reportar","noconformidades.gestion","noconformidades.cerrar","procesos.admin","sistema.config","sistema.admin"]))
+    current_user: Usuario = Depends(_acceso_tickets)
 ):
     """Obtener un ticket por ID"""
-    from sqlalchemy.orm import joinedload
-    
     ticket = db.query(Ticket).options(
         joinedload(Ticket.solicitante),
         joinedload(Ticket.asignado)
@@ -221,57 +284,64 @@ def get_ticket(
 def update_ticket(
     ticket_id: UUID,
     ticket_update: TicketUpdate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(require_any_permission(["documentos.ver","documentos.crear","documentos.revisar","documentos.aprobar","documentos.anular","calidad.ver","auditorias.ver","auditorias.planificar","auditorias.ejecutar","riesgos.identificar","riesgos.ver","riesgos.gestion","capacitaciones.gestion","usuarios.ver","usuarios.gestion","noconformidades.reportar","noconformidades.gestion","noconformidades.cerrar","procesos.admin","sistema.config","sistema.admin"]))
+    current_user: Usuario = Depends(_acceso_tickets)
 ):
     """Actualizar un ticket"""
-    ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
-    if not ticket:
+    # Sólo lo que se necesita antes de escribir: asignación previa y datos para la prioridad
+    actual = db.execute(
+        select(Ticket.asignado_a, Ticket.categoria, Ticket.titulo, Ticket.descripcion)
+        .where(Ticket.id == ticket_id)
+    ).one_or_none()
+    if not actual:
         raise HTTPException(status_code=404, detail="Ticket no encontrado")
     
     # Verificar si cambió la asignación
-    previous_asignado_a = ticket.asignado_a
+    previous_asignado_a = actual.asignado_a
     
     payload = ticket_update.model_dump(exclude_unset=True)
 
     # Actualizar campos (excepto prioridad, se calcula automáticamente)
     payload.pop("prioridad", None)
 
-    for key, value in payload.items():
-        if hasattr(ticket, key) and value is not None:
-            setattr(ticket, key, value)
+    valores = {key: value for key, value in payload.items() if value is not None}
 
     # Recalcular prioridad si cambió información relevante
     if any(k in payload for k in ["categoria", "titulo", "descripcion"]):
-        ticket.prioridad = _inferir_prioridad(
-            ticket.categoria or "soporte",
-            ticket.titulo or "",
-            ticket.descripcion or "",
+        valores["prioridad"] = _inferir_prioridad(
+            valores.get("categoria", actual.categoria) or "soporte",
+            valores.get("titulo", actual.titulo) or "",
+            valores.get("descripcion", actual.descripcion) or "",
         )
-            
+
+    # UPDATE ... RETURNING: la fila actualizada sin SELECT posterior (refresh)
+    ticket = BaseRepository(db, Ticket).update_returning(ticket_id, valores, only_active=False)
+    respuesta = TicketResponse.model_validate(ticket)
     db.commit()
-    db.refresh(ticket)
     
     # Enviar notificación si hubo nueva asignación
-    if ticket.asignado_a and ticket.asignado_a != previous_asignado_a:
-        crear_notificacion_asignacion(
-            db=db,
-            usuario_id=ticket.asignado_a,
+    if respuesta.asignado_a and respuesta.asignado_a != previous_asignado_a:
+        background_tasks.add_task(
+            _notificar,
+            crear_notificacion_asignacion,
+            usuario_id=respuesta.asignado_a,
             titulo="Nuevo Ticket Asignado",
-            mensaje=f"Se te ha asignado el ticket: {ticket.titulo}",
+            mensaje=f"Se te ha asignado el ticket: {respuesta.titulo}",
             referencia_tipo="ticket",
-            referencia_id=ticket.id
+            referencia_id=respuesta.id
         )
         
-    return ticket
+    return respuesta
 
 
 @router.post("/{ticket_id}/resolver", response_model=TicketResponse)
 def resolver_ticket(
     ticket_id: UUID,
     resolucion: TicketResolver,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(require_any_permission(["documentos.ver","documentos.crear","documentos.revisar","documentos.aprobar","documentos.anular","calidad.ver","auditorias.ver","auditorias.planificar","auditorias.ejecutar","riesgos.identificar","riesgos.ver","riesgos.gestion","capacitaciones.gestion","usuarios.ver","usuarios.gestion","noconformidades.reportar","noconformidades.gestion","noconformidades.cerrar","procesos.admin","sistema.config","sistema.admin"]))
+    current_user: Usuario = Depends(_acceso_tickets)
 ):
     """Resolver un ticket"""
     ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
@@ -304,26 +374,29 @@ def resolver_ticket(
     if resolucion.satisfaccion_cliente:
         ticket.satisfaccion_cliente = resolucion.satisfaccion_cliente
             
+    db.flush()
+    respuesta = TicketResponse.model_validate(ticket)
     db.commit()
-    db.refresh(ticket)
     
     # Notificar al solicitante
-    crear_notificacion_ticket_resuelto(
-        db=db,
-        usuario_id=ticket.solicitante_id,
-        titulo_ticket=ticket.titulo,
-        referencia_id=ticket.id
+    background_tasks.add_task(
+        _notificar,
+        crear_notificacion_ticket_resuelto,
+        usuario_id=respuesta.solicitante_id,
+        titulo_ticket=respuesta.titulo,
+        referencia_id=respuesta.id
     )
     
-    return ticket
+    return respuesta
 
 
 @router.post("/{ticket_id}/aprobar", response_model=TicketResponse)
 def aprobar_ticket(
     ticket_id: UUID,
     decision: TicketDecision,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(require_any_permission(["documentos.ver","documentos.crear","documentos.revisar","documentos.aprobar","documentos.anular","calidad.ver","auditorias.ver","auditorias.planificar","auditorias.ejecutar","riesgos.identificar","riesgos.ver","riesgos.gestion","capacitaciones.gestion","usuarios.ver","usuarios.gestion","noconformidades.reportar","noconformidades.gestion","noconformidades.cerrar","procesos.admin","sistema.config","sistema.admin"]))
+    current_user: Usuario = Depends(_acceso_tickets)
 ):
     """Aprobar solicitud de ticket (flujo de documentos públicos)"""
     ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
@@ -340,26 +413,29 @@ def aprobar_ticket(
     ticket.estado = EstadoTicket.APROBADO.value
     ticket.solucion = decision.comentario or "Solicitud aprobada"
     ticket.fecha_resolucion = datetime.now()
+    db.flush()
+    respuesta = TicketResponse.model_validate(ticket)
     db.commit()
-    db.refresh(ticket)
 
-    crear_notificacion_resultado_solicitud(
-        db=db,
-        usuario_id=ticket.solicitante_id,
-        titulo_ticket=ticket.titulo,
+    background_tasks.add_task(
+        _notificar,
+        crear_notificacion_resultado_solicitud,
+        usuario_id=respuesta.solicitante_id,
+        titulo_ticket=respuesta.titulo,
         estado=EstadoTicket.APROBADO.value,
-        referencia_id=ticket.id,
+        referencia_id=respuesta.id,
         comentario=decision.comentario,
     )
-    return ticket
+    return respuesta
 
 
 @router.post("/{ticket_id}/declinar", response_model=TicketResponse)
 def declinar_ticket(
     ticket_id: UUID,
     decision: TicketDecision,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(require_any_permission(["documentos.ver","documentos.crear","documentos.revisar","documentos.aprobar","documentos.anular","calidad.ver","auditorias.ver","auditorias.planificar","auditorias.ejecutar","riesgos.identificar","riesgos.ver","riesgos.gestion","capacitaciones.gestion","usuarios.ver","usuarios.gestion","noconformidades.reportar","noconformidades.gestion","noconformidades.cerrar","procesos.admin","sistema.config","sistema.admin"]))
+    current_user: Usuario = Depends(_acceso_tickets)
 ):
     """Declinar solicitud de ticket (flujo de documentos públicos)"""
     ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
@@ -376,15 +452,17 @@ def declinar_ticket(
     ticket.estado = EstadoTicket.DECLINADO.value
     ticket.solucion = decision.comentario or "Solicitud declinada"
     ticket.fecha_resolucion = datetime.now()
+    db.flush()
+    respuesta = TicketResponse.model_validate(ticket)
     db.commit()
-    db.refresh(ticket)
 
-    crear_notificacion_resultado_solicitud(
-        db=db,
-        usuario_id=ticket.solicitante_id,
-        titulo_ticket=ticket.titulo,
+    background_tasks.add_task(
+        _notificar,
+        crear_notificacion_resultado_solicitud,
+        usuario_id=respuesta.solicitante_id,
+        titulo_ticket=respuesta.titulo,
         estado=EstadoTicket.DECLINADO.value,
-        referencia_id=ticket.id,
+        referencia_id=respuesta.id,
         comentario=decision.comentario,
     )
-    return ticket
+    return respuesta
@@ -3,7 +3,7 @@ from typing import Optional
 import uuid
 import mimetypes
 from ..utils.supabase_client import upload_file_bytes
-from .dependencies import require_any_permission
+from .dependencies import require_any_permission, get_permission_codes
 from ..models.usuario import Usuario
 
 router = APIRouter(
@@ -77,23 +77,8 @@ async def upload_logo(
     """
     Sube el logo del sistema (solo admin).
     """
-    # Verificar permisos por codigo (no por nombre visible)
-    permisos_usuario = set()
-    try:
-        permisos_usuario = set(getattr(current_user, "permisos_codes", []) or [])
-    except Exception:
-        permisos_usuario = set()
-
-    if not permisos_usuario:
-        for usuario_rol in getattr(current_user, "roles", []) or []:
-            rol = getattr(usuario_rol, "rol", None)
-            if not rol:
-                continue
-            for rol_permiso in getattr(rol, "permisos", []) or []:
-                permiso = getattr(rol_permiso, "permiso", None)
-                codigo = getattr(permiso, "codigo", None)
-                if codigo:
-                    permisos_usuario.add(str(codigo))
+    # Verificar permisos por codigo (no por nombre visible), precalculados en get_current_user
+    permisos_usuario = get_permission_codes(current_user)
     
     # Lista de permisos que permiten subir el logo del sistema
     permisos_permitidos = [
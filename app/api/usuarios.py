@@ -1,7 +1,7 @@
 """
 Endpoints CRUD para gestión de usuarios
 """
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, Query
 from sqlalchemy.orm import Session
 from typing import List
 from uuid import UUID
@@ -23,7 +23,7 @@ from ..schemas.usuario import (
     RolPermisoCreate
 )
 from passlib.context import CryptContext
-from ..api.dependencies import get_current_user, require_any_permission, user_has_any_permission
+from ..api.dependencies import get_current_user, invalidar_cache_usuarios, require_any_permission, user_has_any_permission
 
 router = APIRouter(prefix="/api/v1", tags=["usuarios"])
 
@@ -42,17 +42,18 @@ def hash_password(password: str) -> str:
 
 @router.get("/areas", response_model=List[AreaResponse])
 def listar_areas(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["areas.gestionar", "usuarios.gestion", "sistema.admin"]))
 ):
     """Listar todas las áreas con sus responsables asignados"""
-    from sqlalchemy.orm import joinedload
+    from sqlalchemy.orm import joinedload, selectinload
     from ..models.sistema import Asignacion
     
+    # selectinload evita que el JOIN de la colección multiplique filas y rompa el LIMIT
     areas = db.query(Area).options(
-        joinedload(Area.asignaciones).joinedload(Asignacion.usuario)
+        selectinload(Area.asignaciones).joinedload(Asignacion.usuario)
     ).offset(skip).limit(limit).all()
     return areas
 
@@ -117,6 +118,7 @@ def actualizar_area(
         setattr(area, field, value)
     
     db.commit()
+    invalidar_cache_usuarios()
     db.refresh(area)
     return area
 
@@ -171,6 +173,7 @@ def eliminar_area(
         # Eliminar el área
         db.delete(area)
         db.commit()
+        invalidar_cache_usuarios()
         return None
         
     except HTTPException:
@@ -191,8 +194,8 @@ def eliminar_area(
 
 @router.get("/roles", response_model=List[RolResponse])
 def listar_roles(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["usuarios.gestion", "sistema.admin"]))
 ):
@@ -264,6 +267,7 @@ def actualizar_rol(
         setattr(rol, field, value)
     
     db.commit()
+    invalidar_cache_usuarios()
     db.refresh(rol)
     return rol
 
@@ -298,6 +302,7 @@ def eliminar_rol(
         # Eliminar el rol
         db.delete(rol)
         db.commit()
+        invalidar_cache_usuarios()
         return None
         
     except HTTPException:
@@ -314,8 +319,8 @@ def eliminar_rol(
 
 @router.get("/permisos", response_model=List[PermisoResponse])
 def listar_permisos(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["usuarios.gestion", "sistema.admin"]))
 ):
@@ -352,6 +357,7 @@ def asignar_permisos_rol(
         db.add(nuevo_rol_permiso)
     
     db.commit()
+    invalidar_cache_usuarios()
     print(f"DEBUG: Guardado exitoso para rol {rol_id}")
     return {"message": "Permisos actualizados correctamente"}
 
@@ -362,8 +368,8 @@ def asignar_permisos_rol(
 
 @router.get("/usuarios", response_model=List[UsuarioWithArea])
 def listar_usuarios(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     activo: bool = None,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_any_permission(["usuarios.ver", "usuarios.gestion", "sistema.admin"]))
@@ -486,6 +492,7 @@ def actualizar_usuario(
         setattr(usuario, field, value)
     
     db.commit()
+    invalidar_cache_usuarios(usuario_id)
     db.refresh(usuario)
     return usuario
 
@@ -507,6 +514,7 @@ def eliminar_usuario(
     # Eliminación suave
     usuario.activo = False
     db.commit()
+    invalidar_cache_usuarios(usuario_id)
     return None
 
 
@@ -682,6 +690,7 @@ async def subir_foto_perfil(
             
             usuario.foto_url = url_or_error
             db.commit()
+            invalidar_cache_usuarios(usuario_id)
             db.refresh(usuario)
             
             return {"message": "Foto actualizada", "foto_url": url_or_error}
@@ -722,6 +731,7 @@ def eliminar_foto_perfil(
         
         usuario.foto_url = None
         db.commit()
+        invalidar_cache_usuarios(usuario_id)
         return {"message": "Foto eliminada"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -4,14 +4,25 @@ Configuración de la base de datos con SQLAlchemy
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from .config import settings
 
+# Con PgBouncer cada checkout abre un socket barato al proxy, que reparte pocas conexiones reales
+if settings.DB_USE_PGBOUNCER:
+    pool_kwargs = {"poolclass": NullPool}
+else:
+    pool_kwargs = {
+        "pool_pre_ping": True,  # Verificar conexión antes de usarla
+        "pool_size": settings.db_pool_size,        # Número de conexiones en el pool
+        "max_overflow": settings.db_max_overflow,  # Conexiones adicionales permitidas
+        "pool_recycle": settings.DB_POOL_RECYCLE,  # Renovar conexiones antiguas
+    }
+
 # Motor de base de datos
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,  # Verificar conexión antes de usarla
-    pool_size=10,        # Número de conexiones en el pool
-    max_overflow=20      # Conexiones adicionales permitidas
+    query_cache_size=settings.DB_QUERY_CACHE_SIZE,  # SQL compilado reutilizado entre requests
+    **pool_kwargs,
 )
 
 # Sesión local
@@ -1,6 +1,7 @@
 """
 Aplicación principal FastAPI
 """
+from anyio import to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .config import settings
@@ -25,6 +26,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Has-More", "X-Total-Count"],
 )
 
 # ... (omitted)
@@ -52,6 +54,9 @@ app.include_router(uploads.router)
 @app.on_event("startup")
 async def startup_event():
     """Evento que se ejecuta al iniciar la aplicación"""
+    # Los handlers y dependencias son síncronos: el límite de hilos de AnyIO se ajusta a las
+    # conexiones disponibles para que las ráfagas esperen en AnyIO y no en el checkout del pool
+    to_thread.current_default_thread_limiter().total_tokens = settings.threadpool_max_workers
     print(f"🚀 Iniciando {settings.APP_NAME} v{settings.APP_VERSION}")
     print(f"📝 Documentación disponible en: http://localhost:8000/docs")
     print(f"🌍 Entorno: {settings.ENVIRONMENT}")
@@ -3,7 +3,7 @@ Modelo de auditoría transversal de cambios CRUD.
 """
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, ForeignKey, Index
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from .base import BaseModel
 
@@ -22,6 +22,10 @@ class AuditLog(BaseModel):
         Index("idx_audit_log_tabla", "tabla"),
         Index("idx_audit_log_registro_id", "registro_id"),
         Index("idx_audit_log_fecha", "fecha"),
+        # Orden/keyset del listado (fecha DESC, id DESC), solo o combinado con los filtros más usados
+        Index("idx_audit_log_fecha_id_desc", text("fecha DESC"), text("id DESC")),
+        Index("idx_audit_log_usuario_fecha_id", "usuario_id", text("fecha DESC"), text("id DESC")),
+        Index("idx_audit_log_tabla_fecha_id", "tabla", text("fecha DESC"), text("id DESC")),
     )
 
     def __repr__(self):
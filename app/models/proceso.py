@@ -116,6 +116,13 @@ class InstanciaProceso(BaseModel):
     participantes = relationship("ParticipanteProceso", back_populates="instancia")
     respuestas_formularios = relationship("RespuestaFormulario", back_populates="instancia")
     
+    # Índices compuestos para paginación keyset por filtro
+    __table_args__ = (
+        Index('idx_instancia_procesos_proceso_id_id', 'proceso_id', 'id'),
+        Index('idx_instancia_procesos_estado_id', 'estado', 'id'),
+        Index('idx_instancia_procesos_proceso_estado_id', 'proceso_id', 'estado', 'id'),
+    )
+    
     def __repr__(self):
         return f"<InstanciaProceso(codigo={self.codigo_instancia}, estado={self.estado})>"
 
@@ -236,5 +243,12 @@ class AccionProceso(BaseModel):
     proceso = relationship("Proceso", back_populates="acciones")
     responsable = relationship("Usuario", back_populates="acciones_procesos_responsable", foreign_keys=[responsable_id])
     
+    # Índices compuestos para paginación keyset por filtro
+    __table_args__ = (
+        Index('idx_accion_procesos_proceso_id_id', 'proceso_id', 'id'),
+        Index('idx_accion_procesos_estado_id', 'estado', 'id'),
+        Index('idx_accion_procesos_proceso_estado_id', 'proceso_id', 'estado', 'id'),
+    )
+    
     def __repr__(self):
         return f"<AccionProceso(codigo={self.codigo}, nombre={self.nombre})>"
@@ -48,6 +48,9 @@ class Riesgo(BaseModel):
         Index('riesgos_codigo', 'codigo'),
         Index('riesgos_proceso_id', 'proceso_id'),
         Index('riesgos_etapa_proceso_id', 'etapa_proceso_id'),
+        Index('idx_riesgos_proceso_id_id', 'proceso_id', 'id'),
+        Index('idx_riesgos_estado_id', 'estado', 'id'),
+        Index('idx_riesgos_proceso_estado_id', 'proceso_id', 'estado', 'id'),
     )
     
     def __repr__(self):
@@ -70,6 +73,11 @@ class ControlRiesgo(BaseModel):
     riesgo = relationship("Riesgo", back_populates="controles")
     responsable = relationship("Usuario", back_populates="controles_responsable", foreign_keys=[responsable_id])
     
+    __table_args__ = (
+        Index('idx_control_riesgos_tipo_control_id', 'tipo_control', 'id'),
+        Index('idx_control_riesgos_activo_tipo_id', 'activo', 'tipo_control', 'id'),
+    )
+    
     def __repr__(self):
         return f"<ControlRiesgo(riesgo_id={self.riesgo_id}, tipo={self.tipo_control})>"
 
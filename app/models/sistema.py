@@ -1,7 +1,7 @@
 """
 Modelos del sistema (tickets, notificaciones, configuraciones, formularios, asignaciones)
 """
-from sqlalchemy import Column, String, Text, Integer, Boolean, ForeignKey, Index, JSON, UniqueConstraint, DateTime
+from sqlalchemy import Column, Computed, String, Text, Integer, Boolean, ForeignKey, Index, JSON, UniqueConstraint, DateTime, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from .base import BaseModel
@@ -29,6 +29,14 @@ class Notificacion(BaseModel):
     __table_args__ = (
         Index('notificaciones_usuario_id', 'usuario_id'),
         Index('notificaciones_leida', 'leida'),
+        # Bandeja del usuario ordenada por (creado_en DESC, id DESC): completa, sólo no leídas y por tipo
+        Index('idx_notificaciones_usuario_creado_id', 'usuario_id', text('creado_en DESC'), text('id DESC')),
+        Index(
+            'idx_notificaciones_no_leidas_usuario_creado_id',
+            'usuario_id', text('creado_en DESC'), text('id DESC'),
+            postgresql_where=text('leida = false'),
+        ),
+        Index('idx_notificaciones_usuario_tipo_creado_id', 'usuario_id', 'tipo', text('creado_en DESC'), text('id DESC')),
     )
     
     # Nota: solo tiene creado_en
@@ -46,6 +54,11 @@ class Configuracion(BaseModel):
     tipo_dato = Column(String(50), nullable=False, default='string')
     categoria = Column(String(100), nullable=True)
     activa = Column(Boolean, nullable=False, default=True)
+
+    __table_args__ = (
+        # Filtros del listado (categoria, activa) + orden por clave
+        Index("idx_configuraciones_categoria_activa_clave", "categoria", "activa", "clave"),
+    )
     
     def __repr__(self):
         return f"<Configuracion(clave={self.clave}, activa={self.activa})>"
@@ -69,6 +82,11 @@ class FormularioDinamico(BaseModel):
     aprobado_por = Column(UUID(as_uuid=True), ForeignKey("usuarios.id", onupdate="CASCADE", ondelete="SET NULL"), nullable=True)
     fecha_aprobacion = Column(DateTime(timezone=True), nullable=True)
     parent_formulario_id = Column(UUID(as_uuid=True), ForeignKey("formularios_dinamicos.id", onupdate="CASCADE", ondelete="SET NULL"), nullable=True)
+    # Calculada por la base de datos: plantilla ISO de auditoría (modulo/entidad_tipo normalizados)
+    es_iso_auditoria = Column(
+        Boolean,
+        Computed("lower(trim(modulo)) = 'auditorias' AND lower(trim(entidad_tipo)) = 'auditoria'", persisted=True),
+    )
 
     # Relaciones
     proceso = relationship("Proceso", back_populates="formularios_dinamicos")
@@ -80,6 +98,26 @@ class FormularioDinamico(BaseModel):
         Index("formularios_dinamicos_codigo_idx", "codigo"),
         Index("formularios_dinamicos_modulo_idx", "modulo"),
         Index("formularios_dinamicos_entidad_tipo_idx", "entidad_tipo"),
+        # Orden/keyset del listado (nombre ASC, version DESC, id ASC)
+        Index("idx_formularios_dinamicos_nombre_version_id", "nombre", text("version DESC"), "id"),
+        # Listado filtrado por módulo/entidad con el mismo orden (nombre ASC, version DESC, id ASC)
+        Index(
+            "idx_formularios_dinamicos_modulo_entidad_nombre",
+            "modulo", "entidad_tipo", "nombre", text("version DESC"), "id",
+        ),
+        # Una sola versión aprobada y activa por plantilla (proceso_id NULL cuenta como valor)
+        Index(
+            "uq_formularios_dinamicos_aprobado_activo",
+            "modulo", "entidad_tipo", "proceso_id",
+            unique=True,
+            postgresql_nulls_not_distinct=True,
+            postgresql_where=text("estado_workflow = 'aprobado' AND activo"),
+        ),
+        Index(
+            "idx_formularios_dinamicos_iso_auditoria",
+            "es_iso_auditoria",
+            postgresql_where=text("es_iso_auditoria"),
+        ),
     )
 
     def __repr__(self):
@@ -109,6 +147,12 @@ class CampoFormulario(BaseModel):
     formulario = relationship("FormularioDinamico", back_populates="campos")
     proceso = relationship("Proceso", back_populates="campos_formulario")
     respuestas = relationship("RespuestaFormulario", back_populates="campo")
+
+    __table_args__ = (
+        # Campos de un formulario en el orden del listado
+        Index("idx_campo_formularios_formulario_orden", "formulario_id", "orden", "creado_en", "id"),
+        Index("idx_campo_formularios_proceso_orden", "proceso_id", "orden", "creado_en", "id"),
+    )
     
     def __repr__(self):
         return f"<CampoFormulario(nombre={self.nombre}, tipo={self.tipo_campo})>"
@@ -134,6 +178,13 @@ class RespuestaFormulario(BaseModel):
     auditoria = relationship("Auditoria", back_populates="respuestas_formularios")
     usuario_respuesta = relationship("Usuario", back_populates="respuestas_formularios", foreign_keys=[usuario_respuesta_id])
     evidencia_usuario = relationship("Usuario", foreign_keys=[evidencia_usuario_id])
+
+    __table_args__ = (
+        # Respuestas de una auditoría en el orden del listado
+        Index("idx_respuesta_formularios_auditoria_creado", "auditoria_id", "creado_en", "id"),
+        Index("idx_respuesta_formularios_instancia_creado", "instancia_proceso_id", "creado_en", "id"),
+        Index("idx_respuesta_formularios_campo_creado", "campo_formulario_id", "creado_en", "id"),
+    )
     
     def __repr__(self):
         return f"<RespuestaFormulario(campo_id={self.campo_formulario_id}, instancia_id={self.instancia_proceso_id})>"
@@ -1,7 +1,7 @@
 """
 Modelo de Tickets / Mesa de Ayuda
 """
-from sqlalchemy import Column, String, Text, ForeignKey, Integer, DateTime
+from sqlalchemy import Column, String, Text, ForeignKey, Index, Integer, DateTime, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from .base import BaseModel
@@ -70,6 +70,14 @@ class Ticket(BaseModel):
     asignado = relationship("Usuario", back_populates="tickets_asignados", foreign_keys=[asignado_a])
     area_destino = relationship("Area", foreign_keys=[area_destino_id])
     documento_publico = relationship("Documento", foreign_keys=[documento_publico_id])
+
+    __table_args__ = (
+        # Visibilidad del listado (solicitante OR área OR asignado): un índice por rama del OR,
+        # con estado y el orden por creado_en DESC para evitar el sort
+        Index("idx_tickets_solicitante_estado_creado", "solicitante_id", "estado", text("creado_en DESC")),
+        Index("idx_tickets_area_destino_estado_creado", "area_destino_id", "estado", text("creado_en DESC")),
+        Index("idx_tickets_asignado_estado_creado", "asignado_a", "estado", text("creado_en DESC")),
+    )
     
     def __repr__(self):
         return f"<Ticket(titulo={self.titulo}, estado={self.estado})>"
@@ -7,6 +7,15 @@ from sqlalchemy.orm import relationship
 from .base import BaseModel
 
 
+def formatear_nombre_completo(nombre, segundo_nombre, primer_apellido, segundo_apellido):
+    """Nombres y apellidos separados por espacio, omitiendo los vacíos (None sin nombre)"""
+    if not nombre:
+        return None
+    nombres = " ".join(filter(None, [nombre, segundo_nombre]))
+    apellidos = " ".join(filter(None, [primer_apellido, segundo_apellido]))
+    return f"{nombres} {apellidos}"
+
+
 class Area(BaseModel):
     """Modelo de áreas organizacionales"""
     __tablename__ = "areas"
@@ -91,9 +100,9 @@ class Usuario(BaseModel):
     @property
     def nombre_completo(self):
         """Retorna el nombre completo del usuario"""
-        nombres = [self.nombre, self.segundo_nombre] if self.segundo_nombre else [self.nombre]
-        apellidos = [self.primer_apellido, self.segundo_apellido] if self.segundo_apellido else [self.primer_apellido]
-        return f"{' '.join(nombres)} {' '.join(apellidos)}"
+        return formatear_nombre_completo(
+            self.nombre, self.segundo_nombre, self.primer_apellido, self.segundo_apellido
+        )
     
     @property
     def permisos_codes(self):
@@ -2,6 +2,7 @@
 from typing import Generic, Optional, Type, TypeVar
 from uuid import UUID
 
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 
 ModelType = TypeVar("ModelType")
@@ -47,6 +48,31 @@ class BaseRepository(Generic[ModelType]):
         self.db.flush()
         return obj
 
+    def _valores_columnas(self, data: dict) -> dict:
+        return {key: value for key, value in data.items() if key in self.model.__table__.columns}
+
+    def update_returning(self, obj_id: UUID, data: dict, only_active: bool = True) -> Optional[ModelType]:
+        """UPDATE ... RETURNING en un solo round-trip (sin SELECT previo ni refresh posterior)."""
+        if not self._valores_columnas(data):
+            return self.get_by_id(obj_id) if only_active else self.db.get(self.model, obj_id)
+        return self.update_returning_where(data, self.model.id == obj_id, only_active=only_active)
+
+    def update_returning_where(self, data: dict, *condiciones, only_active: bool = True) -> Optional[ModelType]:
+        """Como update_returning, pero la fila se identifica con condiciones arbitrarias (clave, dueño...)."""
+        values = self._valores_columnas(data)
+        if only_active and hasattr(self.model, "activo"):
+            condiciones = (*condiciones, self.model.activo.is_(True))
+        if not values:
+            return self.db.execute(select(self.model).where(*condiciones)).scalar_one_or_none()
+        stmt = (
+            update(self.model)
+            .where(*condiciones)
+            .values(**values)
+            .returning(self.model)
+            .execution_options(populate_existing=True)
+        )
+        return self.db.execute(stmt).scalar_one_or_none()
+
     def soft_delete(self, obj_id: UUID) -> Optional[ModelType]:
         obj = self.get_by_id(obj_id)
         if not obj:
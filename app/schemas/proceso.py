@@ -1,6 +1,7 @@
 """
 Schemas Pydantic mejorados para procesos ISO 9001:2015
 """
+import msgspec
 from pydantic import BaseModel, Field, ConfigDict, field_validator
 from typing import Optional, List
 from datetime import datetime, date
@@ -221,6 +222,12 @@ class EtapaProcesoOrdenItem(BaseModel):
 
 # ==================== INSTANCIA PROCESO SCHEMAS ====================
 
+class ListFiltersModel(BaseModel):
+    """Filtros comunes de los listados de instancias y acciones de proceso"""
+    proceso_id: Optional[UUID] = None
+    estado: Optional[str] = None
+
+
 class InstanciaProcesoBase(BaseModel):
     """Schema base para instancias de proceso"""
     proceso_id: UUID
@@ -257,6 +264,23 @@ class InstanciaProcesoResponse(InstanciaProcesoBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class InstanciaProcesoStruct(msgspec.Struct):
+    """Struct msgspec equivalente a InstanciaProcesoResponse para listados"""
+    id: UUID
+    proceso_id: UUID
+    codigo_instancia: str
+    estado: str
+    fecha_inicio: datetime
+    creado_en: datetime
+    actualizado_en: datetime
+    descripcion: Optional[str] = None
+    fecha_fin: Optional[datetime] = None
+    iniciado_por: Optional[UUID] = None
+    observaciones: Optional[str] = None
+    proceso_nombre: Optional[str] = None
+    iniciador_nombre: Optional[str] = None
+
+
 # ==================== ACCION PROCESO SCHEMAS ====================
 
 class AccionProcesoBase(BaseModel):
@@ -1,6 +1,7 @@
 """
 Schemas Pydantic para riesgos
 """
+import msgspec
 from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional
 from datetime import datetime, date
@@ -90,3 +91,41 @@ class ControlRiesgoResponse(ControlRiesgoBase):
     actualizado_en: datetime
     
     model_config = ConfigDict(from_attributes=True)
+
+
+# Structs msgspec para serializar listados sin pasar por Pydantic (reflejan los *Response)
+class RiesgoStruct(msgspec.Struct):
+    id: UUID
+    proceso_id: UUID
+    codigo: str
+    descripcion: str
+    tipo_riesgo: str
+    creado_en: datetime
+    actualizado_en: datetime
+    etapa_proceso_id: Optional[UUID] = None
+    nombre: Optional[str] = None
+    categoria: Optional[str] = None
+    probabilidad: Optional[int] = None
+    impacto: Optional[int] = None
+    nivel_riesgo: Optional[str] = None
+    nivel_residual: Optional[int] = None
+    causas: Optional[str] = None
+    consecuencias: Optional[str] = None
+    responsable_id: Optional[UUID] = None
+    estado: str = 'activo'
+    fecha_identificacion: Optional[date] = None
+    fecha_revision: Optional[date] = None
+    tratamiento: Optional[str] = None
+
+
+class ControlRiesgoStruct(msgspec.Struct):
+    id: UUID
+    riesgo_id: UUID
+    descripcion: str
+    tipo_control: str
+    creado_en: datetime
+    actualizado_en: datetime
+    frecuencia: Optional[str] = None
+    responsable_id: Optional[UUID] = None
+    efectividad: Optional[str] = None
+    activo: bool = True
@@ -1,6 +1,7 @@
 """
 Schemas Pydantic para sistema (notificaciones, configuraciones)
 """
+import msgspec
 from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional, Any
 from datetime import datetime
@@ -49,6 +50,67 @@ class AuditLogResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+# Structs msgspec para serializar listados sin pasar por Pydantic (reflejan los *Response)
+class NotificacionStruct(msgspec.Struct):
+    id: UUID
+    usuario_id: UUID
+    titulo: str
+    mensaje: str
+    tipo: str
+    creado_en: datetime
+    leida: bool = False
+    fecha_lectura: Optional[datetime] = None
+    referencia_tipo: Optional[str] = None
+    referencia_id: Optional[UUID] = None
+
+
+class AuditLogStruct(msgspec.Struct):
+    id: UUID
+    tabla: str
+    registro_id: UUID
+    accion: str
+    fecha: datetime
+    creado_en: datetime
+    actualizado_en: datetime
+    usuario_id: Optional[UUID] = None
+    cambios_json: Optional[Any] = None
+
+
+class CampoFormularioStruct(msgspec.Struct):
+    id: UUID
+    nombre: str
+    etiqueta: str
+    tipo_campo: str
+    creado_en: datetime
+    actualizado_en: datetime
+    formulario_id: Optional[UUID] = None
+    proceso_id: Optional[UUID] = None
+    requerido: bool = False
+    opciones: Optional[Any] = None
+    orden: int = 1
+    activo: bool = True
+    validaciones: Optional[Any] = None
+    seccion_iso: Optional[str] = None
+    clausula_iso: Optional[str] = None
+    subclausula_iso: Optional[str] = None
+    evidencia_requerida: bool = False
+
+
+class RespuestaFormularioStruct(msgspec.Struct):
+    id: UUID
+    campo_formulario_id: UUID
+    creado_en: datetime
+    actualizado_en: datetime
+    instancia_proceso_id: Optional[UUID] = None
+    auditoria_id: Optional[UUID] = None
+    valor: Optional[str] = None
+    archivo_adjunto: Optional[str] = None
+    usuario_respuesta_id: Optional[UUID] = None
+    evidencia_hash: Optional[str] = None
+    evidencia_fecha: Optional[datetime] = None
+    evidencia_usuario_id: Optional[UUID] = None
+
+
 # Configuracion Schemas
 class ConfiguracionBase(BaseModel):
     clave: str = Field(..., max_length=100)
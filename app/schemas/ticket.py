@@ -1,6 +1,7 @@
 """
 Schemas Pydantic para Tickets
 """
+import msgspec
 from pydantic import BaseModel, ConfigDict
 from enum import Enum
 from typing import Optional
@@ -112,3 +113,33 @@ class TicketResponse(TicketBase):
     actualizado_en: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+# Structs msgspec para serializar el listado sin pasar por Pydantic (reflejan UsuarioBasic/TicketResponse)
+class UsuarioBasicStruct(msgspec.Struct):
+    id: UUID
+    nombre: str
+    primer_apellido: str
+    correo_electronico: str
+    segundo_apellido: Optional[str] = None
+
+
+class TicketStruct(msgspec.Struct):
+    id: UUID
+    titulo: str
+    descripcion: str
+    categoria: str
+    estado: str
+    solicitante_id: UUID
+    creado_en: datetime
+    actualizado_en: datetime
+    prioridad: Optional[str] = None
+    asignado_a: Optional[UUID] = None
+    area_destino_id: Optional[UUID] = None
+    documento_publico_id: Optional[UUID] = None
+    archivo_adjunto_url: Optional[str] = None
+    solicitante: Optional[UsuarioBasicStruct] = None
+    asignado: Optional[UsuarioBasicStruct] = None
+    solucion: Optional[str] = None
+    fecha_resolucion: Optional[datetime] = None
+    satisfaccion_cliente: Optional[int] = None
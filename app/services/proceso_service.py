@@ -1,4 +1,8 @@
+from threading import Lock
+
+from cachetools import TTLCache
 from fastapi import HTTPException, status
+from sqlalchemy import lambda_stmt, select
 from sqlalchemy.orm import Session, joinedload
 from uuid import UUID
 
@@ -7,9 +11,19 @@ from ..models.proceso import Proceso, EtapaProceso
 from ..models.riesgo import Riesgo
 from ..models.usuario import Usuario
 from ..repositories.proceso import ProcesoRepository, EtapaProcesoRepository
-from ..schemas.proceso import ProcesoCreate, ProcesoUpdate, EtapaProcesoCreate, EtapaProcesoUpdate
+from ..schemas.proceso import ProcesoCreate, ProcesoUpdate, ProcesoResponse, EtapaProcesoCreate, EtapaProcesoUpdate
 from ..utils.audit import registrar_auditoria
 
+# Caché corta (por proceso de worker) de la metadata de procesos leída por selectores y breadcrumbs.
+# Se guarda un dict plano (no el objeto ORM ni el modelo Pydantic) y se invalida en cada mutación.
+_proceso_cache: TTLCache = TTLCache(maxsize=1024, ttl=30)
+_proceso_cache_lock = Lock()
+
+
+def invalidar_cache_proceso(proceso_id: UUID) -> None:
+    with _proceso_cache_lock:
+        _proceso_cache.pop(proceso_id, None)
+
 
 class ProcesoService:
     def __init__(self, db: Session):
@@ -26,17 +40,18 @@ class ProcesoService:
         return usuario
 
     def listar(self, skip: int = 0, limit: int = 100, estado: str | None = None, area_id: UUID | None = None):
-        query = self.db.query(Proceso).options(
+        stmt = lambda_stmt(lambda: select(Proceso).options(
             joinedload(Proceso.area),
             joinedload(Proceso.responsable)
-        )
+        ))
         if hasattr(Proceso, "activo"):
-            query = query.filter(Proceso.activo.is_(True))
+            stmt += lambda s: s.where(Proceso.activo.is_(True))
         if estado:
-            query = query.filter(Proceso.estado == estado)
+            stmt += lambda s: s.where(Proceso.estado == estado)
         if area_id:
-            query = query.filter(Proceso.area_id == area_id)
-        return query.offset(skip).limit(limit).all()
+            stmt += lambda s: s.where(Proceso.area_id == area_id)
+        stmt += lambda s: s.offset(skip).limit(limit)
+        return self.db.execute(stmt).scalars().all()
 
     def obtener(self, proceso_id: UUID) -> Proceso:
         query = self.db.query(Proceso).options(
@@ -50,6 +65,23 @@ class ProcesoService:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Proceso no encontrado")
         return proceso
 
+    def obtener_respuesta(self, proceso_id: UUID) -> ProcesoResponse:
+        """Obtener la respuesta de un proceso usando la caché TTL en memoria"""
+        with _proceso_cache_lock:
+            datos = _proceso_cache.get(proceso_id)
+        if datos is None:
+            proceso = self.obtener(proceso_id)
+            datos = ProcesoResponse.model_validate(proceso).model_dump()
+            datos["area_nombre"] = proceso.area.nombre if proceso.area else None
+            datos["responsable_nombre"] = (
+                f"{proceso.responsable.nombre} {proceso.responsable.primer_apellido}"
+                if proceso.responsable else None
+            )
+            with _proceso_cache_lock:
+                _proceso_cache[proceso_id] = datos
+        # Los datos ya fueron validados al entrar a la caché
+        return ProcesoResponse.model_construct(**datos)
+
     def crear_proceso(self, data: ProcesoCreate, usuario_id: UUID) -> Proceso:
         existente = self.db.query(Proceso).filter(Proceso.codigo == data.codigo).first()
         if existente:
@@ -86,6 +118,7 @@ class ProcesoService:
             self._validar_usuario_activo(update_data["responsable_id"], "responsable")
 
         self.repo.update(proceso_id, update_data)
+        invalidar_cache_proceso(proceso_id)
         registrar_auditoria(
             self.db,
             tabla="procesos",
@@ -102,6 +135,7 @@ class ProcesoService:
         proceso = self.repo.soft_delete(proceso_id)
         if not proceso:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Proceso no encontrado")
+        invalidar_cache_proceso(proceso_id)
 
         registrar_auditoria(
             self.db,
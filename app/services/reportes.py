@@ -1,17 +1,83 @@
 
-from io import BytesIO
-from typing import List, Any
+import hashlib
+import logging
+import os
+import time
+from tempfile import NamedTemporaryFile, SpooledTemporaryFile
+from threading import Lock
+from typing import IO, Callable, Iterable, Iterator, List, Any
 from datetime import datetime
+from cachetools import TTLCache
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.units import inch
 
+from ..config import settings
 from ..models.auditoria import Auditoria
 from ..models.calidad import NoConformidad
 
+logger = logging.getLogger(__name__)
+
+# Tamaño de los bloques enviados al cliente y umbral a partir del cual el PDF se vuelca a disco
+PDF_CHUNK_SIZE = 64 * 1024
+PDF_SPOOL_MAX_SIZE = 1024 * 1024
+
+# Listado de reportes disponibles ya serializado (cuerpo JSON + ETag), compartido por todos los usuarios
+_listado_reportes_cache: TTLCache = TTLCache(maxsize=1, ttl=30)
+_listado_reportes_lock = Lock()
+LISTADO_REPORTES_KEY = "reportes:list"
+
+
+def obtener_listado_reportes_cacheado():
+    with _listado_reportes_lock:
+        return _listado_reportes_cache.get(LISTADO_REPORTES_KEY)
+
+
+def guardar_listado_reportes_cacheado(cuerpo: bytes, etag: str) -> None:
+    with _listado_reportes_lock:
+        _listado_reportes_cache[LISTADO_REPORTES_KEY] = (cuerpo, etag)
+
+
+def invalidar_cache_reportes() -> None:
+    """Descarta el listado cacheado; llamar tras crear/modificar/eliminar auditorías"""
+    with _listado_reportes_lock:
+        _listado_reportes_cache.clear()
+
+
+def iterar_archivo(archivo: IO[bytes]) -> Iterator[bytes]:
+    """Entrega un archivo ya escrito por bloques y lo cierra al terminar (o si el cliente corta)"""
+    try:
+        archivo.seek(0)
+        while True:
+            chunk = archivo.read(PDF_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        archivo.close()
+
+
 class PDFService:
+    @staticmethod
+    def _render_pdf(build_flowables: Callable[[], List[Any]]) -> IO[bytes]:
+        """
+        Renderiza el PDF completo en un temporal (en memoria hasta PDF_SPOOL_MAX_SIZE, luego en disco).
+
+        Se llama antes de empezar la respuesta: un error de renderizado llega como 5xx y no
+        como un 200 con un PDF truncado. ReportLab compone todo el documento antes de escribirlo,
+        así que generar mientras se envía no ahorraba memoria.
+        """
+        output = SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_SIZE)
+        try:
+            doc = SimpleDocTemplate(output, pagesize=letter)
+            doc.build(build_flowables())
+        except Exception:
+            output.close()
+            raise
+        return output
+
     @staticmethod
     def create_header_flowables(title: str, subtitle: str = "") -> List[Any]:
         styles = getSampleStyleSheet()
@@ -27,9 +93,72 @@ class PDFService:
         return flowables
 
     @staticmethod
-    def generate_auditoria_report(auditoria: Auditoria) -> BytesIO:
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
+    def version_auditoria_report(auditoria: Auditoria) -> str:
+        """Clave de versión del PDF: cambia si se modifica la auditoría, sus hallazgos o el auditor líder"""
+        # Marcas completas (con microsegundos) de cada fila: dos ediciones en el mismo segundo
+        # o el alta/baja de un hallazgo producen otra versión
+        marcas = [auditoria.actualizado_en] + [h.actualizado_en for h in auditoria.hallazgos]
+        if auditoria.auditor_lider:
+            marcas.append(auditoria.auditor_lider.actualizado_en)
+        huella = hashlib.sha1(
+            "|".join(m.isoformat() if m else "" for m in marcas).encode("utf-8")
+        ).hexdigest()[:16]
+        return f"{auditoria.id}_{huella}"
+
+    @staticmethod
+    def _barrer_cache_pdf() -> None:
+        """
+        Elimina los PDF de la caché que nadie pidió en PDF_CACHE_MAX_AGE segundos.
+
+        Cada acierto renueva la fecha del archivo, así que sólo se borran versiones
+        en desuso y nunca una que otra petición esté a punto de abrir.
+        """
+        limite = time.time() - settings.PDF_CACHE_MAX_AGE
+        with os.scandir(settings.PDF_CACHE_DIR) as entradas:
+            for entrada in entradas:
+                if not entrada.name.endswith((".pdf", ".tmp")):
+                    continue
+                try:
+                    if entrada.stat().st_mtime < limite:
+                        os.unlink(entrada.path)
+                except FileNotFoundError:
+                    pass
+
+    @staticmethod
+    def render_auditoria_report_cached(auditoria: Auditoria) -> str:
+        """
+        Devuelve la ruta del PDF de la auditoría en la caché de disco, renderizándolo si no existe.
+
+        El archivo se escribe en un temporal y se mueve con os.replace, de modo que una
+        petición concurrente nunca lee un PDF a medio escribir.
+        """
+        version = PDFService.version_auditoria_report(auditoria)
+        os.makedirs(settings.PDF_CACHE_DIR, exist_ok=True)
+        path = os.path.join(settings.PDF_CACHE_DIR, f"{version}.pdf")
+        try:
+            # Acierto: se renueva la fecha para que el barrido no lo considere en desuso
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            pass
+
+        tmp = NamedTemporaryFile(dir=settings.PDF_CACHE_DIR, suffix=".tmp", delete=False)
+        try:
+            with tmp:
+                doc = SimpleDocTemplate(tmp, pagesize=letter)
+                doc.build(PDFService._auditoria_flowables(auditoria))
+            os.replace(tmp.name, path)
+        except Exception:
+            os.unlink(tmp.name)
+            raise
+
+        # Las versiones anteriores no se borran aquí (otra petición puede estar sirviéndolas):
+        # las retira el barrido por antigüedad
+        PDFService._barrer_cache_pdf()
+        return path
+
+    @staticmethod
+    def _auditoria_flowables(auditoria: Auditoria) -> List[Any]:
         flowables = []
         styles = getSampleStyleSheet()
         normal_style = styles['Normal']
@@ -92,14 +221,14 @@ class PDFService:
         else:
             flowables.append(Paragraph("No se registraron hallazgos.", normal_style))
 
-        doc.build(flowables)
-        buffer.seek(0)
-        return buffer
+        return flowables
 
     @staticmethod
-    def generate_noconformidades_report(ncs: List[NoConformidad]) -> BytesIO:
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
+    def render_noconformidades_report(ncs: Iterable[NoConformidad]) -> IO[bytes]:
+        return PDFService._render_pdf(lambda: PDFService._noconformidades_flowables(ncs))
+
+    @staticmethod
+    def _noconformidades_flowables(ncs: Iterable[NoConformidad]) -> List[Any]:
         flowables = []
         styles = getSampleStyleSheet()
         normal_style = styles['Normal']
@@ -134,6 +263,4 @@ class PDFService:
         ]))
         
         flowables.append(t)
-        doc.build(flowables)
-        buffer.seek(0)
-        return buffer
+        return flowables
@@ -1,20 +1,37 @@
-from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from typing import List
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Query, Session
 from uuid import UUID
 
+from ..database import get_db
 from ..models.riesgo import Riesgo, ControlRiesgo, EvaluacionRiesgoHistorial
+from ..repositories.base import BaseRepository
 from ..repositories.riesgo import RiesgoRepository
-from ..schemas.riesgo import RiesgoCreate, RiesgoUpdate, ControlRiesgoCreate, ControlRiesgoUpdate
+from ..schemas.riesgo import (
+    RiesgoCreate,
+    RiesgoUpdate,
+    RiesgoResponse,
+    ControlRiesgoCreate,
+    ControlRiesgoUpdate,
+    ControlRiesgoResponse,
+)
 from .competency_risk_automation_service import CompetencyRiskAutomationService
 from ..utils.audit import registrar_auditoria
+from ..utils.db_errors import es_violacion_unicidad
+from ..utils.orm import opciones_carga_estricta
 
 
 class RiesgoService:
     UMBRAL_ACCION = 12
 
-    def __init__(self, db: Session):
+    # Inyectable con `Depends()`: comparte la sesión cacheada de get_db dentro de la petición
+    def __init__(self, db: Session = Depends(get_db)):
         self.db = db
         self.repo = RiesgoRepository(db)
+        self.control_repo = BaseRepository(db, ControlRiesgo)
 
     @staticmethod
     def calcular_nivel(probabilidad: int, impacto: int) -> str:
@@ -27,8 +44,19 @@ class RiesgoService:
             return "medio"
         return "bajo"
 
-    def listar(self, skip: int = 0, limit: int = 100, proceso_id: UUID | None = None, estado: str | None = None, nivel_riesgo: str | None = None):
-        query = self.db.query(Riesgo)
+    def listar(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        proceso_id: UUID | None = None,
+        estado: str | None = None,
+        nivel_riesgo: str | None = None,
+        after: UUID | None = None,
+        query: Query | None = None,
+    ):
+        if query is None:
+            query = self.db.query(Riesgo)
+        query = query.options(*opciones_carga_estricta())
         if hasattr(Riesgo, "activo"):
             query = query.filter(Riesgo.activo.is_(True))
         if proceso_id:
@@ -37,7 +65,9 @@ class RiesgoService:
             query = query.filter(Riesgo.estado == estado)
         if nivel_riesgo:
             query = query.filter(Riesgo.nivel_riesgo == nivel_riesgo)
-        return query.offset(skip).limit(limit).all()
+        if after:
+            return query.filter(Riesgo.id > after).order_by(Riesgo.id).limit(limit).all()
+        return query.order_by(Riesgo.id).offset(skip).limit(limit).all()
 
     def obtener(self, riesgo_id: UUID) -> Riesgo:
         riesgo = self.repo.get_by_id(riesgo_id)
@@ -46,17 +76,19 @@ class RiesgoService:
         return riesgo
 
     def crear(self, data: RiesgoCreate, usuario_id: UUID) -> Riesgo:
-        existente = self.db.query(Riesgo).filter(Riesgo.codigo == data.codigo).first()
-        if existente:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El código de riesgo ya existe")
-
         payload = data.model_dump()
         if payload.get("probabilidad") and payload.get("impacto"):
             score_base = payload["probabilidad"] * payload["impacto"]
             payload["nivel_riesgo"] = self.calcular_nivel(payload["probabilidad"], payload["impacto"])
             payload["nivel_residual"] = score_base
 
-        riesgo = self.repo.create(payload, creado_por=usuario_id)
+        # La unicidad del código la garantiza la restricción UNIQUE: el flush del INSERT la valida
+        try:
+            riesgo = self.repo.create(payload, creado_por=usuario_id)
+        except IntegrityError as e:
+            self.db.rollback()
+            detalle = "El código de riesgo ya existe" if es_violacion_unicidad(e) else "Error de integridad al crear el riesgo"
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detalle)
 
         if riesgo.probabilidad and riesgo.impacto:
             self.db.add(
@@ -83,7 +115,7 @@ class RiesgoService:
         self.db.refresh(riesgo)
         return riesgo
 
-    def actualizar(self, riesgo_id: UUID, data: RiesgoUpdate, usuario_id: UUID) -> Riesgo:
+    def actualizar(self, riesgo_id: UUID, data: RiesgoUpdate, usuario_id: UUID) -> RiesgoResponse:
         riesgo = self.repo.get_by_id(riesgo_id)
         if not riesgo:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Riesgo no encontrado")
@@ -107,7 +139,7 @@ class RiesgoService:
             if controles == 0:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No se puede cerrar un riesgo sin control asociado")
 
-        self.repo.update(riesgo_id, update_data)
+        self.repo.update_returning(riesgo_id, update_data)
 
         if (
             nueva_prob is not None
@@ -138,9 +170,10 @@ class RiesgoService:
         )
         automation = CompetencyRiskAutomationService(self.db)
         automation.reevaluar_riesgo_critico(riesgo_id)
+        # Se serializa antes del commit: expire_on_commit obligaría a un SELECT extra
+        respuesta = RiesgoResponse.model_validate(riesgo)
         self.db.commit()
-        self.db.refresh(riesgo)
-        return riesgo
+        return respuesta
 
     def eliminar(self, riesgo_id: UUID, usuario_id: UUID) -> None:
         riesgo = self.repo.soft_delete(riesgo_id)
@@ -156,13 +189,22 @@ class RiesgoService:
         )
         self.db.commit()
 
-    def listar_controles(self, skip: int = 0, limit: int = 100, activo: bool | None = None, tipo_control: str | None = None):
+    def listar_controles(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        activo: bool | None = None,
+        tipo_control: str | None = None,
+        after: UUID | None = None,
+    ):
         query = self.db.query(ControlRiesgo)
         if activo is not None:
             query = query.filter(ControlRiesgo.activo == activo)
         if tipo_control:
             query = query.filter(ControlRiesgo.tipo_control == tipo_control)
-        return query.offset(skip).limit(limit).all()
+        if after:
+            return query.filter(ControlRiesgo.id > after).order_by(ControlRiesgo.id).limit(limit).all()
+        return query.order_by(ControlRiesgo.id).offset(skip).limit(limit).all()
 
     def listar_controles_riesgo(self, riesgo_id: UUID):
         return self.db.query(ControlRiesgo).filter(ControlRiesgo.riesgo_id == riesgo_id).all()
@@ -191,11 +233,41 @@ class RiesgoService:
         self.db.refresh(control)
         return control
 
-    def actualizar_control(self, control_id: UUID, data: ControlRiesgoUpdate, usuario_id: UUID) -> ControlRiesgo:
-        control = self.obtener_control(control_id)
+    def crear_controles_bulk(self, data: List[ControlRiesgoCreate], usuario_id: UUID) -> List[ControlRiesgoResponse]:
+        """Inserta varios controles en un único INSERT ... RETURNING y un solo commit"""
+        if not data:
+            return []
+        filas = [{**control.model_dump(), "creado_por": usuario_id} for control in data]
+        try:
+            controles = self.db.scalars(
+                insert(ControlRiesgo).returning(ControlRiesgo, sort_by_parameter_order=True),
+                filas,
+            ).all()
+        except IntegrityError:
+            self.db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Error de integridad al crear los controles (riesgo o responsable inexistente)",
+            )
+        for control, entrada in zip(controles, data):
+            registrar_auditoria(
+                self.db,
+                tabla="control_riesgos",
+                registro_id=control.id,
+                accion="CREATE",
+                usuario_id=usuario_id,
+                cambios=entrada.model_dump(),
+            )
+        # Se construye antes del commit (expire_on_commit) para no releer cada fila
+        respuesta = [ControlRiesgoResponse.model_validate(control) for control in controles]
+        self.db.commit()
+        return respuesta
+
+    def actualizar_control(self, control_id: UUID, data: ControlRiesgoUpdate, usuario_id: UUID) -> ControlRiesgoResponse:
         update_data = data.model_dump(exclude_unset=True)
-        for key, value in update_data.items():
-            setattr(control, key, value)
+        control = self.control_repo.update_returning(control_id, update_data, only_active=False)
+        if not control:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Control de riesgo no encontrado")
         registrar_auditoria(
             self.db,
             tabla="control_riesgos",
@@ -204,9 +276,9 @@ class RiesgoService:
             usuario_id=usuario_id,
             cambios=update_data,
         )
+        respuesta = ControlRiesgoResponse.model_validate(control)
         self.db.commit()
-        self.db.refresh(control)
-        return control
+        return respuesta
 
     def eliminar_control(self, control_id: UUID, usuario_id: UUID) -> None:
         control = self.obtener_control(control_id)
@@ -0,0 +1,12 @@
+"""
+Utilidades para interpretar errores de base de datos
+"""
+from sqlalchemy.exc import IntegrityError
+
+# SQLSTATE de PostgreSQL para violación de restricción UNIQUE
+UNIQUE_VIOLATION = "23505"
+
+
+def es_violacion_unicidad(error: IntegrityError) -> bool:
+    """Indica si el IntegrityError proviene de una restricción UNIQUE"""
+    return getattr(error.orig, "pgcode", None) == UNIQUE_VIOLATION
@@ -0,0 +1,21 @@
+"""
+Utilidades para las opciones de carga del ORM
+"""
+from typing import Tuple
+
+from sqlalchemy.orm import raiseload
+from sqlalchemy.orm.interfaces import LoaderOption
+
+from ..config import settings
+
+
+def opciones_carga_estricta() -> Tuple[LoaderOption, ...]:
+    """
+    raiseload("*") fuera de producción, para añadir después de los loaders explícitos.
+
+    Cualquier relación no declarada que la serialización intente leer falla de forma
+    visible en desarrollo/staging en lugar de disparar un SELECT perezoso por fila.
+    """
+    if settings.ENVIRONMENT == "production":
+        return ()
+    return (raiseload("*"),)
@@ -0,0 +1,98 @@
+"""
+Utilidades de paginación por cursor (keyset)
+"""
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import msgspec
+from fastapi import HTTPException, Response, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+HAS_MORE_HEADER = "X-Has-More"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+def recortar_pagina(filas: Sequence, limit: int) -> Tuple[List, bool]:
+    """
+    Recorta el resultado de una consulta hecha con LIMIT limit + 1.
+
+    La fila extra sólo indica que existe otra página; evita un SELECT COUNT(*).
+    """
+    has_more = len(filas) > limit
+    return list(filas[:limit]), has_more
+
+
+def establecer_siguiente_cursor(
+    response: Response,
+    items: Sequence,
+    has_more: bool,
+    cursor_de: Optional[Callable[[Any], str]] = None,
+) -> None:
+    """
+    Expone si hay más resultados y, en ese caso, el cursor del último elemento.
+
+    Por defecto el cursor es el id; `cursor_de` permite cursores compuestos.
+    """
+    response.headers[HAS_MORE_HEADER] = "true" if has_more else "false"
+    if has_more and items:
+        ultimo = items[-1]
+        response.headers[NEXT_CURSOR_HEADER] = cursor_de(ultimo) if cursor_de else str(ultimo.id)
+
+
+def separar_total(filas: Sequence) -> Tuple[List, Optional[int]]:
+    """
+    Separa las entidades de la columna COUNT(*) OVER () agregada a la consulta.
+
+    El total se calcula antes de OFFSET/LIMIT, así que página y total llegan en un solo SELECT.
+    """
+    if not filas:
+        return [], None
+    return [fila[0] for fila in filas], filas[0][1]
+
+
+def establecer_total(response: Response, total: Optional[int], skip: int) -> None:
+    """Expone el total de filas; sin filas sólo se sabe que es 0 cuando no hubo OFFSET"""
+    if total is None and skip == 0:
+        total = 0
+    if total is not None:
+        response.headers[TOTAL_COUNT_HEADER] = str(total)
+
+
+def codificar_cursor_fecha(fecha: datetime, id_: UUID) -> str:
+    """Cursor opaco (base64) para listados ordenados por (fecha DESC, id DESC)"""
+    crudo = f"{fecha.isoformat()}|{id_}"
+    return base64.urlsafe_b64encode(crudo.encode("utf-8")).decode("ascii")
+
+
+def decodificar_cursor_fecha(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        fecha, id_ = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|", 1)
+        return datetime.fromisoformat(fecha), UUID(id_)
+    except (ValueError, UnicodeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginación inválido"
+        )
+
+
+def codificar_cursor(*valores: Any) -> str:
+    """Cursor opaco (base64) para claves de orden compuestas arbitrarias"""
+    crudo = msgspec.json.encode([str(valor) for valor in valores])
+    return base64.urlsafe_b64encode(crudo).decode("ascii")
+
+
+def decodificar_cursor(cursor: str, *tipos: Callable[[str], Any]) -> Tuple[Any, ...]:
+    """Decodifica un cursor de `codificar_cursor` convirtiendo cada valor con su tipo"""
+    try:
+        valores = msgspec.json.decode(base64.urlsafe_b64decode(cursor.encode("ascii")), type=List[str])
+        if len(valores) != len(tipos):
+            raise ValueError("Cantidad de valores inválida")
+        return tuple(tipo(valor) for tipo, valor in zip(tipos, valores))
+    except (ValueError, UnicodeError, binascii.Error, msgspec.DecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginación inválido"
+        )
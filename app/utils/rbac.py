@@ -7,6 +7,10 @@ from fastapi import HTTPException, status
 
 
 def _extract_role_keys(current_user) -> set[str]:
+    # get_current_user ya deja las claves precalculadas en el usuario
+    precalculadas = getattr(current_user, "role_keys", None)
+    if precalculadas is not None:
+        return set(precalculadas)
     keys = set()
     for user_role in getattr(current_user, "roles", []):
         rol = getattr(user_role, "rol", None)
@@ -0,0 +1,52 @@
+"""
+Clases de respuesta HTTP con serialización optimizada
+"""
+from typing import Any, Iterable, List, Optional, Tuple, Type, TypeVar
+
+import msgspec
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+_encoder = msgspec.json.Encoder()
+
+StructT = TypeVar("StructT", bound=msgspec.Struct)
+
+
+class MsgspecJSONResponse(JSONResponse):
+    """Respuesta JSON codificada con msgspec (Structs, UUID, fechas y enums en C)"""
+
+    def render(self, content: Any) -> bytes:
+        return _encoder.encode(content)
+
+
+def coincide_if_none_match(request: Request, etag: str) -> bool:
+    """
+    Indica si el cliente ya tiene la versión `etag` según If-None-Match.
+
+    Comparación débil (RFC 9110): lista separada por comas, "*" o el mismo valor con/sin W/.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidatos = {valor.strip().removeprefix("W/") for valor in if_none_match.split(",")}
+    return "*" in candidatos or etag.removeprefix("W/") in candidatos
+
+
+def convertir_a_structs(
+    filas: Iterable[Any],
+    struct: Type[StructT],
+    con_total: bool = False,
+) -> Tuple[List[StructT], Optional[int]]:
+    """
+    Convierte filas ORM a Structs msgspec a medida que llegan (pensado para yield_per).
+
+    Con `con_total` cada fila es (entidad, total) por un COUNT(*) OVER () agregado a la consulta.
+    Las entidades no se acumulan: sólo se conservan los Structs ya convertidos.
+    """
+    items: List[StructT] = []
+    total: Optional[int] = None
+    for fila in filas:
+        if con_total:
+            fila, total = fila
+        items.append(msgspec.convert(fila, struct, from_attributes=True))
+    return items, total
@@ -0,0 +1,124 @@
+"""
+Aprobación de versiones de formularios dinámicos contra Postgres.
+
+El índice único parcial uq_formularios_dinamicos_aprobado_activo sólo existe en Postgres,
+así que estas pruebas requieren TEST_DATABASE_URL (una base vacía y desechable).
+"""
+import os
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import app.main  # noqa: F401  (registra todos los modelos en Base.metadata)
+from app.api.sistema import aprobar_formulario_dinamico, crear_formulario_dinamico
+from app.database import Base
+from app.models.sistema import FormularioDinamico
+from app.models.usuario import Usuario
+from app.schemas.sistema import FormularioDinamicoCreate
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="requiere TEST_DATABASE_URL (Postgres)")
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    yield engine
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    # Todo lo que hagan los handlers (commit/rollback) queda dentro de savepoints de esta transacción
+    conexion = engine.connect()
+    transaccion = conexion.begin()
+    sesion = Session(bind=conexion, join_transaction_mode="create_savepoint")
+    yield sesion
+    sesion.close()
+    transaccion.rollback()
+    conexion.close()
+
+
+@pytest.fixture
+def usuario(db):
+    documento = uuid.uuid4().int % 1_000_000_000
+    usuario = Usuario(
+        documento=documento,
+        nombre="Prueba",
+        primer_apellido="Aprobación",
+        correo_electronico=f"prueba{documento}@example.com",
+        nombre_usuario=f"prueba{documento}",
+        contrasena_hash="x",
+    )
+    db.add(usuario)
+    db.commit()
+    return usuario
+
+
+def _formulario(db, codigo: str, version: int, **valores) -> FormularioDinamico:
+    formulario = FormularioDinamico(
+        codigo=codigo,
+        nombre="Formulario de prueba",
+        modulo="pruebas",
+        entidad_tipo="aprobacion",
+        version=version,
+        **valores,
+    )
+    db.add(formulario)
+    db.commit()
+    return formulario
+
+
+def test_aprobar_v2_con_v1_vigente_deja_obsoleta_la_v1(db, usuario):
+    v1 = _formulario(db, "FORM-APR-V1", 1, estado_workflow="aprobado", activo=True)
+    v2 = _formulario(db, "FORM-APR-V2", 2, estado_workflow="borrador", activo=False)
+
+    respuesta = aprobar_formulario_dinamico(v2.id, db=db, current_user=usuario)
+
+    assert respuesta.estado_workflow == "aprobado"
+    assert respuesta.activo is True
+    db.expire_all()
+    v1 = db.get(FormularioDinamico, v1.id)
+    assert v1.estado_workflow == "obsoleto"
+    assert v1.activo is False
+    assert v1.vigente_hasta is not None
+
+
+def test_crear_segunda_version_aprobada_y_activa_responde_409(db, usuario):
+    _formulario(db, "FORM-CRE-V1", 1, estado_workflow="aprobado", activo=True)
+    duplicado = FormularioDinamicoCreate(
+        codigo="FORM-CRE-V2",
+        nombre="Formulario de prueba",
+        modulo="pruebas",
+        entidad_tipo="aprobacion",
+        version=2,
+        estado_workflow="aprobado",
+        activo=True,
+    )
+
+    with pytest.raises(HTTPException) as error:
+        crear_formulario_dinamico(duplicado, db=db, current_user=usuario)
+
+    assert error.value.status_code == 409
+
+
+def test_crear_con_proceso_inexistente_responde_400_generico(db, usuario):
+    formulario = FormularioDinamicoCreate(
+        codigo="FORM-CRE-FK",
+        nombre="Formulario de prueba",
+        modulo="pruebas",
+        entidad_tipo="aprobacion",
+        proceso_id=uuid.uuid4(),
+    )
+
+    with pytest.raises(HTTPException) as error:
+        crear_formulario_dinamico(formulario, db=db, current_user=usuario)
+
+    assert error.value.status_code == 400
+    assert error.value.detail.startswith("Error de integridad")